@@ -12,5 +12,8 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
+# Через ASGI список, просмотр и лента публичных привычек и регистрация обслуживаются асинхронными представлениями.
+# DJANGO_ROOT_URLCONF=config.urls отключает их
+os.environ.setdefault("DJANGO_ROOT_URLCONF", "config.urls_async")
 
 application = get_asgi_application()
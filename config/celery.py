@@ -1,9 +1,42 @@
 import os
 
+from django.db import connections
+
 from celery import Celery
+from celery.signals import worker_init, worker_process_shutdown
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings")
 
 app = Celery("config")
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+
+
+def close_database_pools() -> None:
+    """
+    Закрывает пулы соединений с БД процесса (при DB_POOL=True).
+    :return:
+    """
+    for connection in connections.all():
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close()
+            connection.close_pool()  # type: ignore[attr-defined]  # есть только у бэкенда PostgreSQL
+
+
+@worker_init.connect
+def close_database_pools_before_fork(**kwargs) -> None:
+    """
+    Закрывает пулы соединений главного процесса воркера до запуска дочерних процессов: дочерний процесс создаёт свой
+    пул при первом запросе к БД, а не наследует соединения родителя. Постоянные соединения (CONN_MAX_AGE) между
+    задачами переиспользует и закрывает по истечении срока Django-интеграция Celery.
+    """
+    close_database_pools()
+
+
+@worker_process_shutdown.connect
+def close_database_pools_on_shutdown(**kwargs) -> None:
+    """
+    Закрывает пул соединений дочернего процесса воркера при его завершении, чтобы соединения с БД закрывались
+    штатно, а не обрывались.
+    """
+    close_database_pools()
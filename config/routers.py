@@ -0,0 +1,165 @@
+"""
+Маршрутизация чтения на реплики БД.
+
+Чтение направляется на реплику только внутри блока use_replica — им отмечены запросы, которые допускают небольшое
+отставание реплики: список привычек, лента публичных привычек и поиск привычек для тика напоминаний. Остальные запросы
+и все записи выполняются на основной БД.
+
+Чтобы пользователь сразу видел свои изменения, после запроса с записью в БД пользователь на REPLICA_STICKY_SECONDS
+секунд «прилипает» к основной БД (ReplicaStickinessMiddleware): метка хранится в кеше Django и видна всем процессам.
+Так же после изменения ленты публичных привычек она читается с основной БД, пока реплики догоняют изменение.
+"""
+
+import logging
+import random
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import cache
+
+import redis
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+
+logger = logging.getLogger(__name__)
+
+# Реплика, с которой читает текущий блок use_replica
+_replica: ContextVar[str | None] = ContextVar("replica", default=None)
+# Состояние текущего запроса: {"wrote": был ли запрос с записью в БД}
+_request_state: ContextVar[dict | None] = ContextVar("replica_request_state", default=None)
+
+
+def get_sticky_key(key: str | int) -> str:
+    """
+    Возвращает ключ кеша метки чтения с основной БД.
+    :param key: id пользователя или имя данных
+    :return: Ключ кеша
+    """
+    return f"db:sticky:{key}"
+
+
+def mark_sticky(key: str | int) -> None:
+    """
+    Направляет чтение по ключу на основную БД на REPLICA_STICKY_SECONDS секунд.
+    :param key: id пользователя или имя данных
+    :return:
+    """
+    if not settings.DB_REPLICAS:
+        return
+    try:
+        cache.set(get_sticky_key(key), True, timeout=settings.REPLICA_STICKY_SECONDS)
+    except redis.RedisError as e:
+        logger.warning("Не удалось сохранить метку чтения с основной БД: %s", e)
+
+
+def is_sticky(key: str | int) -> bool:
+    """
+    Признак недавней записи по ключу — чтение должно выполняться с основной БД.
+    :param key: id пользователя или имя данных
+    :return: Признак. Если кеш недоступен — True (отставание реплики неизвестно)
+    """
+    try:
+        return bool(cache.get(get_sticky_key(key)))
+    except redis.RedisError as e:
+        logger.warning("Метки чтения с основной БД недоступны: %s", e)
+        return True
+
+
+@contextmanager
+def use_replica(*sticky_keys: str | int | None) -> Iterator[str | None]:
+    """
+    Направляет чтение в блоке на случайную реплику из DB_REPLICAS, если по ключам не было недавней записи.
+    :param sticky_keys: id пользователя и имена данных, по которым проверяется недавняя запись
+    :return: Псевдоним реплики или None, если чтение выполняется с основной БД
+    """
+    alias = None
+    if settings.DB_REPLICAS and not any(is_sticky(key) for key in sticky_keys if key is not None):
+        alias = random.choice(settings.DB_REPLICAS)
+    token = _replica.set(alias)
+    try:
+        yield alias
+    finally:
+        _replica.reset(token)
+
+
+class ReplicaRouter:
+    """
+    Маршрутизатор БД: чтение внутри блока use_replica — на реплику, остальное — на основную БД. Запись отмечается в
+    состоянии текущего запроса для ReplicaStickinessMiddleware.
+    """
+
+    def db_for_read(self, model, **hints) -> str | None:
+        """
+        Возвращает реплику блока use_replica.
+        """
+        return _replica.get()
+
+    def db_for_write(self, model, **hints) -> None:
+        """
+        Отмечает запись в состоянии текущего запроса. Запись всегда выполняется на основной БД.
+        """
+        state = _request_state.get()
+        if state is not None:
+            state["wrote"] = True
+        return None
+
+    def allow_relation(self, obj1, obj2, **hints) -> bool:
+        """
+        Реплики содержат те же данные, что и основная БД, поэтому связи между объектами разрешены.
+        """
+        return True
+
+
+class ReplicaStickinessMiddleware:
+    """
+    После запроса с записью в БД направляет чтение данных пользователя на основную БД на REPLICA_STICKY_SECONDS
+    секунд, чтобы следующие запросы пользователя видели его изменения, даже если реплика отстаёт.
+    Поддерживает синхронную и асинхронную цепочку обработчиков, чтобы при запуске через ASGI запрос не переключался в
+    поток на этом уровне.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(self.get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        state = {"wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        self.process_state(request, state)
+        return response
+
+    async def __acall__(self, request):
+        """
+        Асинхронная обработка запроса.
+        """
+        state = {"wrote": False}
+        token = _request_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _request_state.reset(token)
+        await sync_to_async(self.process_state)(request, state)
+        return response
+
+    def process_state(self, request, state: dict) -> None:
+        """
+        Отмечает пользователя для чтения с основной БД, если запрос записывал в БД.
+        :param request: Запрос
+        :param state: Состояние запроса
+        :return:
+        """
+        # Пользователя JWT-аутентификации DRF сохраняет в запросе Django после аутентификации
+        user = getattr(request, "user", None)
+        if state["wrote"] and user is not None and user.is_authenticated:
+            mark_sticky(user.pk)
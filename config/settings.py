@@ -51,9 +51,12 @@ MIDDLEWARE = [
 ]
 # Third-party middleware
 MIDDLEWARE += ["corsheaders.middleware.CorsMiddleware"]
+# Чтение с основной БД после записи пользователя (см. config.routers)
+MIDDLEWARE += ["config.routers.ReplicaStickinessMiddleware"]
 
 
-ROOT_URLCONF = "config.urls"
+# Маршруты: config.urls или config.urls_async с асинхронными представлениями (по умолчанию — при запуске через ASGI)
+ROOT_URLCONF = os.getenv("DJANGO_ROOT_URLCONF", "config.urls")
 
 TEMPLATES = [
     {
@@ -74,21 +77,82 @@ WSGI_APPLICATION = "config.wsgi.application"
 
 
 # Database
+# Соединения с БД: постоянные соединения (DB_CONN_MAX_AGE секунд, None — без ограничения) с проверкой перед
+# повторным использованием либо пул соединений psycopg 3 (DB_POOL=True) — пул несовместим с постоянными
+# соединениями, поэтому при нём CONN_MAX_AGE=0. Пул подходит и для ASGI, где постоянные соединения не переиспользуются
+DB_POOL = os.getenv("DB_POOL", "False") == "True"
+DB_CONN_MAX_AGE = os.getenv("DB_CONN_MAX_AGE", "60")
 DATABASES = {
     "default": {
-        "ENGINE": "django.db.backends.postgresql_psycopg2",
+        "ENGINE": "django.db.backends.postgresql",
         "NAME": os.getenv("DB_NAME"),
         "USER": os.getenv("DB_USER"),
         "PASSWORD": os.getenv("DB_PASSWORD"),
         "HOST": os.getenv("DB_HOST"),
         "PORT": os.getenv("DB_PORT"),
+        "CONN_MAX_AGE": 0 if DB_POOL else (None if DB_CONN_MAX_AGE == "None" else int(DB_CONN_MAX_AGE)),
+        "CONN_HEALTH_CHECKS": os.getenv("DB_CONN_HEALTH_CHECKS", "True") == "True",
+        "OPTIONS": (
+            {
+                "pool": {
+                    "min_size": int(os.getenv("DB_POOL_MIN_SIZE", "2")),
+                    "max_size": int(os.getenv("DB_POOL_MAX_SIZE", "10")),
+                    # Время ожидания свободного соединения в секундах
+                    "timeout": float(os.getenv("DB_POOL_TIMEOUT", "10")),
+                    # Время жизни соединения в пуле в секундах
+                    "max_lifetime": float(os.getenv("DB_POOL_MAX_LIFETIME", "3600")),
+                }
+            }
+            if DB_POOL
+            else {}
+        ),
     }
 }
 
+# Реплики для чтения: хосты через запятую, остальные параметры соединения — как у основной БД. Список привычек, лента
+# публичных привычек и поиск привычек для тика напоминаний читаются с реплик (config.routers)
+DB_REPLICA_HOSTS = [host for host in os.getenv("DB_REPLICA_HOSTS", "").split(",") if host]
+for number, host in enumerate(DB_REPLICA_HOSTS):
+    DATABASES[f"replica_{number}"] = {**DATABASES["default"], "HOST": host}
+DB_REPLICAS = [f"replica_{number}" for number in range(len(DB_REPLICA_HOSTS))]
+DATABASE_ROUTERS = ["config.routers.ReplicaRouter"]
+# Время в секундах, в течение которого после записи пользователь читает свои данные с основной БД
+REPLICA_STICKY_SECONDS = int(os.getenv("REPLICA_STICKY_SECONDS", "5"))
 
-# Настройка лёгкой БД для тестов
+
+# Настройка лёгкой БД для тестов. Отдельная БД replica позволяет проверить маршрутизацию чтения на реплику
 if "test" in sys.argv:
-    DATABASES["default"] = {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"}
+    DATABASES = {
+        "default": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+        "replica": {"ENGINE": "django.db.backends.sqlite3", "NAME": ":memory:"},
+    }
+    DB_REPLICAS = []
+
+
+# Cache
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": os.getenv("CACHE_URL", os.getenv("CELERY_BROKER_URL") or "redis://localhost:6379/0"),
+    }
+}
+
+# Максимальное количество привычек в одном списке запроса POST /habits/bulk/
+HABIT_BULK_MAX_ITEMS = int(os.getenv("HABIT_BULK_MAX_ITEMS", "500"))
+
+# Срок хранения отметок об удалении привычек в днях. Клиенты, синхронизировавшиеся раньше, получают полный список
+HABIT_TOMBSTONE_RETENTION_DAYS = int(os.getenv("HABIT_TOMBSTONE_RETENTION_DAYS", "30"))
+
+# Перекрытие окон синхронизации GET /habits/changes/ в секундах: since следующего запроса отстаёт от момента запроса,
+# чтобы не терять изменения, зафиксированные в БД позже, чем рассчитано их время изменения
+HABIT_CHANGES_OVERLAP_SECONDS = int(os.getenv("HABIT_CHANGES_OVERLAP_SECONDS", "60"))
+
+# Время хранения страниц ленты публичных привычек в кеше в секундах (0 — не кешировать)
+PUBLIC_HABITS_CACHE_TIMEOUT = int(os.getenv("PUBLIC_HABITS_CACHE_TIMEOUT", "300"))
+
+# Настройка локального кеша для тестов
+if "test" in sys.argv:
+    CACHES["default"] = {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}
 
 
 # Password validation
@@ -124,6 +188,28 @@ DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
 
 # Custom user model
+# Хеширование паролей: алгоритм новых хешей (pbkdf2, scrypt или argon2) и его параметры. Хешеры остальных алгоритмов
+# нужны для проверки ранее сохранённых паролей, при входе их хеши пересчитываются текущим алгоритмом
+PASSWORD_HASHER = os.getenv("PASSWORD_HASHER", "pbkdf2")
+PASSWORD_HASHER_CLASSES = {
+    "pbkdf2": "user.hashers.TunedPBKDF2PasswordHasher",
+    "scrypt": "user.hashers.TunedScryptPasswordHasher",
+    "argon2": "user.hashers.TunedArgon2PasswordHasher",
+}
+PASSWORD_HASHERS = [
+    PASSWORD_HASHER_CLASSES[PASSWORD_HASHER],
+    *(hasher for name, hasher in PASSWORD_HASHER_CLASSES.items() if name != PASSWORD_HASHER),
+]
+PASSWORD_PBKDF2_ITERATIONS = int(os.getenv("PASSWORD_PBKDF2_ITERATIONS", "1000000"))
+PASSWORD_SCRYPT_WORK_FACTOR = int(os.getenv("PASSWORD_SCRYPT_WORK_FACTOR", str(2**14)))
+PASSWORD_SCRYPT_BLOCK_SIZE = int(os.getenv("PASSWORD_SCRYPT_BLOCK_SIZE", "8"))
+PASSWORD_SCRYPT_PARALLELISM = int(os.getenv("PASSWORD_SCRYPT_PARALLELISM", "1"))
+PASSWORD_ARGON2_TIME_COST = int(os.getenv("PASSWORD_ARGON2_TIME_COST", "2"))
+PASSWORD_ARGON2_MEMORY_COST = int(os.getenv("PASSWORD_ARGON2_MEMORY_COST", "102400"))
+PASSWORD_ARGON2_PARALLELISM = int(os.getenv("PASSWORD_ARGON2_PARALLELISM", "8"))
+# Количество потоков хеширования паролей в процессе (0 — хешировать в потоке запроса)
+PASSWORD_HASH_THREADS = int(os.getenv("PASSWORD_HASH_THREADS", "2"))
+
 AUTH_USER_MODEL = "user.User"
 AUTHENTICATION_BACKENDS = [
     "django.contrib.auth.backends.ModelBackend",
@@ -131,9 +217,19 @@ AUTHENTICATION_BACKENDS = [
 
 
 # Настройка DjangoFilterBackend
+# Аутентификация по утверждениям JWT без запроса пользователя к БД (см. user.authentication.ClaimsJWTAuthentication)
+JWT_CLAIMS_AUTH = os.getenv("JWT_CLAIMS_AUTH", "False") == "True"
+# Кеш пользователей процесса для аутентификации по утверждениям JWT: время жизни записи (в секундах) и максимальное
+# количество записей
+USER_CACHE_TIMEOUT = int(os.getenv("USER_CACHE_TIMEOUT", "30"))
+USER_CACHE_MAX_SIZE = int(os.getenv("USER_CACHE_MAX_SIZE", "10000"))
 REST_FRAMEWORK = {
     "DEFAULT_AUTHENTICATION_CLASSES": [  # Настройка аутентификации
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        (
+            "user.authentication.ClaimsJWTAuthentication"
+            if JWT_CLAIMS_AUTH
+            else "rest_framework_simplejwt.authentication.JWTAuthentication"
+        ),
     ],
     "DEFAULT_PERMISSION_CLASSES": (  # Настройка прав доступа для всех контроллеров
         "rest_framework.permissions.IsAuthenticated",
@@ -148,6 +244,9 @@ SIMPLE_JWT = {
     "ACCESS_TOKEN_LIFETIME": timedelta(minutes=30),  # Настройка времени жизни токена доступа
     "REFRESH_TOKEN_LIFETIME": timedelta(days=1),  # Настройка времени жизни токена обновления
     "AUTH_HEADER_TYPES": ("Bearer",),  # Настройка типа заголовка для токена
+    # Токены содержат утверждения is_active и token_version, обновление отозванных токенов запрещено
+    "TOKEN_OBTAIN_SERIALIZER": "user.serializer.UserTokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "user.serializer.UserTokenRefreshSerializer",
 }
 
 
@@ -166,17 +265,65 @@ CELERY_TASK_TRACK_STARTED = True
 CELERY_TASK_TIME_LIMIT = 30 * 60  # 30 минут
 # Планировщик задач для Celery
 CELERY_BEAT_SCHEDULER = "celery.beat:PersistentScheduler"
+# В тестах задачи выполняются синхронно, без брокера и хранилища результатов
+if "test" in sys.argv:
+    CELERY_TASK_ALWAYS_EAGER = True
+# Количество привычек в одной задаче отправки напоминаний — тик делит привычки текущей минуты на пачки, которые
+# обрабатываются параллельно всеми воркерами
+REMINDER_CHUNK_SIZE = int(os.getenv("REMINDER_CHUNK_SIZE", "500"))
+# Журнал доставки напоминаний (Redis) — защищает от повторной отправки одного напоминания
+REMINDER_LEDGER_URL = os.getenv("REMINDER_LEDGER_URL", CELERY_BROKER_URL or "redis://localhost:6379/0")
+# Время хранения записей журнала в секундах
+REMINDER_LEDGER_TTL = int(os.getenv("REMINDER_LEDGER_TTL", str(2 * 24 * 60 * 60)))
+# Интервал тика напоминаний в минутах — тик обрабатывает все минуты с предыдущего тика, поэтому при нагрузке можно
+# запускать реже, но более «тяжёлые» тики
+REMINDER_TICK_MINUTES = int(os.getenv("REMINDER_TICK_MINUTES", "1"))
+# Максимальное опоздание напоминания в минутах — более старые пропущенные напоминания не отправляются
+REMINDER_MAX_LATENESS = int(os.getenv("REMINDER_MAX_LATENESS", "60"))
+# Очередь исходящих сообщений: максимальное количество попыток отправки, базовая и максимальная задержка между
+# попытками (в секундах), размер пачки повторной отправки, время резервирования пачки (в секундах) и срок хранения
+# отправленных сообщений (в днях)
+OUTBOUND_MAX_ATTEMPTS = int(os.getenv("OUTBOUND_MAX_ATTEMPTS", "5"))
+OUTBOUND_RETRY_BASE_DELAY = int(os.getenv("OUTBOUND_RETRY_BASE_DELAY", "10"))
+OUTBOUND_RETRY_MAX_DELAY = int(os.getenv("OUTBOUND_RETRY_MAX_DELAY", "600"))
+OUTBOUND_DRAIN_BATCH_SIZE = int(os.getenv("OUTBOUND_DRAIN_BATCH_SIZE", "500"))
+OUTBOUND_LEASE_SECONDS = int(os.getenv("OUTBOUND_LEASE_SECONDS", "300"))
+OUTBOUND_RETENTION_DAYS = int(os.getenv("OUTBOUND_RETENTION_DAYS", "7"))
 CELERY_BEAT_SCHEDULE = {
-    "send-habit-reminders-every-minute": {
+    "send-habit-reminders": {
         "task": "habit.tasks.send_habit_reminders",
+        "schedule": crontab(minute=f"*/{REMINDER_TICK_MINUTES}"),  # по умолчанию — каждую минуту
+        "args": [],
+    },
+    "drain-outbound-messages-every-minute": {
+        "task": "habit.tasks.drain_outbound_messages",
         "schedule": crontab(),  # каждую минуту
         "args": [],
     },
+    "purge-outbound-messages-daily": {
+        "task": "habit.tasks.purge_outbound_messages",
+        "schedule": crontab(hour=3, minute=0),  # каждый день в 03:00
+        "args": [],
+    },
+    "purge-deleted-habits-daily": {
+        "task": "habit.tasks.purge_deleted_habits",
+        "schedule": crontab(hour=3, minute=30),  # каждый день в 03:30
+        "args": [],
+    },
 }
 
 
 # Telegram Integration
 TELEGRAM_BOT_TOKEN = os.getenv("TELEGRAM_BOT_TOKEN")
+# Адрес Bot API — можно заменить на локальную заглушку для тестов
+TELEGRAM_API_URL = os.getenv("TELEGRAM_API_URL", "https://api.telegram.org")
+# Таймаут HTTP-запроса к Bot API (в секундах)
+TELEGRAM_TIMEOUT = float(os.getenv("TELEGRAM_TIMEOUT", "5"))
+# Количество одновременных запросов к Bot API из одного процесса
+TELEGRAM_CONCURRENCY = int(os.getenv("TELEGRAM_CONCURRENCY", "8"))
+# Ограничения Telegram на частоту отправки: сообщений в секунду на бота и на один чат
+TELEGRAM_GLOBAL_RATE = float(os.getenv("TELEGRAM_GLOBAL_RATE", "30"))
+TELEGRAM_CHAT_RATE = float(os.getenv("TELEGRAM_CHAT_RATE", "1"))
 
 
 # Настройка CORS - домены, которым разрешён доступ
@@ -0,0 +1,21 @@
+"""
+URL configuration for config project with async views (ASGI).
+
+Список, просмотр и лента публичных привычек и регистрация обслуживаются асинхронными представлениями, остальные
+адреса — теми же представлениями, что и в config.urls. Подключается в config.asgi через DJANGO_ROOT_URLCONF.
+"""
+
+from django.urls import path
+
+from habit.async_views import habit_detail, habits, public_habits
+from user.async_views import register
+
+from .urls import urlpatterns as sync_urlpatterns
+
+urlpatterns = [
+    path("api/user/register/", register),
+    path("api/habit/habits/", habits),
+    path("api/habit/habits/public/", public_habits),
+    path("api/habit/habits/<int:pk>/", habit_detail),
+    *sync_urlpatterns,
+]
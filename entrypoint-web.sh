@@ -22,5 +22,9 @@ source "$(dirname "$0")/entrypoint_prepare_logs.sh"
 # Собираем статику
 python manage.py collectstatic --noinput
 
-# Запускаем Gunicorn
-exec gunicorn config.wsgi:application --bind 0.0.0.0:8000
+# Запускаем ASGI-сервер uvicorn (WEB_SERVER=asgi) с асинхронными представлениями или Gunicorn (с потоками
+# хеширование паролей выполняется в пуле PASSWORD_HASH_THREADS и не занимает все потоки воркера при наплыве входов)
+if [ "${WEB_SERVER:-wsgi}" = "asgi" ]; then
+  exec uvicorn config.asgi:application --host 0.0.0.0 --port 8000 --workers "${WEB_WORKERS:-1}"
+fi
+exec gunicorn config.wsgi:application --bind 0.0.0.0:8000 --workers "${WEB_WORKERS:-1}" --threads "${GUNICORN_THREADS:-1}"
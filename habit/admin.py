@@ -1,6 +1,7 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from habit.models import Habit, PleasantHabit
+from habit.models import DeadLetterMessage, Habit, HabitCompletion, OutboundMessage, PleasantHabit
 
 
 @admin.register(Habit)
@@ -23,3 +24,47 @@ class PleasantHabitAdmin(admin.ModelAdmin):
     list_display = ("user", "action")
     list_filter = ("user",)
     ordering = ("user",)
+
+
+@admin.register(HabitCompletion)
+class HabitCompletionAdmin(admin.ModelAdmin):
+    """
+    Представляет административное представление для отметок о выполнении привычек.
+    """
+
+    list_display = ("habit", "date")
+    raw_id_fields = ("habit",)  # Без выпадающего списка всех привычек
+    ordering = ("-date",)
+
+
+@admin.register(OutboundMessage)
+class OutboundMessageAdmin(admin.ModelAdmin):
+    """
+    Представляет административное представление для очереди исходящих сообщений.
+    """
+
+    list_display = ("chat_id", "status", "attempts", "next_attempt_at", "sent_at")
+    list_filter = ("status",)
+    ordering = ("-created_at",)
+
+
+@admin.register(DeadLetterMessage)
+class DeadLetterMessageAdmin(admin.ModelAdmin):
+    """
+    Представляет административное представление для очереди недоставленных сообщений.
+    """
+
+    list_display = ("chat_id", "attempts", "last_error", "created_at")
+    ordering = ("-created_at",)
+    actions = ("retry",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).filter(status=OutboundMessage.Status.DEAD)
+
+    @admin.action(description="Повторить отправку")
+    def retry(self, request, queryset):
+        """
+        Возвращает выбранные сообщения в очередь отправки.
+        """
+        updated = queryset.update(status=OutboundMessage.Status.PENDING, attempts=0, next_attempt_at=timezone.now())
+        self.message_user(request, f"Возвращено в очередь сообщений: {updated}")
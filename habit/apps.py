@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class HabitConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "habit"
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения.
+        """
+        from habit import signals  # noqa: F401
@@ -0,0 +1,109 @@
+"""
+Асинхронные представления привычек для запуска через ASGI (config.urls_async): список, просмотр и лента публичных
+привычек. Запросы к БД выполняются асинхронным ORM Django, остальные методы тех же адресов передаются HabitViewSet.
+"""
+
+from django.http import HttpRequest, HttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import NotFound
+from rest_framework.request import Request
+
+from config.routers import use_replica
+from habit.models import Habit
+from habit.paginators import HabitCursorPagination, HabitPagination
+from habit.serializers import HabitExpandedSerializer, HabitListSerializer, HabitSerializer
+from habit.views import HabitViewSet, get_public_page
+from user.async_views import api_response, async_api_view
+
+# Представления HabitViewSet для остальных методов адресов асинхронных представлений
+habit_list_view = HabitViewSet.as_view({"post": "create"})
+habit_detail_view = HabitViewSet.as_view({"put": "update", "patch": "partial_update", "delete": "destroy"})
+
+
+def expand_related_habit(request: HttpRequest) -> bool:
+    """
+    Признак запроса со встроенной связанной приятной привычкой (?expand=related_habit).
+    :param request: Запрос
+    :return: Признак
+    """
+    return "related_habit" in request.GET.get("expand", "").split(",")
+
+
+@async_api_view
+async def list_habits(request: HttpRequest) -> HttpResponse:
+    """
+    Возвращает страницу привычек текущего пользователя — то же, что HabitViewSet.list с HabitPagination.
+    """
+    drf_request = Request(request)
+    drf_request.user = request.user
+    paginator = HabitPagination()
+    habits = (
+        Habit.objects.filter(user=request.user)
+        .order_by("created_at", "id")
+        .values(*HabitListSerializer.get_values(expand_related_habit(request)))
+    )
+    with use_replica(request.user.pk):
+        rows = await paginator.apaginate_queryset(habits, drf_request)
+    return api_response(paginator.get_paginated_response(HabitListSerializer(rows, many=True).data).data)
+
+
+@async_api_view
+async def retrieve_habit(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Возвращает привычку текущего пользователя — то же, что HabitViewSet.retrieve.
+    """
+    habits = Habit.objects.filter(user=request.user)
+    serializer_class = HabitSerializer
+    if expand_related_habit(request):
+        habits = habits.select_related("related_habit")
+        serializer_class = HabitExpandedSerializer
+    habit = await habits.filter(pk=pk).afirst()
+    if habit is None:
+        # Тот же текст, что у get_object_or_404 в HabitViewSet
+        raise NotFound(f"No {Habit._meta.object_name} matches the given query.")
+    return api_response(serializer_class(habit, context={"request": request}).data)
+
+
+@require_GET
+@async_api_view
+async def public_habits(request: HttpRequest) -> HttpResponse:
+    """
+    Возвращает страницу ленты публичных привычек — то же, что HabitViewSet.public. Кеш страниц и курсорная пагинация
+    DRF синхронны, поэтому страница собирается в потоке, а цикл событий на это время свободен.
+    """
+    drf_request = Request(request)
+    drf_request.user = request.user
+    data, etag = await sync_to_async(get_public_page)(
+        drf_request, HabitCursorPagination(), expand_related_habit(request)
+    )
+    if etag in request.headers.get("If-None-Match", ""):
+        return HttpResponse(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+    return api_response(data, headers={"ETag": etag})
+
+
+@csrf_exempt
+async def habits(request: HttpRequest) -> HttpResponse:
+    """
+    Эндпоинты:
+    GET /habits/ — асинхронно, list_habits,
+    POST /habits/ — HabitViewSet.
+    """
+    if request.method == "GET":
+        return await list_habits(request)
+    return await sync_to_async(habit_list_view)(request)
+
+
+@csrf_exempt
+async def habit_detail(request: HttpRequest, pk: int) -> HttpResponse:
+    """
+    Эндпоинты:
+    GET /habits/{id}/ — асинхронно, retrieve_habit,
+    PUT, PATCH, DELETE /habits/{id}/ — HabitViewSet.
+    """
+    if request.method == "GET":
+        return await retrieve_habit(request, pk)
+    return await sync_to_async(habit_detail_view)(request, pk=pk)
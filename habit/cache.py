@@ -0,0 +1,112 @@
+"""
+Модуль кеширования ленты публичных привычек.
+Лента одинакова для всех пользователей, поэтому сериализованные страницы хранятся в кеше Django (Redis) под ключом,
+который содержит версию ленты. Создание, изменение, снятие с публикации или удаление публичной привычки увеличивает
+версию (сигналы habit.signals) — старые страницы перестают читаться и удаляются из кеша по истечении
+PUBLIC_HABITS_CACHE_TIMEOUT. Для каждой страницы хранится ETag, поэтому клиент с актуальной страницей получает 304.
+"""
+
+import hashlib
+import json
+import logging
+
+from django.conf import settings
+from django.core.cache import cache
+
+import redis
+from rest_framework.utils.encoders import JSONEncoder
+
+from config.routers import mark_sticky
+
+logger = logging.getLogger(__name__)
+
+# Ключ версии ленты публичных привычек
+PUBLIC_HABITS_VERSION_KEY = "habit:public:version"
+# Ключ метки чтения ленты с основной БД после её изменения (config.routers)
+PUBLIC_HABITS_STICKY_KEY = "habit:public"
+
+
+def get_public_habits_version() -> int | None:
+    """
+    Возвращает текущую версию ленты публичных привычек.
+    :return: Версия ленты или None, если кеш недоступен
+    """
+    try:
+        version = cache.get(PUBLIC_HABITS_VERSION_KEY)
+        if version is None:
+            cache.add(PUBLIC_HABITS_VERSION_KEY, 1, timeout=None)
+            version = cache.get(PUBLIC_HABITS_VERSION_KEY)
+        return version
+    except redis.RedisError as e:
+        logger.warning("Кеш ленты публичных привычек недоступен: %s", e)
+        return None
+
+
+def bump_public_habits_version() -> None:
+    """
+    Увеличивает версию ленты публичных привычек, чтобы закешированные страницы перестали использоваться.
+    :return:
+    """
+    # Пока реплики не догнали изменение, лента читается с основной БД — иначе под новой версией закешировалась бы
+    # устаревшая страница
+    mark_sticky(PUBLIC_HABITS_STICKY_KEY)
+    try:
+        cache.add(PUBLIC_HABITS_VERSION_KEY, 1, timeout=None)
+        cache.incr(PUBLIC_HABITS_VERSION_KEY)
+    except (ValueError, redis.RedisError) as e:
+        logger.warning("Не удалось сбросить кеш ленты публичных привычек: %s", e)
+
+
+def get_page_key(version: int, url: str) -> str:
+    """
+    Возвращает ключ кеша страницы ленты.
+    :param version: Версия ленты
+    :param url: Полный адрес запроса и размер страницы
+    :return: Ключ кеша
+    """
+    return f"habit:public:{version}:{hashlib.md5(url.encode()).hexdigest()}"
+
+
+def get_etag(data: object) -> str:
+    """
+    Возвращает ETag сериализованной страницы.
+    :param data: Данные ответа
+    :return: ETag
+    """
+    content = json.dumps(data, cls=JSONEncoder, sort_keys=True).encode()
+    return f'"{hashlib.md5(content).hexdigest()}"'
+
+
+def get_cached_page(version: int | None, url: str) -> tuple[object, str] | None:
+    """
+    Возвращает закешированную страницу ленты.
+    :param version: Версия ленты, прочитанная до запроса к БД
+    :param url: Полный адрес запроса и размер страницы
+    :return: Данные страницы и её ETag или None, если страницы нет в кеше
+    """
+    if version is None or not settings.PUBLIC_HABITS_CACHE_TIMEOUT:
+        return None
+    try:
+        return cache.get(get_page_key(version, url))
+    except redis.RedisError as e:
+        logger.warning("Кеш ленты публичных привычек недоступен: %s", e)
+        return None
+
+
+def set_cached_page(version: int | None, url: str, data: object, etag: str) -> None:
+    """
+    Сохраняет страницу ленты в кеш.
+    Версия читается до запроса к БД: если привычку изменили во время построения страницы, страница сохранится под
+    устаревшей версией и не будет прочитана.
+    :param version: Версия ленты, прочитанная до запроса к БД
+    :param url: Полный адрес запроса и размер страницы
+    :param data: Данные страницы
+    :param etag: ETag страницы
+    :return:
+    """
+    if version is None or not settings.PUBLIC_HABITS_CACHE_TIMEOUT:
+        return
+    try:
+        cache.set(get_page_key(version, url), (data, etag), timeout=settings.PUBLIC_HABITS_CACHE_TIMEOUT)
+    except redis.RedisError as e:
+        logger.warning("Кеш ленты публичных привычек недоступен: %s", e)
@@ -0,0 +1,97 @@
+"""
+Модуль журнала доставки напоминаний.
+Журнал хранится в Redis: на каждую пару (привычка, минута выполнения) ставится ключ командой SET NX с TTL. Напоминание
+отправляет только тот, кто первым поставил ключ, поэтому повторный запуск тика (опоздание beat, повтор задачи,
+несколько экземпляров beat) не приводит к повторной отправке. Ключи удаляются Redis по истечении TTL.
+Там же хранится последняя обработанная тиком минута выполнения, чтобы следующий тик мог обработать пропущенные минуты.
+"""
+
+import logging
+from collections.abc import Iterable
+from datetime import UTC, datetime
+from functools import lru_cache
+from typing import cast
+
+from django.conf import settings
+
+import redis
+
+logger = logging.getLogger(__name__)
+
+
+class ReminderLedger:
+    """
+    Журнал доставки напоминаний в Redis.
+    """
+
+    def __init__(self, client: redis.Redis, ttl: int | None = None, prefix: str = "habit:reminder"):
+        """
+        :param client: Клиент Redis
+        :param ttl: Время хранения записи журнала в секундах. По умолчанию — REMINDER_LEDGER_TTL
+        :param prefix: Префикс ключей журнала
+        """
+        self.client = client
+        self.ttl = ttl or settings.REMINDER_LEDGER_TTL
+        self.prefix = prefix
+
+    def key(self, habit_id: int, occurrence: datetime) -> str:
+        """
+        Возвращает ключ записи журнала.
+        :param habit_id: id привычки
+        :param occurrence: Минута выполнения привычки
+        :return: Ключ Redis
+        """
+        return f"{self.prefix}:{habit_id}:{int(occurrence.timestamp())}"
+
+    def claim(self, reminders: Iterable[tuple[int, datetime]]) -> list[int]:
+        """
+        Атомарно отмечает напоминания как отправляемые и возвращает те, которые ещё не были отмечены.
+        Если Redis недоступен, возвращает все привычки — дубль напоминания лучше, чем его потеря.
+        :param reminders: Пары (id привычки, минута выполнения)
+        :return: id привычек, напоминания о которых нужно отправить
+        """
+        reminders = list(reminders)
+        if not reminders:
+            return []
+        try:
+            pipeline = self.client.pipeline(transaction=False)
+            for habit_id, occurrence in reminders:
+                pipeline.set(self.key(habit_id, occurrence), 1, nx=True, ex=self.ttl)
+            claimed = pipeline.execute()
+        except redis.RedisError as e:
+            logger.warning("Журнал доставки напоминаний недоступен: %s", e)
+            return [habit_id for habit_id, _ in reminders]
+        return [habit_id for (habit_id, _), is_new in zip(reminders, claimed, strict=True) if is_new]
+
+    def get_last_processed(self) -> datetime | None:
+        """
+        Возвращает последнюю минуту выполнения, обработанную тиком напоминаний.
+        :return: Минута выполнения (aware, UTC) или None, если тик ещё не запускался или Redis недоступен
+        """
+        try:
+            # Синхронный клиент возвращает значение, а не Awaitable, как указано в аннотации redis-py
+            value = cast(bytes | None, self.client.get(f"{self.prefix}:last_processed"))
+        except redis.RedisError as e:
+            logger.warning("Журнал доставки напоминаний недоступен: %s", e)
+            return None
+        return datetime.fromtimestamp(int(value), UTC) if value else None
+
+    def set_last_processed(self, occurrence: datetime) -> None:
+        """
+        Запоминает последнюю минуту выполнения, обработанную тиком напоминаний.
+        :param occurrence: Минута выполнения
+        :return:
+        """
+        try:
+            self.client.set(f"{self.prefix}:last_processed", int(occurrence.timestamp()), ex=self.ttl)
+        except redis.RedisError as e:
+            logger.warning("Журнал доставки напоминаний недоступен: %s", e)
+
+
+@lru_cache(maxsize=1)
+def get_reminder_ledger() -> ReminderLedger:
+    """
+    Возвращает общий для процесса журнал доставки напоминаний.
+    :return: Журнал доставки напоминаний
+    """
+    return ReminderLedger(redis.Redis.from_url(settings.REMINDER_LEDGER_URL))
@@ -0,0 +1,104 @@
+"""
+Общие инструменты для команд-бенчмарков: наполнение БД тестовыми привычками, токены доступа, замер времени и откат
+изменений.
+Команды бенчмарков работают внутри транзакции, которая откатывается по завершении, поэтому их можно запускать на
+рабочей копии БД, не оставляя тестовых данных.
+"""
+
+import statistics
+import time as time_module
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from datetime import time, timedelta
+from typing import cast
+
+from django.db import transaction
+
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from habit.models import Habit
+from user.models import User
+from user.serializer import UserTokenObtainPairSerializer
+
+# Размер пачки для bulk_create при наполнении БД
+SEED_BATCH_SIZE = 5000
+
+
+class Rollback(Exception):
+    """
+    Исключение для отката транзакции бенчмарка.
+    """
+
+
+@contextmanager
+def rollback() -> Iterator[None]:
+    """
+    Выполняет блок кода в транзакции и откатывает все изменения по его завершении.
+    """
+    try:
+        with transaction.atomic():
+            yield
+            raise Rollback
+    except Rollback:
+        pass
+
+
+def create_bench_user(email: str = "bench@example.com", **extra_fields) -> User:
+    """
+    Создаёт пользователя для бенчмарка (без хеширования пароля).
+    :param email: Электронная почта пользователя
+    :param extra_fields: Дополнительные поля пользователя
+    :return: Объект пользователя
+    """
+    return User.objects.create(email=email, **extra_fields)
+
+
+def get_access_token(user: User) -> str:
+    """
+    Возвращает токен доступа пользователя с утверждениями UserTokenObtainPairSerializer.
+    :param user: Объект пользователя
+    :return: Токен доступа
+    """
+    # token_class сериализатора — RefreshToken, в аннотации simplejwt указан базовый Token
+    refresh = cast(RefreshToken, UserTokenObtainPairSerializer.get_token(user))
+    return str(refresh.access_token)
+
+
+def seed_habits(user: User, count: int, start: int = 0, **extra_fields) -> None:
+    """
+    Наполняет БД привычками, равномерно распределёнными по минутам суток.
+    :param user: Владелец привычек
+    :param count: Количество привычек
+    :param start: Порядковый номер первой привычки (чтобы досоздавать привычки к уже существующим)
+    :param extra_fields: Дополнительные поля привычек
+    :return:
+    """
+    for offset in range(start, start + count, SEED_BATCH_SIZE):
+        batch = []
+        for number in range(offset, min(offset + SEED_BATCH_SIZE, start + count)):
+            habit = Habit(
+                user=user,
+                place="Дом",
+                time=time(number % 1440 // 60, number % 60),
+                action=f"Привычка {number}",
+                duration=timedelta(minutes=1),
+                **extra_fields,
+            )
+            habit.refresh_schedule()
+            batch.append(habit)
+        Habit.objects.bulk_create(batch)
+
+
+def measure(func: Callable[[], object], repeat: int) -> float:
+    """
+    Замеряет медианное время выполнения функции.
+    :param func: Замеряемая функция
+    :param repeat: Количество повторов
+    :return: Медианное время выполнения в миллисекундах
+    """
+    timings = []
+    for _ in range(repeat):
+        started = time_module.perf_counter()
+        func()
+        timings.append((time_module.perf_counter() - started) * 1000)
+    return statistics.median(timings)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.authentication import JWTAuthentication
+
+from habit.management.commands._bench import create_bench_user, get_access_token, measure, rollback, seed_habits
+from habit.views import HabitViewSet
+from user.authentication import ClaimsJWTAuthentication
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время аутентифицированного запроса списка привычек: JWTAuthentication с загрузкой пользователя из БД
+    (до) и ClaimsJWTAuthentication по утверждениям токена (после).
+
+    Пример:
+    python manage.py bench_auth --habits 20
+    """
+
+    help = "Бенчмарк аутентификации по JWT"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=500)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+
+        with rollback(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            user = create_bench_user()
+            seed_habits(user, options["habits"])
+            token = get_access_token(user)
+
+            self.stdout.write(f"{'authentication':>24} {'ms':>8} {'queries':>8}")
+            for authentication_class in (JWTAuthentication, ClaimsJWTAuthentication):
+                view = HabitViewSet.as_view({"get": "list"}, authentication_classes=[authentication_class])
+
+                def get():
+                    return view(factory.get("/api/habit/habits/", HTTP_AUTHORIZATION=f"Bearer {token}")).render()
+
+                timing = measure(get, options["repeat"])
+                with CaptureQueriesContext(connection) as queries:
+                    get()
+                self.stdout.write(f"{authentication_class.__name__:>24} {timing:>8.2f} {len(queries):>8}")
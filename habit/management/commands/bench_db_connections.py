@@ -0,0 +1,91 @@
+from collections.abc import Callable
+from wsgiref.util import setup_testing_defaults
+
+from django.core.handlers.wsgi import WSGIHandler
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.db.backends.postgresql.psycopg_any import is_psycopg3
+from django.test import override_settings
+
+from habit.management.commands._bench import create_bench_user, get_access_token, measure, seed_habits
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время ответа GET /api/habit/habits/ при новом соединении с PostgreSQL на каждый запрос
+    (CONN_MAX_AGE=0, до), с постоянными соединениями и проверкой перед повторным использованием и с пулом соединений
+    psycopg 3 (после). Запросы проходят через WSGIHandler, поэтому соединения закрываются и возвращаются в пул по
+    сигналу завершения запроса, как под gunicorn.
+    Пользователь и привычки бенчмарка сохраняются в БД (соединения закрываются между запросами, поэтому откат
+    транзакцией невозможен) и удаляются по завершении.
+
+    Пример:
+    python manage.py bench_db_connections --repeat 200
+    """
+
+    help = "Бенчмарк постоянных соединений и пула соединений с БД"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=20)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Бенчмарк рассчитан на PostgreSQL")
+
+        scenarios = {
+            "CONN_MAX_AGE=0": {"CONN_MAX_AGE": 0, "CONN_HEALTH_CHECKS": False, "OPTIONS": {}},
+            "CONN_MAX_AGE=60": {"CONN_MAX_AGE": 60, "CONN_HEALTH_CHECKS": True, "OPTIONS": {}},
+        }
+        if is_psycopg3:
+            scenarios["pool"] = {
+                "CONN_MAX_AGE": 0,
+                "CONN_HEALTH_CHECKS": False,
+                "OPTIONS": {"pool": {"min_size": 1, "max_size": 2}},
+            }
+        else:
+            self.stderr.write("Пул соединений требует psycopg 3 — сценарий пропущен")
+
+        original = {key: connection.settings_dict[key] for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS", "OPTIONS")}
+        handler = WSGIHandler()
+        user = create_bench_user()
+        try:
+            seed_habits(user, options["habits"])
+            token = get_access_token(user)
+
+            def start_response(status: str, headers: list, exc_info=None) -> Callable[[bytes], object]:
+                """
+                Заглушка start_response WSGI-сервера: тело ответа читается из итератора ответа.
+                """
+                return lambda data: None
+
+            def get():
+                environ = {"PATH_INFO": "/api/habit/habits/", "HTTP_AUTHORIZATION": f"Bearer {token}"}
+                setup_testing_defaults(environ)
+                response = handler(environ, start_response)
+                b"".join(response)
+                # Как WSGI-сервер: закрытие ответа отправляет request_finished, и Django закрывает соединение или
+                # возвращает его в пул
+                response.close()
+
+            self.stdout.write(f"{'connections':>16} {'ms':>8}")
+            with override_settings(ALLOWED_HOSTS=["127.0.0.1"]):
+                for name, scenario in scenarios.items():
+                    self.reset(scenario)
+                    get()
+                    self.stdout.write(f"{name:>16} {measure(get, options['repeat']):>8.2f}")
+        finally:
+            self.reset(original)
+            user.delete()
+
+    @staticmethod
+    def reset(settings_dict: dict) -> None:
+        """
+        Закрывает соединение и пул и применяет параметры соединения.
+        :param settings_dict: Параметры соединения (CONN_MAX_AGE, CONN_HEALTH_CHECKS, OPTIONS)
+        :return:
+        """
+        connection.close()
+        if connection.settings_dict["OPTIONS"].get("pool"):
+            connection.close_pool()  # type: ignore[attr-defined]  # есть только у бэкенда PostgreSQL
+        connection.settings_dict.update(settings_dict)
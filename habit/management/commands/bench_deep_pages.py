@@ -0,0 +1,61 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import override_settings
+
+from rest_framework.pagination import Cursor
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from habit.management.commands._bench import create_bench_user, measure, rollback, seed_habits
+from habit.models import Habit
+from habit.paginators import HabitCursorPagination, HabitPagination
+from habit.views import HabitViewSet
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время ответа ленты публичных привычек на глубоких страницах: нумерованная пагинация с COUNT(*) и
+    OFFSET (до) и курсорная пагинация по (created_at, id) (после). Кеш ленты на время замера отключается.
+
+    Пример:
+    python manage.py bench_deep_pages --habits 1000000 --depths 0 10000 100000 900000
+    """
+
+    help = "Бенчмарк глубоких страниц ленты публичных привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=1_000_000)
+        parser.add_argument("--depths", nargs="+", type=int, default=[0, 10_000, 100_000, 900_000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        path = "/api/habit/habits/public/"
+        page_size = HabitPagination.page_size
+
+        with rollback(), override_settings(ALLOWED_HOSTS=["testserver"], PUBLIC_HABITS_CACHE_TIMEOUT=0):
+            user = create_bench_user()
+            seed_habits(user, options["habits"], is_public=True)
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Habit._meta.db_table}")
+
+            def get(pagination_class, url):
+                view = HabitViewSet.as_view({"get": "public"}, action_pagination_classes={"public": pagination_class})
+                request = factory.get(url)
+                force_authenticate(request, user=user)
+                return view(request).render()
+
+            self.stdout.write(f"{'depth':>10} {'page number, ms':>18} {'cursor, ms':>12}")
+            for depth in options["depths"]:
+                # Курсор указывает на позицию строки на заданной глубине — так его получил бы клиент, листая ленту
+                position = (
+                    Habit.objects.filter(is_public=True)
+                    .order_by("created_at", "id")
+                    .values_list("created_at", flat=True)[depth]
+                )
+                paginator = HabitCursorPagination()
+                paginator.base_url = path
+                cursor_url = paginator.encode_cursor(Cursor(offset=0, reverse=False, position=str(position)))
+                page_url = f"{path}?page={depth // page_size + 1}"
+                before = measure(lambda: get(HabitPagination, page_url), options["repeat"])
+                after = measure(lambda: get(HabitCursorPagination, cursor_url), options["repeat"])
+                self.stdout.write(f"{depth:>10} {before:>18.2f} {after:>12.2f}")
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from habit.management.commands._bench import create_bench_user, measure, rollback, seed_habits
+from habit.models import Habit
+from habit.serializers import HabitListSerializer, HabitSerializer, PublicHabitSerializer
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время выборки и сериализации списка привычек: HabitSerializer по объектам модели (до) и сериализаторы
+    только для чтения по строкам QuerySet.values() (после).
+
+    Пример:
+    python manage.py bench_habit_serialization --habits 10000
+    """
+
+    help = "Бенчмарк сериализации списка привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=10_000)
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        with rollback():
+            user = create_bench_user()
+            seed_habits(user, options["habits"], is_public=True)
+            habits = Habit.objects.filter(user=user).order_by("created_at", "id")
+
+            timings = {
+                "HabitSerializer": measure(lambda: HabitSerializer(habits.all(), many=True).data, options["repeat"]),
+                "HabitListSerializer": measure(
+                    lambda: HabitListSerializer(habits.values(*HabitListSerializer.fields), many=True).data,
+                    options["repeat"],
+                ),
+                "PublicHabitSerializer": measure(
+                    lambda: PublicHabitSerializer(habits.values(*PublicHabitSerializer.fields), many=True).data,
+                    options["repeat"],
+                ),
+            }
+
+        self.stdout.write(f"{'serializer':>22} {'ms':>10}")
+        for name, timing in timings.items():
+            self.stdout.write(f"{name:>22} {timing:>10.2f}")
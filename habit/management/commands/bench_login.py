@@ -0,0 +1,57 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.views import TokenObtainPairView
+
+from habit.management.commands._bench import measure, rollback
+from user.models import User
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает стоимость входа пользователя для алгоритмов хеширования паролей с параметрами из настроек: время входа
+    через /api/user/login/ и количество проверок пароля в секунду в одном процессе при параллельных запросах
+    (--threads потоков, как у gunicorn с --threads) с пулом потоков хеширования размером PASSWORD_HASH_THREADS.
+    Пул не ускоряет отдельную проверку — поток запроса ждёт её результат, — а ограничивает количество одновременных
+    проверок: при --threads больше PASSWORD_HASH_THREADS проверки в секунду показывают пропускную способность пула.
+
+    Пример:
+    python manage.py bench_login --hashers pbkdf2 scrypt argon2 --threads 8
+    """
+
+    help = "Бенчмарк входа пользователя для разных алгоритмов хеширования паролей"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hashers", nargs="+", default=list(settings.PASSWORD_HASHER_CLASSES))
+        parser.add_argument("--threads", type=int, default=8)
+        parser.add_argument("--checks", type=int, default=64)
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        factory = APIRequestFactory()
+        view = TokenObtainPairView.as_view()
+        password = "BenchPassword123"
+
+        self.stdout.write(f"{'hasher':>8} {'login, ms':>10} {'logins/s':>10} {'checks/s, threads':>18}")
+        for name in options["hashers"]:
+            hashers = [settings.PASSWORD_HASHER_CLASSES[name], *settings.PASSWORD_HASHERS]
+            with rollback(), override_settings(ALLOWED_HOSTS=["testserver"], PASSWORD_HASHERS=hashers):
+                user = User.objects.create_user(email=f"{name}@example.com", password=password)
+
+                def login():
+                    request = factory.post("/api/user/login/", {"email": user.email, "password": password})
+                    return view(request).render()
+
+                timing = measure(login, options["repeat"])
+
+                # Проверки пароля без обращения к БД — так параллельные входы нагружают процессор процесса
+                with ThreadPoolExecutor(max_workers=options["threads"]) as executor:
+                    started = time.perf_counter()
+                    list(executor.map(lambda _: user.check_password(password), range(options["checks"])))
+                    checks = options["checks"] / (time.perf_counter() - started)
+            self.stdout.write(f"{name:>8} {timing:>10.2f} {1000 / timing:>10.1f} {checks:>18.1f}")
@@ -0,0 +1,56 @@
+from django.core.management.base import BaseCommand
+from django.test import override_settings
+
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from habit.cache import bump_public_habits_version, get_public_habits_version
+from habit.management.commands._bench import create_bench_user, measure, rollback, seed_habits
+from habit.views import HabitViewSet
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает пропускную способность ленты публичных привычек: без кеша (до), с кешем страниц (после) и повторный
+    запрос клиента с актуальным ETag (304).
+    Запросы выполняются в процессе через APIRequestFactory, поэтому в замер входит только работа Django и DRF.
+
+    Пример:
+    python manage.py bench_public_feed --habits 10000 --page 50
+    """
+
+    help = "Бенчмарк ленты публичных привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=10_000)
+        parser.add_argument("--page", type=int, default=1)
+        parser.add_argument("--repeat", type=int, default=200)
+
+    def handle(self, *args, **options):
+        if get_public_habits_version() is None:
+            self.stderr.write("Кеш недоступен — проверьте CACHE_URL")
+            return
+
+        factory = APIRequestFactory()
+        view = HabitViewSet.as_view({"get": "public"})
+        path = f"/api/habit/habits/public/?page={options['page']}"
+
+        with rollback(), override_settings(ALLOWED_HOSTS=["testserver"]):
+            user = create_bench_user()
+            seed_habits(user, options["habits"], is_public=True)
+
+            def get(**headers):
+                request = factory.get(path, **headers)
+                force_authenticate(request, user=user)
+                return view(request).render()
+
+            with override_settings(PUBLIC_HABITS_CACHE_TIMEOUT=0):
+                before = measure(get, options["repeat"])
+            etag = get()["ETag"]
+            after = measure(get, options["repeat"])
+            not_modified = measure(lambda: get(HTTP_IF_NONE_MATCH=etag), options["repeat"])
+        # Страницы откаченных привычек не должны читаться из кеша
+        bump_public_habits_version()
+
+        self.stdout.write(f"{'':>14} {'ms':>8} {'req/s':>10}")
+        for name, timing in (("без кеша", before), ("с кешем", after), ("304", not_modified)):
+            self.stdout.write(f"{name:>14} {timing:>8.2f} {1000 / timing:>10.0f}")
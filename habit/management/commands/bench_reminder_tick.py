@@ -0,0 +1,52 @@
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from habit.management.commands._bench import create_bench_user, measure, rollback, seed_habits
+from habit.models import Habit
+from habit.schedule import REMINDER_LEAD_TIME, get_due_occurrence
+from habit.tasks import due_habit_ids
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время выборки привычек для тика напоминаний: фильтр по часу и минуте поля time (до) и поиск по
+    индексу слота напоминания и следующего выполнения (после).
+
+    Пример:
+    python manage.py bench_reminder_tick --sizes 10000 100000 1000000
+    """
+
+    help = "Бенчмарк выборки привычек для тика напоминаний"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", nargs="+", type=int, default=[10_000, 100_000, 1_000_000])
+        parser.add_argument("--repeat", type=int, default=20)
+
+    def handle(self, *args, **options):
+        now = timezone.now()
+        notify_time = timezone.localtime(now + REMINDER_LEAD_TIME)
+        occurrence = get_due_occurrence(now)
+
+        def by_time():
+            return list(
+                Habit.objects.filter(time__hour=notify_time.hour, time__minute=notify_time.minute).values_list(
+                    "id", flat=True
+                )
+            )
+
+        def by_slot():
+            return list(due_habit_ids(occurrence, occurrence))
+
+        self.stdout.write(f"{'habits':>10} {'time__hour/minute, ms':>24} {'reminder_slot, ms':>20}")
+        with rollback():
+            user = create_bench_user(telegram_chat_id="1")
+            seeded = 0
+            for size in sorted(options["sizes"]):
+                seed_habits(user, size - seeded, start=seeded)
+                seeded = size
+                with connection.cursor() as cursor:
+                    cursor.execute(f"ANALYZE {Habit._meta.db_table}")
+                before = measure(by_time, options["repeat"])
+                after = measure(by_slot, options["repeat"])
+                self.stdout.write(f"{size:>10} {before:>24.2f} {after:>20.2f}")
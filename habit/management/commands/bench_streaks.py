@@ -0,0 +1,48 @@
+from datetime import timedelta
+from itertools import count
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.utils import timezone
+
+from habit.management.commands._bench import SEED_BATCH_SIZE, create_bench_user, measure, rollback, seed_habits
+from habit.models import Habit, HabitCompletion, HabitStats, UserStats
+
+
+class Command(BaseCommand):
+    """
+    Сравнивает время обновления серии выполнения привычки: пересчёт по всей истории отметок (до) и обновление
+    статистики при отметке без чтения истории (после) на таблице с habits × days отметками.
+
+    Пример:
+    python manage.py bench_streaks --habits 1000 --days 1000
+    """
+
+    help = "Бенчмарк расчёта серий выполнения привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=1000)
+        parser.add_argument("--days", type=int, default=1000)
+        parser.add_argument("--repeat", type=int, default=50)
+
+    def handle(self, *args, **options):
+        today = timezone.localdate()
+        with rollback():
+            user = create_bench_user()
+            seed_habits(user, options["habits"])
+            habits = list(Habit.objects.filter(user=user).values_list("id", flat=True))
+            days = [today - timedelta(days=offset) for offset in range(options["days"], 0, -1)]
+            completions = (HabitCompletion(habit_id=habit_id, date=day) for habit_id in habits for day in days)
+            HabitCompletion.objects.bulk_create(completions, batch_size=SEED_BATCH_SIZE)
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {HabitCompletion._meta.db_table}")
+
+            habit = Habit.objects.select_related("user").get(id=habits[-1])
+            HabitStats.build(habit).save()
+            UserStats.build(user.id).save()
+            future = (today + timedelta(days=offset) for offset in count())
+            before = measure(lambda: HabitStats.build(habit), options["repeat"])
+            after = measure(lambda: HabitCompletion.objects.record(habit, next(future)), options["repeat"])
+
+        self.stdout.write(f"{'completions':>12} {'rescan, ms':>12} {'incremental, ms':>16}")
+        self.stdout.write(f"{len(habits) * len(days):>12} {before:>12.2f} {after:>16.2f}")
@@ -0,0 +1,86 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import models, transaction
+
+from habit.models import Habit, HabitStats, UserStats
+
+
+def get_values(stats: models.Model) -> dict:
+    """
+    Возвращает значения полей статистики без ключа.
+    :param stats: Статистика привычки или пользователя
+    :return: Имя поля → значение
+    """
+    return {field.attname: getattr(stats, field.attname) for field in stats._meta.fields if not field.primary_key}
+
+
+def get_diff(stored: models.Model | None, built: models.Model) -> dict[str, tuple]:
+    """
+    Возвращает расхождения сохранённой статистики с рассчитанной заново.
+    :param stored: Сохранённая статистика (None — статистики нет)
+    :param built: Статистика, рассчитанная по истории
+    :return: Имя поля → (сохранённое значение, рассчитанное значение)
+    """
+    expected = get_values(built)
+    actual = get_values(stored) if stored is not None else dict.fromkeys(expected)
+    return {name: (actual[name], value) for name, value in expected.items() if actual[name] != value}
+
+
+class Command(BaseCommand):
+    """
+    Пересчитывает статистику привычек и пользователей по всей истории отметок о выполнении, сравнивает с сохранённой
+    и выводит расхождения. Завершается с ошибкой, если расхождения найдены, с --fix — сохраняет пересчитанную
+    статистику.
+    Проверяются привычки с отметками о выполнении и пользователи, у которых уже есть статистика (у остальных она
+    рассчитывается при первом запросе).
+
+    Пример:
+    python manage.py check_habit_stats --users 1 2 --fix
+    """
+
+    help = "Проверка статистики выполнения привычек"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", nargs="+", type=int, help="id пользователей (по умолчанию — все)")
+        parser.add_argument("--fix", action="store_true", help="Сохранить пересчитанную статистику")
+
+    def handle(self, *args, **options):
+        self.fix = options["fix"]
+        habits = Habit.all_objects.filter(completions__isnull=False).distinct().order_by("id")
+        users = UserStats.objects.order_by("user_id")
+        if options["users"]:
+            habits = habits.filter(user_id__in=options["users"])
+            users = users.filter(user_id__in=options["users"])
+
+        mismatched = 0
+        for habit in habits.iterator():
+            mismatched += self.check_stats(
+                f"habit {habit.id}", HabitStats, {"habit": habit}, lambda: HabitStats.build(habit)
+            )
+        for user_id in users.values_list("user_id", flat=True).iterator():
+            mismatched += self.check_stats(
+                f"user {user_id}", UserStats, {"user_id": user_id}, lambda: UserStats.build(user_id)
+            )
+
+        if mismatched and not self.fix:
+            raise CommandError(f"Статистика расходится с историей выполнений: {mismatched}")
+        self.stdout.write(f"Расхождений: {mismatched}{', исправлено' if mismatched else ''}")
+
+    def check_stats(self, name: str, model: type[models.Model], lookup: dict, build) -> int:
+        """
+        Сравнивает сохранённую статистику с рассчитанной заново. Строка статистики блокируется на время расчёта, чтобы
+        отметки о выполнении не изменили её между чтением и сравнением.
+        :param name: Имя проверяемого объекта для вывода
+        :param model: Модель статистики
+        :param lookup: Условие выборки статистики
+        :param build: Функция расчёта статистики по истории
+        :return: 1, если статистика расходится, иначе 0
+        """
+        with transaction.atomic():
+            stored = model.objects.select_for_update().filter(**lookup).first()
+            built = build()
+            diff = get_diff(stored, built)
+            if diff and self.fix:
+                built.save()
+        for field, (actual, expected) in diff.items():
+            self.stdout.write(f"{name}: {field} {actual} != {expected}")
+        return int(bool(diff))
@@ -0,0 +1,76 @@
+import re
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+
+from habit.management.commands._bench import create_bench_user, rollback, seed_habits
+from habit.models import Habit
+from habit.schedule import get_due_occurrence, group_by_slot_range
+from habit.tasks import due_habits_query
+
+# Признаки последовательного чтения таблицы привычек в плане запроса PostgreSQL и SQLite
+SEQ_SCAN_PATTERNS = {
+    "postgresql": re.compile(rf"Seq Scan on {Habit._meta.db_table}\b"),
+    "sqlite": re.compile(rf"\bSCAN {Habit._meta.db_table}\b(?!.*\bUSING\b)"),
+}
+
+
+class Command(BaseCommand):
+    """
+    Выполняет EXPLAIN для запросов эндпоинтов привычек и тика напоминаний на наполненной БД и завершается с ошибкой,
+    если какой-либо запрос читает таблицу привычек последовательно, а не по индексу.
+
+    Пример:
+    python manage.py explain_queries --habits 100000
+    """
+
+    help = "Проверка планов запросов привычек на использование индексов"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--habits", type=int, default=100_000)
+        parser.add_argument("--users", type=int, default=100)
+
+    def handle(self, *args, **options):
+        pattern = SEQ_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            raise CommandError(f"EXPLAIN не поддерживается для СУБД {connection.vendor}")
+
+        failed = []
+        with rollback():
+            users = [
+                create_bench_user(f"bench{number}@example.com", telegram_chat_id=str(number))
+                for number in range(options["users"])
+            ]
+            per_user = options["habits"] // len(users)
+            for number, user in enumerate(users):
+                # Публичные привычки — у каждого десятого пользователя
+                seed_habits(user, per_user, start=number * per_user, is_public=number % 10 == 0)
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Habit._meta.db_table}")
+
+            user = users[-1]
+            public = Habit.objects.filter(is_public=True).order_by("created_at", "id")
+            position = public.values_list("created_at", flat=True)[per_user]
+            end = get_due_occurrence()
+            slot_ranges, tz_names = next(iter(group_by_slot_range(end, end, [user.timezone]).items()))
+            queries = {
+                "GET /habits/": Habit.objects.filter(user=user).order_by("created_at", "id")[:5],
+                "GET /habits/public/": public[:6],
+                "GET /habits/public/?cursor=": public.filter(created_at__gt=position)[:6],
+                "GET /habits/changes/?since=": Habit.all_objects.filter(user=user, updated_at__gt=position).order_by(
+                    "updated_at", "id"
+                ),
+                "send_habit_reminders": due_habits_query(slot_ranges, end, tz_names).values_list("id"),
+            }
+
+            for name, queryset in queries.items():
+                plan = queryset.explain()
+                seq_scan = pattern.search(plan) is not None
+                if seq_scan:
+                    failed.append(name)
+                self.stdout.write(f"{name}: {'SEQ SCAN' if seq_scan else 'OK'}")
+                self.stdout.write(plan, style_func=None)
+                self.stdout.write("")
+
+        if failed:
+            raise CommandError(f"Последовательное чтение таблицы привычек: {', '.join(failed)}")
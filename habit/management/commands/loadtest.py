@@ -0,0 +1,85 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+
+import requests
+
+from habit.management.commands._bench import create_bench_user, get_access_token, seed_habits
+
+
+class Command(BaseCommand):
+    """
+    Нагрузочный тест запущенных серверов: одновременные аутентифицированные запросы к одному адресу, количество
+    запросов в секунду, медиана и 99-й перцентиль времени ответа для каждого сервера. Позволяет сравнить WSGI
+    (gunicorn config.wsgi) и ASGI (uvicorn config.asgi) на одной БД.
+    Серверы должны работать с той же БД, что и команда: пользователь и привычки теста создаются в ней и удаляются
+    по завершении.
+
+    Пример:
+    python manage.py loadtest --targets wsgi=http://127.0.0.1:8000 asgi=http://127.0.0.1:8001 --concurrency 64
+    """
+
+    help = "Нагрузочный тест эндпоинтов привычек на запущенных серверах"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--targets", nargs="+", default=["server=http://127.0.0.1:8000"])
+        parser.add_argument("--path", default="/api/habit/habits/")
+        parser.add_argument("--concurrency", type=int, default=64)
+        parser.add_argument("--requests", type=int, default=2000)
+        parser.add_argument("--habits", type=int, default=20)
+        parser.add_argument("--timeout", type=float, default=30)
+
+    def handle(self, *args, **options):
+        targets = dict(target.split("=", 1) for target in options["targets"] if "=" in target)
+        if len(targets) != len(options["targets"]):
+            raise CommandError("Серверы задаются в виде имя=адрес")
+
+        user = create_bench_user("loadtest@example.com")
+        try:
+            seed_habits(user, options["habits"], is_public=True)
+            headers = {"Authorization": f"Bearer {get_access_token(user)}"}
+
+            self.stdout.write(f"{'server':>10} {'req/s':>10} {'p50, ms':>10} {'p99, ms':>10} {'errors':>8}")
+            for name, url in targets.items():
+                timings, errors, elapsed = self.run(f"{url.rstrip('/')}{options['path']}", headers, options)
+                if len(timings) < 2:
+                    raise CommandError(f"{name}: недостаточно успешных ответов ({len(timings)}), ошибок: {errors}")
+                quantiles = statistics.quantiles(timings, n=100)
+                self.stdout.write(
+                    f"{name:>10} {len(timings) / elapsed:>10.1f} {quantiles[49]:>10.2f} {quantiles[98]:>10.2f} "
+                    f"{errors:>8}"
+                )
+        finally:
+            user.delete()
+
+    def run(self, url: str, headers: dict, options: dict) -> tuple[list[float], int, float]:
+        """
+        Выполняет запросы к адресу в --concurrency потоков.
+        :param url: Адрес
+        :param headers: Заголовки запросов
+        :param options: Параметры команды
+        :return: Время успешных ответов в миллисекундах, количество ошибок и общее время теста в секундах
+        """
+        sessions = threading.local()
+
+        def get(_) -> float | None:
+            if not hasattr(sessions, "session"):
+                sessions.session = requests.Session()
+            started = time.perf_counter()
+            try:
+                response = sessions.session.get(url, headers=headers, timeout=options["timeout"])
+            except requests.RequestException:
+                return None
+            if response.status_code != 200:
+                return None
+            return (time.perf_counter() - started) * 1000
+
+        with ThreadPoolExecutor(max_workers=options["concurrency"]) as executor:
+            started = time.perf_counter()
+            results = list(executor.map(get, range(options["requests"])))
+            elapsed = time.perf_counter() - started
+        timings = [timing for timing in results if timing is not None]
+        return timings, len(results) - len(timings), elapsed
@@ -0,0 +1,24 @@
+from django.core.management.base import BaseCommand
+
+from habit.models import OutboundMessage
+
+
+class Command(BaseCommand):
+    """
+    Выводит показатели очереди исходящих сообщений: размер очереди, количество сообщений, которые пора отправить,
+    количество недоставленных сообщений и пропускную способность отправки.
+
+    Пример:
+    python manage.py outbound_stats
+    """
+
+    help = "Показатели очереди исходящих сообщений"
+
+    def handle(self, *args, **options):
+        stats = OutboundMessage.objects.stats()
+        self.stdout.write(f"В очереди: {stats['backlog']}")
+        self.stdout.write(f"Пора отправить: {stats['due']}")
+        self.stdout.write(f"Недоставленных: {stats['dead']}")
+        self.stdout.write(
+            f"Отправлено за 5 минут: {stats['sent']} ({stats['throughput_per_minute']:.1f} сообщений/мин)"
+        )
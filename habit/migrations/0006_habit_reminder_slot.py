@@ -0,0 +1,53 @@
+# Generated by Django 5.2 on 2026-10-18 10:00
+
+from datetime import UTC, datetime
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def get_reminder_slot(value, tz):
+    """
+    Возвращает слот напоминания — номер минуты в сутках по UTC для времени привычки во временной зоне проекта.
+    Расчёт повторяет habit.schedule.get_reminder_slot на момент миграции: миграция не должна зависеть от текущего кода
+    приложения.
+    """
+    local = datetime.combine(timezone.localdate(timezone=tz), value).replace(tzinfo=tz)
+    utc = local.astimezone(UTC)
+    return utc.hour * 60 + utc.minute
+
+
+def fill_reminder_slot(apps, schema_editor):
+    """
+    Заполняет слот напоминания для уже существующих привычек.
+    """
+    Habit = apps.get_model("habit", "Habit")
+    tz = timezone.get_default_timezone()
+    habits = Habit.objects.only("id", "time")
+    batch = []
+    for habit in habits.iterator(chunk_size=2000):
+        habit.reminder_slot = get_reminder_slot(habit.time, tz)
+        batch.append(habit)
+        if len(batch) >= 2000:
+            Habit.objects.bulk_update(batch, ["reminder_slot"])
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_slot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0005_alter_habit_is_pleasant_and_more"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="reminder_slot",
+            field=models.PositiveSmallIntegerField(
+                db_index=True, default=0, editable=False, verbose_name="Слот напоминания"
+            ),
+        ),
+        migrations.RunPython(fill_reminder_slot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,63 @@
+# Generated by Django 5.2 on 2026-10-18 11:00
+
+from datetime import datetime, timedelta
+
+from django.db import migrations, models
+from django.utils import timezone
+
+
+def get_next_due_at(value, start, periodicity, today, tz):
+    """
+    Возвращает момент выполнения привычки в ближайший начиная с today день сетки с шагом periodicity дней от дня start.
+    Расчёт повторяет habit.schedule.get_next_due_date и get_due_at на момент миграции: миграция не должна зависеть
+    от текущего кода приложения.
+    """
+    day = start
+    if today > start:
+        periods = -(-(today - start).days // periodicity)  # Деление с округлением вверх
+        day = start + timedelta(days=periods * periodicity)
+    return datetime.combine(day, value, tzinfo=tz)
+
+
+def fill_next_due_at(apps, schema_editor):
+    """
+    Рассчитывает следующее выполнение уже существующих привычек от дня их создания с шагом periodicity.
+    """
+    Habit = apps.get_model("habit", "Habit")
+    tz = timezone.get_default_timezone()
+    today = timezone.localdate(timezone=tz)
+    batch = []
+    for habit in Habit.objects.only("id", "time", "periodicity", "created_at").iterator(chunk_size=2000):
+        start = timezone.localdate(habit.created_at, tz)
+        habit.next_due_at = get_next_due_at(habit.time, start, habit.periodicity, today, tz)
+        batch.append(habit)
+        if len(batch) >= 2000:
+            Habit.objects.bulk_update(batch, ["next_due_at"])
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["next_due_at"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0006_habit_reminder_slot"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="next_due_at",
+            field=models.DateTimeField(editable=False, null=True, verbose_name="Следующее выполнение"),
+        ),
+        migrations.RunPython(fill_next_due_at, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="habit",
+            name="reminder_slot",
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name="Слот напоминания"),
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(fields=["reminder_slot", "next_due_at"], name="habit_reminder_due_idx"),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2 on 2026-10-18 12:10
+
+from django.db import migrations
+
+
+def get_reminder_slot(value):
+    """
+    Возвращает слот напоминания — номер минуты в сутках по местному времени для времени привычки.
+    Расчёт повторяет habit.schedule.get_reminder_slot на момент миграции: миграция не должна зависеть от текущего кода
+    приложения.
+    """
+    return value.hour * 60 + value.minute
+
+
+def fill_local_reminder_slot(apps, schema_editor):
+    """
+    Пересчитывает слот напоминания в минуту суток по местному времени пользователя (ранее — по UTC).
+    """
+    Habit = apps.get_model("habit", "Habit")
+    batch = []
+    for habit in Habit.objects.only("id", "time").iterator(chunk_size=2000):
+        habit.reminder_slot = get_reminder_slot(habit.time)
+        batch.append(habit)
+        if len(batch) >= 2000:
+            Habit.objects.bulk_update(batch, ["reminder_slot"])
+            batch = []
+    if batch:
+        Habit.objects.bulk_update(batch, ["reminder_slot"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0007_habit_next_due_at"),
+        ("user", "0004_user_timezone"),
+    ]
+
+    operations = [
+        migrations.RunPython(fill_local_reminder_slot, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,75 @@
+# Generated by Django 5.2 on 2026-10-18 17:32
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0008_local_reminder_slot"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="OutboundMessage",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("chat_id", models.CharField(max_length=50, verbose_name="Telegram chat ID")),
+                ("text", models.TextField(verbose_name="Текст")),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("pending", "Ожидает отправки"), ("sent", "Отправлено"), ("dead", "Не доставлено")],
+                        default="pending",
+                        max_length=10,
+                        verbose_name="Статус",
+                    ),
+                ),
+                ("attempts", models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")),
+                (
+                    "next_attempt_at",
+                    models.DateTimeField(default=django.utils.timezone.now, verbose_name="Следующая попытка"),
+                ),
+                ("last_error", models.TextField(blank=True, verbose_name="Последняя ошибка")),
+                ("created_at", models.DateTimeField(auto_now_add=True, verbose_name="Создано")),
+                ("sent_at", models.DateTimeField(blank=True, null=True, verbose_name="Отправлено")),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.SET_NULL,
+                        related_name="outbound_messages",
+                        to="habit.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Исходящее сообщение",
+                "verbose_name_plural": "Исходящие сообщения",
+            },
+        ),
+        migrations.CreateModel(
+            name="DeadLetterMessage",
+            fields=[],
+            options={
+                "verbose_name": "Недоставленное сообщение",
+                "verbose_name_plural": "Недоставленные сообщения",
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("habit.outboundmessage",),
+        ),
+        migrations.AddIndex(
+            model_name="outboundmessage",
+            index=models.Index(fields=["status", "next_attempt_at"], name="outbound_due_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="outboundmessage",
+            index=models.Index(fields=["status", "sent_at"], name="outbound_sent_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2 on 2026-10-18 17:36
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0009_outboundmessage"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name="habit",
+            options={
+                "permissions": [("bulk_read_habit", "Может запрашивать привычки большими страницами")],
+                "verbose_name": "Привычка",
+                "verbose_name_plural": "Привычки",
+            },
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(fields=["created_at", "id"], name="habit_created_id_idx"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2 on 2026-10-18 17:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0010_cursor_pagination"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(fields=["user", "created_at", "id"], name="habit_user_created_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(
+                condition=models.Q(("is_public", True)), fields=["created_at", "id"], name="habit_public_created_idx"
+            ),
+        ),
+        migrations.RemoveIndex(
+            model_name="habit",
+            name="habit_created_id_idx",
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.2 on 2026-10-18 18:00
+
+from django.db import migrations, models
+from django.db.models import F
+from django.utils import timezone
+
+
+def fill_updated_at(apps, schema_editor):
+    """
+    Заполняет дату изменения уже существующих привычек датой их создания.
+    """
+    Habit = apps.get_model("habit", "Habit")
+    Habit.objects.update(updated_at=F("created_at"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0011_habit_access_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="habit",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True, default=timezone.now, verbose_name="Изменена"),
+            preserve_default=False,
+        ),
+        migrations.RunPython(fill_updated_at, migrations.RunPython.noop),
+        migrations.AddField(
+            model_name="habit",
+            name="deleted_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True, verbose_name="Удалена"),
+        ),
+        migrations.AddIndex(
+            model_name="habit",
+            index=models.Index(fields=["user", "updated_at", "id"], name="habit_user_updated_idx"),
+        ),
+    ]
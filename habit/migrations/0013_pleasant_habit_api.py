@@ -0,0 +1,33 @@
+# Generated by Django 5.2 on 2026-10-18 17:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0012_habit_updated_at_deleted_at"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="habit",
+            name="related_habit",
+            field=models.ForeignKey(
+                blank=True,
+                help_text="Указывается только для полезных привычек",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="habits",
+                to="habit.pleasanthabit",
+                verbose_name="Связанная привычка",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="pleasanthabit",
+            index=models.Index(fields=["user", "created_at", "id"], name="pleasant_user_created_idx"),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.2 on 2026-10-18 18:16
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0013_pleasant_habit_api"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="HabitStats",
+            fields=[
+                (
+                    "habit",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="stats",
+                        serialize=False,
+                        to="habit.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+                ("periodicity", models.PositiveSmallIntegerField(default=1, verbose_name="Периодичность (в днях)")),
+                ("started_on", models.DateField(null=True, verbose_name="Начало отсчёта")),
+                ("period_offset", models.PositiveIntegerField(default=0, verbose_name="Периодов до начала отсчёта")),
+                ("last_period", models.PositiveIntegerField(default=0, verbose_name="Последний выполненный период")),
+                ("last_completed_on", models.DateField(null=True, verbose_name="Последнее выполнение")),
+                ("completions", models.PositiveIntegerField(default=0, verbose_name="Отметок")),
+                ("completed_periods", models.PositiveIntegerField(default=0, verbose_name="Выполненных периодов")),
+                ("current_streak", models.PositiveIntegerField(default=0, verbose_name="Текущая серия")),
+                ("longest_streak", models.PositiveIntegerField(default=0, verbose_name="Лучшая серия")),
+            ],
+            options={
+                "verbose_name": "Статистика привычки",
+                "verbose_name_plural": "Статистика привычек",
+            },
+        ),
+        migrations.CreateModel(
+            name="HabitCompletion",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("date", models.DateField(verbose_name="День выполнения")),
+                (
+                    "habit",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="completions",
+                        to="habit.habit",
+                        verbose_name="Привычка",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Выполнение привычки",
+                "verbose_name_plural": "Выполнения привычек",
+                "constraints": [models.UniqueConstraint(fields=("habit", "date"), name="habit_completion_unique")],
+            },
+        ),
+    ]
@@ -0,0 +1,67 @@
+# Generated by Django 5.2 on 2026-10-18 18:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("habit", "0014_habit_completion"),
+        ("user", "0005_user_token_version"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="UserStats",
+            fields=[
+                ("week_start", models.DateField(null=True, verbose_name="Неделя")),
+                ("week_completed", models.PositiveIntegerField(default=0, verbose_name="Выполнений за неделю")),
+                (
+                    "last_week_completed",
+                    models.PositiveIntegerField(default=0, verbose_name="Выполнений за прошлую неделю"),
+                ),
+                (
+                    "user",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="habit_stats",
+                        serialize=False,
+                        to=settings.AUTH_USER_MODEL,
+                        verbose_name="Пользователь",
+                    ),
+                ),
+                ("habits", models.PositiveIntegerField(default=0, verbose_name="Привычек")),
+                ("weekly_target", models.PositiveIntegerField(default=0, verbose_name="Недельная цель")),
+                ("completions", models.PositiveIntegerField(default=0, verbose_name="Отметок")),
+                ("last_completed_on", models.DateField(null=True, verbose_name="Последнее выполнение")),
+                ("current_streak", models.PositiveIntegerField(default=0, verbose_name="Текущая серия")),
+                ("longest_streak", models.PositiveIntegerField(default=0, verbose_name="Лучшая серия")),
+            ],
+            options={
+                "verbose_name": "Статистика пользователя",
+                "verbose_name_plural": "Статистика пользователей",
+            },
+        ),
+        migrations.RemoveField(
+            model_name="habitstats",
+            name="period_offset",
+        ),
+        migrations.AddField(
+            model_name="habitstats",
+            name="last_week_completed",
+            field=models.PositiveIntegerField(default=0, verbose_name="Выполнений за прошлую неделю"),
+        ),
+        migrations.AddField(
+            model_name="habitstats",
+            name="week_completed",
+            field=models.PositiveIntegerField(default=0, verbose_name="Выполнений за неделю"),
+        ),
+        migrations.AddField(
+            model_name="habitstats",
+            name="week_start",
+            field=models.DateField(null=True, verbose_name="Неделя"),
+        ),
+    ]
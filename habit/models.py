@@ -1,4 +1,62 @@
-from django.db import models
+from datetime import date, timedelta
+
+from django.db import models, transaction
+from django.utils import timezone
+
+from habit.cache import bump_public_habits_version
+from habit.schedule import get_next_occurrence, get_reminder_slot
+from habit.streaks import get_adherence, get_period, get_week_start, get_weekly_target
+
+# Размер пачки чтения отметок о выполнении при расчёте статистики по истории
+STATS_BUILD_CHUNK_SIZE = 2000
+
+
+class HabitQuerySet(models.QuerySet):
+    """
+    QuerySet привычек с мягким удалением: удалённые привычки остаются в БД с датой удаления (tombstone), чтобы клиенты
+    синхронизации узнали об удалении.
+    """
+
+    def delete(self):
+        """
+        Помечает привычки удалёнными одним запросом.
+        :return: Количество удалённых привычек в формате QuerySet.delete()
+        """
+        now = timezone.now()
+        alive = self.filter(deleted_at__isnull=True)
+        public = alive.filter(is_public=True).update(deleted_at=now, updated_at=now)
+        deleted = public + alive.update(deleted_at=now, updated_at=now)
+        if public:
+            transaction.on_commit(bump_public_habits_version)
+        return deleted, {self.model._meta.label: deleted}
+
+    delete.alters_data = True  # type: ignore[attr-defined]
+    delete.queryset_only = True  # type: ignore[attr-defined]
+
+    def hard_delete(self):
+        """
+        Удаляет привычки из БД.
+        :return: Результат QuerySet.delete()
+        """
+        return super().delete()
+
+    hard_delete.alters_data = True  # type: ignore[attr-defined]
+    hard_delete.queryset_only = True  # type: ignore[attr-defined]
+
+
+class HabitManager(models.Manager.from_queryset(HabitQuerySet)):  # type: ignore[misc]
+    """
+    Менеджер привычек без удалённых.
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().filter(deleted_at__isnull=True)
+
+
+class AllHabitManager(models.Manager.from_queryset(HabitQuerySet)):  # type: ignore[misc]
+    """
+    Менеджер всех привычек, включая удалённые.
+    """
 
 
 class Habit(models.Model):
@@ -16,6 +74,10 @@ class Habit(models.Model):
         duration (duration): Время на выполнение
         is_public (bool): Признак публичности привычки
         created_at (datetime): Дата и время создания привычки
+        updated_at (datetime): Дата и время последнего изменения привычки
+        deleted_at (datetime): Дата и время удаления привычки (None — привычка не удалена)
+        reminder_slot (int): Минута суток по местному времени пользователя, в которую нужно выполнить привычку
+        next_due_at (datetime): Момент ближайшего выполнения привычки с учётом периодичности
     """
 
     # Пользователь — создатель привычки
@@ -48,6 +110,7 @@ class Habit(models.Model):
         on_delete=models.SET_NULL,
         null=True,
         blank=True,
+        related_name="habits",
         verbose_name="Связанная привычка",
         help_text="Указывается только для полезных привычек",
     )  # type: ignore[var-annotated]
@@ -72,7 +135,98 @@ class Habit(models.Model):
     # Дата создания полезной привычки
     created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создана")  # type: ignore[var-annotated]
 
+    # Дата последнего изменения привычки. bulk_update не обновляет auto_now-поля — их нужно передавать явно
+    updated_at = models.DateTimeField(auto_now=True, verbose_name="Изменена")  # type: ignore[var-annotated]
+
+    # Дата удаления привычки. Удалённая привычка остаётся в БД как отметка об удалении для синхронизации клиентов
+    deleted_at = models.DateTimeField(
+        null=True, blank=True, editable=False, verbose_name="Удалена"
+    )  # type: ignore[var-annotated]
+
+    # Слот напоминания — минута суток по местному времени пользователя, рассчитывается из времени привычки при
+    # сохранении. Индекс позволяет планировщику находить привычки текущей минуты поиском по индексу, а не вычислением
+    # часа и минуты у каждой строки
+    reminder_slot = models.PositiveSmallIntegerField(
+        default=0, editable=False, verbose_name="Слот напоминания"
+    )  # type: ignore[var-annotated]
+
+    # Следующее выполнение — момент, раньше которого напоминание о привычке не отправляется. После отправки
+    # напоминания сдвигается на periodicity дней, после пропуска напоминания выравнивается по сетке дней выполнения
+    next_due_at = models.DateTimeField(
+        null=True, editable=False, verbose_name="Следующее выполнение"
+    )  # type: ignore[var-annotated]
+
+    # Привычки без удалённых
+    objects = HabitManager()
+    # Все привычки, включая удалённые
+    all_objects = AllHabitManager()
+
     id: int  # Для mypy
+    _loaded_is_public: bool | None  # Для mypy: признак публичности при загрузке из БД (from_db)
+    stats: "HabitStats"  # Для mypy: статистика выполнения (обратная связь HabitStats.habit)
+    user_id: int  # Для mypy
+    _loaded_periodicity: int | None  # Для mypy: периодичность при загрузке из БД (from_db)
+
+    # Поля расписания, которые пересчитываются при сохранении привычки
+    SCHEDULE_FIELDS = ("reminder_slot", "next_due_at")
+
+    def refresh_schedule(self) -> None:
+        """
+        Пересчитывает слот напоминания и следующее выполнение привычки по её времени, периодичности и часовому
+        поясу пользователя. Следующее выполнение — первое выполнение после текущего момента по сетке дней с шагом
+        periodicity, которая отсчитывается от дня уже рассчитанного следующего выполнения, иначе от дня создания
+        привычки.
+        """
+        tz = self.user.timezone
+        now = timezone.now()
+        self.reminder_slot = get_reminder_slot(self.time)
+        start = timezone.localdate(self.next_due_at or self.created_at or now, tz)
+        self.next_due_at = get_next_occurrence(self.time, start, self.periodicity, now, tz)
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет привычку, предварительно пересчитывая расписание напоминаний.
+        """
+        self.refresh_schedule()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and {"time", "periodicity"} & set(update_fields):
+            kwargs["update_fields"] = {*update_fields, *self.SCHEDULE_FIELDS}
+        super().save(*args, **kwargs)
+
+    def delete(self, *args, **kwargs):
+        """
+        Помечает привычку удалённой.
+        """
+        self.deleted_at = timezone.now()
+        self.save(update_fields=["deleted_at", "updated_at"])
+        return 1, {self._meta.label: 1}
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Создаёт объект привычки из строки БД и запоминает загруженные признак публичности и периодичность, чтобы после
+        сохранения можно было определить, была ли привычка в ленте публичных привычек и нужно ли пересчитать её
+        статистику.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_is_public = instance.__dict__.get("is_public")
+        instance._loaded_periodicity = instance.__dict__.get("periodicity")
+        return instance
+
+    @property
+    def periodicity_changed(self) -> bool:
+        """
+        Признак изменения периодичности после загрузки привычки из БД.
+        """
+        loaded = getattr(self, "_loaded_periodicity", None)
+        return loaded is not None and loaded != self.periodicity
+
+    @property
+    def was_public(self) -> bool:
+        """
+        Признак того, что привычка была публичной при загрузке из БД.
+        """
+        return bool(getattr(self, "_loaded_is_public", False))
 
     # Возвращает строковое представление привычки
     def __str__(self) -> str:
@@ -85,6 +239,23 @@ class Habit(models.Model):
     class Meta:
         verbose_name = "Привычка"
         verbose_name_plural = "Привычки"
+        indexes = [
+            # Выборка привычек тика напоминаний: слот текущей минуты и наступившее выполнение
+            models.Index(fields=["reminder_slot", "next_due_at"], name="habit_reminder_due_idx"),
+            # Список привычек пользователя (HabitViewSet.get_queryset): фильтр по пользователю, сортировка по дате
+            # создания
+            models.Index(fields=["user", "created_at", "id"], name="habit_user_created_idx"),
+            # Лента публичных привычек с курсорной пагинацией по (created_at, id): частичный индекс только по публичным
+            # привычкам, которых значительно меньше, чем всех
+            models.Index(
+                fields=["created_at", "id"], condition=models.Q(is_public=True), name="habit_public_created_idx"
+            ),
+            # Синхронизация изменений: изменения пользователя после заданного момента
+            models.Index(fields=["user", "updated_at", "id"], name="habit_user_updated_idx"),
+        ]
+        permissions = [
+            ("bulk_read_habit", "Может запрашивать привычки большими страницами"),
+        ]
 
 
 class PleasantHabit(models.Model):
@@ -132,3 +303,577 @@ class PleasantHabit(models.Model):
     class Meta:
         verbose_name = "Приятная привычка"
         verbose_name_plural = "Приятные привычки"
+        indexes = [
+            # Список приятных привычек пользователя с курсорной пагинацией по (created_at, id)
+            models.Index(fields=["user", "created_at", "id"], name="pleasant_user_created_idx"),
+        ]
+
+
+class HabitCompletionQuerySet(models.QuerySet):
+    """
+    QuerySet отметок о выполнении привычек.
+    """
+
+    def record(self, habit: Habit, day: date) -> tuple["HabitCompletion", "HabitStats", bool]:
+        """
+        Отмечает выполнение привычки в заданный день и обновляет статистику привычки и её владельца. Строки
+        статистики блокируются до конца транзакции (сначала привычки, затем пользователя), поэтому одновременные
+        отметки обновляют статистику по очереди. Повторная отметка за тот же день статистику не меняет. Отметки раньше
+        последней отметки привычки не принимаются: статистика обновляется без чтения истории и учитывает отметки
+        привычки только в порядке дат.
+        :param habit: Привычка
+        :param day: День выполнения по местному времени пользователя
+        :return: Отметка, статистика привычки и признак новой отметки
+        :raises ValueError: Если день раньше последней отметки
+        """
+        with transaction.atomic():
+            stats, _ = HabitStats.objects.select_for_update().get_or_create(
+                habit=habit, defaults={"periodicity": habit.periodicity}
+            )
+            completion = self.filter(habit=habit, date=day).first()
+            created = completion is None
+            if completion is None:
+                if stats.last_completed_on and day < stats.last_completed_on:
+                    raise ValueError("День раньше последней отметки о выполнении")
+                completion = self.create(habit=habit, date=day)
+                if stats.periodicity != habit.periodicity:
+                    # Периодичность изменилась, а статистика ещё не пересчитана задачей rebuild_habit_stats
+                    stats = HabitStats.build(habit)
+                else:
+                    stats.add_completion(day)
+                stats.save()
+                user_stats, user_created = UserStats.objects.get_locked(habit.user_id)
+                if not user_created:
+                    user_stats.add_completion(day)
+                    user_stats.save(update_fields=UserStats.COMPLETION_FIELDS)
+        habit.stats = stats
+        return completion, stats, created
+
+
+class HabitCompletionManager(models.Manager.from_queryset(HabitCompletionQuerySet)):  # type: ignore[misc]
+    """
+    Менеджер отметок о выполнении привычек.
+    """
+
+
+class HabitCompletion(models.Model):
+    """
+    Представляет отметку о выполнении привычки.
+    Attributes:
+        habit (Habit): Выполненная привычка
+        date (date): День выполнения по местному времени пользователя
+    """
+
+    # Выполненная привычка. Отдельный индекс по привычке не нужен — его заменяет ограничение уникальности
+    # (habit, date), которое начинается с этого поля
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.CASCADE,
+        db_index=False,
+        related_name="completions",
+        verbose_name="Привычка",
+    )  # type: ignore[var-annotated]
+
+    # День выполнения по местному времени пользователя
+    date = models.DateField(verbose_name="День выполнения")  # type: ignore[var-annotated]
+
+    objects = HabitCompletionManager()
+
+    id: int  # Для mypy
+    habit_id: int  # Для mypy
+
+    # Возвращает строковое представление отметки о выполнении
+    def __str__(self) -> str:
+        """
+        Возвращает строковое представление отметки о выполнении
+        :return: Строковое представление отметки о выполнении
+        """
+        return f"{self.habit_id}: {self.date}"
+
+    class Meta:
+        verbose_name = "Выполнение привычки"
+        verbose_name_plural = "Выполнения привычек"
+        constraints = [
+            # Одна отметка в день. Индекс ограничения используется и для истории выполнений привычки по датам
+            models.UniqueConstraint(fields=["habit", "date"], name="habit_completion_unique"),
+        ]
+
+
+class WeeklyStats(models.Model):
+    """
+    Выполнения текущей и прошлой календарной недели (см. habit.streaks).
+    Attributes:
+        week_start (date): Понедельник последней недели с выполнениями
+        week_completed (int): Количество выполнений за неделю week_start
+        last_week_completed (int): Количество выполнений за неделю перед week_start
+    """
+
+    # Понедельник последней недели с выполнениями
+    week_start = models.DateField(null=True, verbose_name="Неделя")  # type: ignore[var-annotated]
+
+    # Количество выполнений за неделю week_start
+    week_completed = models.PositiveIntegerField(
+        default=0, verbose_name="Выполнений за неделю"
+    )  # type: ignore[var-annotated]
+
+    # Количество выполнений за неделю перед week_start
+    last_week_completed = models.PositiveIntegerField(
+        default=0, verbose_name="Выполнений за прошлую неделю"
+    )  # type: ignore[var-annotated]
+
+    # Поля недельной статистики
+    WEEK_FIELDS = ("week_start", "week_completed", "last_week_completed")
+
+    def add_week_completion(self, day: date) -> None:
+        """
+        Учитывает выполнение в недельной статистике. Выполнение в новой неделе сдвигает недели, выполнения раньше
+        прошлой недели не учитываются.
+        :param day: День выполнения
+        :return:
+        """
+        week = get_week_start(day)
+        if self.week_start is None or week > self.week_start:
+            last_week = self.week_completed if self.week_start == week - timedelta(weeks=1) else 0
+            self.week_start, self.week_completed, self.last_week_completed = week, 1, last_week
+        elif week == self.week_start:
+            self.week_completed += 1
+        elif week == self.week_start - timedelta(weeks=1):
+            self.last_week_completed += 1
+
+    def get_week_completed(self, today: date) -> tuple[int, int]:
+        """
+        Возвращает количество выполнений за текущую и прошлую неделю на заданный день.
+        :param today: Текущий день по местному времени пользователя
+        :return: Выполнений за текущую и за прошлую неделю
+        """
+        week = get_week_start(today)
+        if self.week_start == week:
+            return self.week_completed, self.last_week_completed
+        if self.week_start == week - timedelta(weeks=1):
+            return 0, self.week_completed
+        return 0, 0
+
+    class Meta:
+        abstract = True
+
+
+class HabitStats(WeeklyStats):
+    """
+    Представляет статистику выполнения привычки, которая обновляется при каждой отметке о выполнении (см.
+    habit.streaks). При изменении периодичности привычки статистика пересчитывается по истории выполнений
+    (HabitStats.build).
+    Attributes:
+        habit (Habit): Привычка
+        periodicity (int): Периодичность, по которой считаются периоды
+        started_on (date): Первый день периода 0
+        last_period (int): Номер последнего выполненного периода
+        last_completed_on (date): День последней отметки о выполнении
+        completions (int): Количество отметок о выполнении
+        completed_periods (int): Количество выполненных периодов
+        current_streak (int): Количество выполненных периодов подряд по последний выполненный период
+        longest_streak (int): Самая длинная серия
+    Недельная статистика считается в выполненных периодах.
+    """
+
+    # Привычка
+    habit = models.OneToOneField(
+        Habit,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+        verbose_name="Привычка",
+    )  # type: ignore[var-annotated]
+
+    # Периодичность, по которой считаются периоды
+    periodicity = models.PositiveSmallIntegerField(
+        default=1, verbose_name="Периодичность (в днях)"
+    )  # type: ignore[var-annotated]
+
+    # Первый день периода 0 — день первой отметки о выполнении
+    started_on = models.DateField(null=True, verbose_name="Начало отсчёта")  # type: ignore[var-annotated]
+
+    # Номер последнего выполненного периода от начала отсчёта
+    last_period = models.PositiveIntegerField(
+        default=0, verbose_name="Последний выполненный период"
+    )  # type: ignore[var-annotated]
+
+    # День последней отметки о выполнении
+    last_completed_on = models.DateField(null=True, verbose_name="Последнее выполнение")  # type: ignore[var-annotated]
+
+    # Количество отметок о выполнении
+    completions = models.PositiveIntegerField(default=0, verbose_name="Отметок")  # type: ignore[var-annotated]
+
+    # Количество выполненных периодов
+    completed_periods = models.PositiveIntegerField(
+        default=0, verbose_name="Выполненных периодов"
+    )  # type: ignore[var-annotated]
+
+    # Количество выполненных периодов подряд по последний выполненный период
+    current_streak = models.PositiveIntegerField(
+        default=0, verbose_name="Текущая серия"
+    )  # type: ignore[var-annotated]
+
+    # Самая длинная серия
+    longest_streak = models.PositiveIntegerField(default=0, verbose_name="Лучшая серия")  # type: ignore[var-annotated]
+
+    habit_id: int  # Для mypy
+
+    @classmethod
+    def build(cls, habit: Habit) -> "HabitStats":
+        """
+        Рассчитывает статистику привычки по всей истории выполнений с текущей периодичностью привычки.
+        :param habit: Привычка
+        :return: Несохранённая статистика привычки
+        """
+        stats = cls(habit=habit, periodicity=habit.periodicity)
+        days = HabitCompletion.objects.filter(habit=habit).order_by("date").values_list("date", flat=True)
+        for day in days.iterator(chunk_size=STATS_BUILD_CHUNK_SIZE):
+            stats.add_completion(day)
+        return stats
+
+    def add_completion(self, day: date) -> None:
+        """
+        Учитывает новую отметку о выполнении. Отметка в уже выполненном периоде увеличивает только количество
+        отметок, в следующем — продлевает серию, после пропущенного периода — начинает новую.
+        :param day: День выполнения (не раньше последней отметки)
+        :return:
+        """
+        if self.started_on is None:
+            self.started_on, self.completed_periods, self.current_streak = day, 1, 1
+            self.add_week_completion(day)
+        else:
+            period = get_period(self.started_on, self.periodicity, day)
+            if period > self.last_period:
+                self.completed_periods += 1
+                self.current_streak = self.current_streak + 1 if period == self.last_period + 1 else 1
+                self.last_period = period
+                self.add_week_completion(day)
+        self.completions += 1
+        self.last_completed_on = day
+        self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def get_current_streak(self, today: date) -> int:
+        """
+        Возвращает текущую серию на заданный день: серия прерывается, если пропущен весь период после последнего
+        выполненного.
+        :param today: Текущий день по местному времени пользователя
+        :return: Количество выполненных периодов подряд
+        """
+        if self.started_on is None:
+            return 0
+        period = get_period(self.started_on, self.periodicity, today)
+        return self.current_streak if period <= self.last_period + 1 else 0
+
+    def get_adherence(self, today: date) -> float:
+        """
+        Возвращает долю выполненных периодов на заданный день. Текущий период учитывается, только если он уже
+        выполнен.
+        :param today: Текущий день по местному времени пользователя
+        :return: Доля выполненных периодов от 0 до 1
+        """
+        if self.started_on is None:
+            return 0.0
+        period = max(get_period(self.started_on, self.periodicity, today), self.last_period)
+        return get_adherence(self.completed_periods, period + (1 if period == self.last_period else 0))
+
+    def get_weekly_adherence(self, today: date) -> float:
+        """
+        Возвращает долю выполненных периодов прошлой недели от недельной цели привычки.
+        :param today: Текущий день по местному времени пользователя
+        :return: Доля от 0 до 1
+        """
+        return get_adherence(self.get_week_completed(today)[1], get_weekly_target(self.periodicity))
+
+    # Возвращает строковое представление статистики
+    def __str__(self) -> str:
+        """
+        Возвращает строковое представление статистики
+        :return: Строковое представление статистики
+        """
+        return f"{self.habit_id}: {self.current_streak}/{self.longest_streak}"
+
+    class Meta:
+        verbose_name = "Статистика привычки"
+        verbose_name_plural = "Статистика привычек"
+
+
+class UserStatsQuerySet(models.QuerySet):
+    """
+    QuerySet статистики пользователей.
+    """
+
+    def get_locked(self, user_id: int) -> tuple["UserStats", bool]:
+        """
+        Возвращает статистику пользователя, заблокированную до конца транзакции. Если статистики ещё нет, она
+        рассчитывается по всем привычкам и выполнениям пользователя и сохраняется.
+        :param user_id: id пользователя
+        :return: Статистика и признак того, что она рассчитана заново
+        """
+        stats, created = self.select_for_update().get_or_create(user_id=user_id)
+        if created:
+            stats = UserStats.build(user_id)
+            stats.save()
+        return stats, created
+
+
+class UserStatsManager(models.Manager.from_queryset(UserStatsQuerySet)):  # type: ignore[misc]
+    """
+    Менеджер статистики пользователей.
+    """
+
+
+class UserStats(WeeklyStats):
+    """
+    Представляет статистику пользователя по всем его привычкам. Количество привычек и недельная цель обновляются
+    задачей refresh_user_stats после изменения привычек, счётчики выполнений — при каждой отметке о выполнении,
+    поэтому статистика читается одной строкой.
+    Attributes:
+        user (User): Пользователь
+        habits (int): Количество привычек
+        weekly_target (int): Количество выполнений всех привычек за неделю
+        completions (int): Количество отметок о выполнении (включая удалённые привычки)
+        last_completed_on (date): Последний день с отметкой о выполнении
+        current_streak (int): Количество дней подряд с отметками по last_completed_on
+        longest_streak (int): Самая длинная серия дней
+    Серия дней продлевается отметками в порядке их записи: отметка за прошлый день после отметки за более поздний
+    серию не меняет. Недельная статистика считается в отметках.
+    """
+
+    # Пользователь
+    user = models.OneToOneField(
+        "user.User",
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="habit_stats",
+        verbose_name="Пользователь",
+    )  # type: ignore[var-annotated]
+
+    # Количество привычек (без удалённых)
+    habits = models.PositiveIntegerField(default=0, verbose_name="Привычек")  # type: ignore[var-annotated]
+
+    # Количество выполнений всех привычек за неделю — сумма недельных целей привычек
+    weekly_target = models.PositiveIntegerField(
+        default=0, verbose_name="Недельная цель"
+    )  # type: ignore[var-annotated]
+
+    # Количество отметок о выполнении
+    completions = models.PositiveIntegerField(default=0, verbose_name="Отметок")  # type: ignore[var-annotated]
+
+    # Последний день с отметкой о выполнении
+    last_completed_on = models.DateField(null=True, verbose_name="Последнее выполнение")  # type: ignore[var-annotated]
+
+    # Количество дней подряд с отметками о выполнении
+    current_streak = models.PositiveIntegerField(
+        default=0, verbose_name="Текущая серия"
+    )  # type: ignore[var-annotated]
+
+    # Самая длинная серия дней
+    longest_streak = models.PositiveIntegerField(default=0, verbose_name="Лучшая серия")  # type: ignore[var-annotated]
+
+    objects = UserStatsManager()
+
+    user_id: int  # Для mypy
+
+    # Поля, которые обновляются при отметке о выполнении
+    COMPLETION_FIELDS = (
+        "completions",
+        "last_completed_on",
+        "current_streak",
+        "longest_streak",
+        *WeeklyStats.WEEK_FIELDS,
+    )
+
+    @classmethod
+    def build(cls, user_id: int) -> "UserStats":
+        """
+        Рассчитывает статистику пользователя по всем его привычкам и отметкам о выполнении в порядке записи.
+        :param user_id: id пользователя
+        :return: Несохранённая статистика пользователя
+        """
+        stats = cls(user_id=user_id)
+        stats.refresh_habits()
+        days = HabitCompletion.objects.filter(habit__user_id=user_id).order_by("id").values_list("date", flat=True)
+        for day in days.iterator(chunk_size=STATS_BUILD_CHUNK_SIZE):
+            stats.add_completion(day)
+        return stats
+
+    def refresh_habits(self) -> None:
+        """
+        Пересчитывает количество привычек и недельную цель пользователя.
+        :return:
+        """
+        periodicities = list(Habit.objects.filter(user_id=self.user_id).values_list("periodicity", flat=True))
+        self.habits = len(periodicities)
+        self.weekly_target = sum(get_weekly_target(periodicity) for periodicity in periodicities)
+
+    def add_completion(self, day: date) -> None:
+        """
+        Учитывает новую отметку о выполнении.
+        :param day: День выполнения
+        :return:
+        """
+        self.completions += 1
+        self.add_week_completion(day)
+        if self.last_completed_on is None or day > self.last_completed_on:
+            extends = self.last_completed_on is not None and day == self.last_completed_on + timedelta(days=1)
+            self.current_streak = self.current_streak + 1 if extends else 1
+            self.last_completed_on = day
+            self.longest_streak = max(self.longest_streak, self.current_streak)
+
+    def get_current_streak(self, today: date) -> int:
+        """
+        Возвращает текущую серию дней на заданный день: серия прерывается, если пропущен день после последнего дня с
+        отметкой.
+        :param today: Текущий день по местному времени пользователя
+        :return: Количество дней подряд
+        """
+        if self.last_completed_on is None or (today - self.last_completed_on).days > 1:
+            return 0
+        return self.current_streak
+
+    def get_weekly_adherence(self, today: date) -> float:
+        """
+        Возвращает долю выполнений прошлой недели от недельной цели пользователя.
+        :param today: Текущий день по местному времени пользователя
+        :return: Доля от 0 до 1
+        """
+        return get_adherence(self.get_week_completed(today)[1], self.weekly_target)
+
+    # Возвращает строковое представление статистики
+    def __str__(self) -> str:
+        """
+        Возвращает строковое представление статистики
+        :return: Строковое представление статистики
+        """
+        return f"{self.user_id}: {self.current_streak}/{self.longest_streak}"
+
+    class Meta:
+        verbose_name = "Статистика пользователя"
+        verbose_name_plural = "Статистика пользователей"
+
+
+class OutboundMessageQuerySet(models.QuerySet):
+    """
+    QuerySet исходящих сообщений.
+    """
+
+    def due(self):
+        """
+        Возвращает сообщения, которые пора отправить.
+        """
+        return self.filter(status=OutboundMessage.Status.PENDING, next_attempt_at__lte=timezone.now())
+
+    def stats(self, window: timedelta = timedelta(minutes=5)) -> dict[str, float]:
+        """
+        Возвращает показатели очереди: размер очереди, количество сообщений, которые пора отправить, количество
+        сообщений в очереди недоставленных и пропускную способность отправки за последнее время.
+        :param window: Период, за который считается пропускная способность
+        :return: Показатели очереди
+        """
+        now = timezone.now()
+        stats = self.aggregate(
+            backlog=models.Count("id", filter=models.Q(status=OutboundMessage.Status.PENDING)),
+            due=models.Count("id", filter=models.Q(status=OutboundMessage.Status.PENDING, next_attempt_at__lte=now)),
+            dead=models.Count("id", filter=models.Q(status=OutboundMessage.Status.DEAD)),
+            sent=models.Count("id", filter=models.Q(status=OutboundMessage.Status.SENT, sent_at__gte=now - window)),
+        )
+        stats["throughput_per_minute"] = stats["sent"] / (window.total_seconds() / 60)
+        return stats
+
+
+class OutboundMessageManager(models.Manager.from_queryset(OutboundMessageQuerySet)):  # type: ignore[misc]
+    """
+    Менеджер исходящих сообщений.
+    """
+
+
+class OutboundMessage(models.Model):
+    """
+    Представляет исходящее сообщение в Telegram.
+    Attributes:
+        habit (Habit): Привычка, о которой напоминает сообщение
+        chat_id (str): id чата пользователя в Telegram
+        text (str): Текст сообщения
+        status (str): Статус отправки
+        attempts (int): Количество попыток отправки
+        next_attempt_at (datetime): Время следующей попытки отправки
+        last_error (str): Ошибка последней попытки отправки
+        created_at (datetime): Дата и время создания сообщения
+        sent_at (datetime): Дата и время отправки сообщения
+    """
+
+    class Status(models.TextChoices):
+        PENDING = "pending", "Ожидает отправки"
+        SENT = "sent", "Отправлено"
+        DEAD = "dead", "Не доставлено"
+
+    # Привычка, о которой напоминает сообщение
+    habit = models.ForeignKey(
+        Habit,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="outbound_messages",
+        verbose_name="Привычка",
+    )  # type: ignore[var-annotated]
+
+    # id чата пользователя в Telegram
+    chat_id = models.CharField(max_length=50, verbose_name="Telegram chat ID")  # type: ignore[var-annotated]
+
+    # Текст сообщения
+    text = models.TextField(verbose_name="Текст")  # type: ignore[var-annotated]
+
+    # Статус отправки
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.PENDING, verbose_name="Статус"
+    )  # type: ignore[var-annotated]
+
+    # Количество попыток отправки
+    attempts = models.PositiveSmallIntegerField(default=0, verbose_name="Попыток")  # type: ignore[var-annotated]
+
+    # Время следующей попытки отправки
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now, verbose_name="Следующая попытка"
+    )  # type: ignore[var-annotated]
+
+    # Ошибка последней попытки отправки
+    last_error = models.TextField(blank=True, verbose_name="Последняя ошибка")  # type: ignore[var-annotated]
+
+    # Дата создания сообщения
+    created_at = models.DateTimeField(auto_now_add=True, verbose_name="Создано")  # type: ignore[var-annotated]
+
+    # Дата отправки сообщения
+    sent_at = models.DateTimeField(null=True, blank=True, verbose_name="Отправлено")  # type: ignore[var-annotated]
+
+    objects = OutboundMessageManager()
+
+    id: int  # Для mypy
+
+    # Возвращает строковое представление сообщения
+    def __str__(self) -> str:
+        """
+        Возвращает строковое представление сообщения
+        :return: Строковое представление сообщения
+        """
+        return f"{self.chat_id}: {self.text[:50]}"
+
+    class Meta:
+        verbose_name = "Исходящее сообщение"
+        verbose_name_plural = "Исходящие сообщения"
+        indexes = [
+            # Выборка сообщений, которые пора отправить
+            models.Index(fields=["status", "next_attempt_at"], name="outbound_due_idx"),
+            # Подсчёт пропускной способности и очистка отправленных сообщений
+            models.Index(fields=["status", "sent_at"], name="outbound_sent_idx"),
+        ]
+
+
+class DeadLetterMessage(OutboundMessage):
+    """
+    Представляет недоставленное сообщение (очередь недоставленных сообщений в админке).
+    """
+
+    class Meta:
+        proxy = True
+        verbose_name = "Недоставленное сообщение"
+        verbose_name_plural = "Недоставленные сообщения"
@@ -0,0 +1,54 @@
+"""
+Модуль очереди исходящих сообщений.
+Каждое сообщение сохраняется в OutboundMessage до отправки. Неудачная попытка не теряет сообщение: оно остаётся в
+очереди со временем следующей попытки, рассчитанным по экспоненциальной задержке (но не раньше, чем разрешил Telegram
+в retry_after). После OUTBOUND_MAX_ATTEMPTS неудачных попыток сообщение попадает в очередь недоставленных.
+"""
+
+from collections.abc import Sequence
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+
+from habit.models import OutboundMessage
+from habit.telegram import DeliveryReport, OutgoingMessage, get_telegram_client
+
+
+def get_retry_delay(attempts: int, retry_after: float | None = None) -> timedelta:
+    """
+    Возвращает задержку перед следующей попыткой отправки.
+    :param attempts: Количество сделанных попыток
+    :param retry_after: Через сколько секунд Telegram разрешает повторить отправку
+    :return: Задержка
+    """
+    delay = min(settings.OUTBOUND_RETRY_BASE_DELAY * 2 ** (attempts - 1), settings.OUTBOUND_RETRY_MAX_DELAY)
+    return timedelta(seconds=max(delay, retry_after or 0))
+
+
+def deliver(messages: Sequence[OutboundMessage]) -> DeliveryReport:
+    """
+    Отправляет сообщения очереди и сохраняет результаты попыток одним запросом.
+    :param messages: Сообщения очереди
+    :return: Отчёт об отправке
+    """
+    report = get_telegram_client().send_many(
+        OutgoingMessage(key=message.id, chat_id=message.chat_id, text=message.text) for message in messages
+    )
+    results = {result.key: result for result in report.results}
+    now = timezone.now()
+    for message in messages:
+        result = results[message.id]
+        message.attempts += 1
+        if result.ok:
+            message.status = OutboundMessage.Status.SENT
+            message.sent_at = now
+            message.last_error = ""
+            continue
+        message.last_error = result.error or ""
+        if message.attempts >= settings.OUTBOUND_MAX_ATTEMPTS:
+            message.status = OutboundMessage.Status.DEAD
+        else:
+            message.next_attempt_at = now + get_retry_delay(message.attempts, result.retry_after)
+    OutboundMessage.objects.bulk_update(messages, ["status", "attempts", "next_attempt_at", "last_error", "sent_at"])
+    return report
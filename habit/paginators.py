@@ -1,7 +1,31 @@
-from rest_framework.pagination import PageNumberPagination
+from django.core.paginator import InvalidPage
 
+from asgiref.sync import sync_to_async
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, CursorPagination, PageNumberPagination
 
-class HabitPagination(PageNumberPagination):
+
+class BulkPageSizeMixin(BasePagination):
+    """
+    Разрешает доверенным клиентам (с правом habit.bulk_read_habit) запрашивать страницы размером до
+    bulk_max_page_size элементов.
+    Attributes:
+        bulk_max_page_size (int): Максимальное количество элементов на одной странице для доверенных клиентов
+    """
+
+    bulk_max_page_size = 1000  # Максимальное количество элементов на одной странице для доверенных клиентов
+
+    def get_page_size(self, request):
+        """
+        Возвращает размер страницы с учётом права пользователя на чтение большими страницами. Право проверяется только
+        если клиент запросил размер страницы, чтобы не загружать права пользователя при каждом запросе.
+        """
+        if self.page_size_query_param in request.query_params and request.user.has_perm("habit.bulk_read_habit"):
+            self.max_page_size = self.bulk_max_page_size
+        return super().get_page_size(request)
+
+
+class HabitPagination(BulkPageSizeMixin, PageNumberPagination):
     """
     Пагинация для привычек
     Attributes:
@@ -13,3 +37,46 @@ class HabitPagination(PageNumberPagination):
     page_size = 5  # Количество элементов на одной странице
     page_size_query_param = "page_size"  # Позволяет клиенту запрашивать разное количество элементов
     max_page_size = 10  # Максимальное количество элементов на одной странице
+
+    async def apaginate_queryset(self, queryset, request) -> list:
+        """
+        Асинхронно возвращает элементы страницы, как paginate_queryset: количество и элементы страницы читаются
+        асинхронным ORM, а номер страницы (включая last) и её границы определяет тот же django_paginator_class.
+        :param queryset: QuerySet элементов
+        :param request: Запрос DRF
+        :return: Элементы страницы
+        """
+        if self.page_size_query_param in request.query_params:
+            # Проверка права на чтение большими страницами загружает права пользователя из БД
+            page_size = await sync_to_async(self.get_page_size)(request)
+        else:
+            page_size = self.get_page_size(request)
+        paginator = self.django_paginator_class(queryset, page_size)
+        # Paginator.count — cached_property: подставляется количество, посчитанное асинхронно
+        paginator.__dict__["count"] = await queryset.acount()
+        page_number = self.get_page_number(request, paginator)
+        try:
+            self.page = paginator.page(page_number)
+        except InvalidPage as exc:
+            raise NotFound(self.invalid_page_message.format(page_number=page_number, message=str(exc)))
+        self.page.object_list = [item async for item in self.page.object_list]
+        self.request = request
+        return list(self.page)
+
+
+class HabitCursorPagination(BulkPageSizeMixin, CursorPagination):
+    """
+    Курсорная пагинация для привычек по (created_at, id).
+    В отличие от HabitPagination не выполняет COUNT(*) и OFFSET: следующая страница выбирается по индексу начиная с
+    позиции курсора, поэтому время ответа не зависит от глубины страницы.
+    Attributes:
+        page_size (int): Количество элементов на одной странице
+        page_size_query_param (str): Позволяет клиенту запрашивать разное количество элементов
+        max_page_size (int): Максимальное количество элементов на одной странице
+        ordering (tuple): Порядок элементов — по индексу habit_public_created_idx
+    """
+
+    page_size = 5  # Количество элементов на одной странице
+    page_size_query_param = "page_size"  # Позволяет клиенту запрашивать разное количество элементов
+    max_page_size = 10  # Максимальное количество элементов на одной странице
+    ordering = ("created_at", "id")  # Порядок элементов
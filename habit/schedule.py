@@ -0,0 +1,145 @@
+"""
+Модуль расчёта расписания напоминаний о привычках.
+Время привычки хранится «как есть» (без часового пояса) и трактуется в часовом поясе её владельца (User.timezone).
+Слот напоминания (reminder_slot) — номер минуты в сутках (0..1439) по местному времени пользователя. Планировщик
+группирует часовые пояса пользователей по текущему смещению от UTC и для каждой группы ищет привычки по индексу
+слота — так время не пересчитывается для каждой строки, а переходы на летнее время учитываются автоматически.
+Следующее выполнение (next_due_at) — момент ближайшего выполнения привычки с учётом периодичности. Дни выполнения
+образуют сетку с шагом periodicity дней от дня next_due_at. Напоминание отправляется только в дни сетки, после отправки
+момент сдвигается на periodicity дней. Если напоминание было пропущено (опоздало больше допустимого), next_due_at
+остаётся в прошлом и выравнивается по сетке при следующей встрече привычки в окне тика, а не срабатывает в ближайший
+день.
+"""
+
+from collections import defaultdict
+from collections.abc import Iterable
+from datetime import UTC, date, datetime, time, timedelta, tzinfo
+
+from django.utils import timezone
+
+# За сколько минут до начала привычки отправляется напоминание
+REMINDER_LEAD_TIME = timedelta(minutes=15)
+
+
+def get_reminder_slot(value: time) -> int:
+    """
+    Возвращает слот напоминания — номер минуты в сутках по местному времени для времени привычки.
+    :param value: Время выполнения привычки (местное время пользователя)
+    :return: Номер минуты в сутках
+    """
+    return value.hour * 60 + value.minute
+
+
+def get_due_at(value: time, day: date, tz: tzinfo | None = None) -> datetime:
+    """
+    Возвращает момент выполнения привычки в заданный день.
+    :param value: Время выполнения привычки (местное время пользователя)
+    :param day: День выполнения
+    :param tz: Часовой пояс пользователя. По умолчанию — временная зона проекта
+    :return: Момент выполнения (aware)
+    """
+    return datetime.combine(day, value, tzinfo=tz or timezone.get_default_timezone())
+
+
+def get_next_due_date(start: date, periodicity: int, today: date) -> date:
+    """
+    Возвращает ближайший начиная с today день выполнения привычки, которая выполняется раз в periodicity дней
+    начиная со дня start.
+    :param start: Первый день выполнения привычки
+    :param periodicity: Периодичность выполнения в днях
+    :param today: День, начиная с которого ищется день выполнения
+    :return: День выполнения
+    """
+    if today <= start:
+        return start
+    periods = -(-(today - start).days // periodicity)  # Деление с округлением вверх
+    return start + timedelta(days=periods * periodicity)
+
+
+def get_next_occurrence(value: time, start: date, periodicity: int, now: datetime, tz: tzinfo) -> datetime:
+    """
+    Возвращает первый после заданного момента момент выполнения привычки, которая выполняется раз в periodicity дней
+    начиная со дня start.
+    :param value: Время выполнения привычки (местное время пользователя)
+    :param start: Первый день выполнения привычки
+    :param periodicity: Периодичность выполнения в днях
+    :param now: Момент, строго после которого ищется выполнение (aware)
+    :param tz: Часовой пояс пользователя
+    :return: Момент выполнения (aware)
+    """
+    day = get_next_due_date(start, periodicity, timezone.localdate(now, tz))
+    occurrence = get_due_at(value, day, tz)
+    if occurrence <= now:
+        occurrence = get_due_at(value, day + timedelta(days=periodicity), tz)
+    return occurrence
+
+
+def get_due_occurrence(now: datetime | None = None) -> datetime:
+    """
+    Возвращает минуту выполнения привычек, о которых нужно напомнить сейчас (с учётом REMINDER_LEAD_TIME).
+    :param now: Текущий момент времени (aware). По умолчанию — timezone.now()
+    :return: Начало минуты выполнения (aware, UTC)
+    """
+    notify_at = (now or timezone.now()).astimezone(UTC) + REMINDER_LEAD_TIME
+    return notify_at.replace(second=0, microsecond=0)
+
+
+def get_last_occurrence(value: time, end: datetime, tz: tzinfo) -> datetime:
+    """
+    Возвращает последний момент выполнения привычки, не позже заданного.
+    :param value: Время выполнения привычки (местное время пользователя)
+    :param end: Момент, не позже которого ищется выполнение (aware)
+    :param tz: Часовой пояс пользователя
+    :return: Момент выполнения (aware)
+    """
+    day = timezone.localdate(end, tz)
+    occurrence = get_due_at(value, day, tz)
+    if occurrence > end:
+        occurrence = get_due_at(value, day - timedelta(days=1), tz)
+    return occurrence
+
+
+def get_slot_ranges(start: datetime, end: datetime, tz: tzinfo) -> tuple[tuple[int, int], ...]:
+    """
+    Возвращает диапазоны слотов местного времени, на которые приходится окно минут выполнения [start, end]. Если в
+    окне меняется смещение часового пояса от UTC (переход на летнее время и обратно), окно делится в момент смены
+    смещения: иначе при переводе часов назад местный конец окна оказывается раньше начала и диапазон ошибочно
+    трактуется как переход через полночь.
+    :param start: Первая минута окна выполнения (aware)
+    :param end: Последняя минута окна выполнения (aware)
+    :param tz: Часовой пояс пользователя
+    :return: Диапазоны слотов (первый, последний). Если диапазон переходит через полночь, первый слот больше
+    последнего
+    """
+    ranges = []
+    while start.astimezone(tz).utcoffset() != end.astimezone(tz).utcoffset():
+        # Двоичный поиск первой минуты окна со смещением конца окна
+        low, high = 0, (end - start) // timedelta(minutes=1)
+        while high - low > 1:
+            middle = (low + high) // 2
+            if start.astimezone(tz).utcoffset() == (start + timedelta(minutes=middle)).astimezone(tz).utcoffset():
+                low = middle
+            else:
+                high = middle
+        last = start + timedelta(minutes=low)
+        ranges.append((get_reminder_slot(start.astimezone(tz).time()), get_reminder_slot(last.astimezone(tz).time())))
+        start = last + timedelta(minutes=1)
+    ranges.append((get_reminder_slot(start.astimezone(tz).time()), get_reminder_slot(end.astimezone(tz).time())))
+    return tuple(ranges)
+
+
+def group_by_slot_range(
+    start: datetime, end: datetime, timezones: Iterable[tzinfo]
+) -> dict[tuple[tuple[int, int], ...], list[str]]:
+    """
+    Группирует часовые пояса по смещению от UTC. Для всех поясов группы окно минут выполнения [start, end]
+    приходится на одни и те же диапазоны слотов местного времени, поэтому группа обрабатывается одним запросом.
+    :param start: Первая минута окна выполнения (aware)
+    :param end: Последняя минута окна выполнения (aware)
+    :param timezones: Часовые пояса пользователей
+    :return: Диапазоны слотов (get_slot_ranges) → названия часовых поясов группы
+    """
+    buckets: dict[tuple[tuple[int, int], ...], list[str]] = defaultdict(list)
+    for tz in timezones:
+        buckets[get_slot_ranges(start, end, tz)].append(str(tz))
+    return dict(buckets)
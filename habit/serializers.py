@@ -3,14 +3,32 @@
 RewardOrRelatedValidator и PleasantRestrictionsValidator — используются в Meta.validators так как они работают
 с несколькими полями одновременно.
 MaxDurationValidator, FrequencyValidator, RelatedHabitValidator — подключены к конкретным полям через validators=[...].
+HabitListSerializer и PublicHabitSerializer — сериализаторы только для чтения для списков привычек. Они принимают
+строки QuerySet.values() и формируют ответ напрямую, без полей и валидаторов ModelSerializer.
+PleasantHabitSerializer — сериализатор приятной привычки, PleasantHabitWithHabitsSerializer — приятная привычка со
+встроенными связанными полезными привычками (EmbeddedHabitSerializer).
+HabitCompletionSerializer — отметка о выполнении привычки, в ответе — статистика привычки (HabitStatsSerializer).
+UserStatsSerializer — статистика пользователя по всем привычкам.
 Типы полей:
 DurationField валидируется через value.total_seconds().
-'related_habit' задан как PrimaryKeyRelatedField, при этом валидатор принимает саму модель.
+'related_habit' задан как PleasantHabitField (PrimaryKeyRelatedField по приятным привычкам текущего пользователя),
+при этом валидатор принимает саму модель. Найденные приятные привычки кешируются в контексте сериализатора, а при
+валидации списка привычек (many=True) загружаются одним запросом.
 """
 
+from collections import Counter
+from datetime import datetime, tzinfo
+from functools import cached_property
+
+from django.db import transaction
+from django.utils import timezone
+from django.utils.duration import duration_string
+
 from rest_framework import serializers
 
-from .models import Habit, PleasantHabit
+from .cache import bump_public_habits_version
+from .models import Habit, HabitCompletion, HabitStats, PleasantHabit, UserStats
+from .tasks import schedule_stats_refresh
 from .validators import (
     FrequencyValidator,
     MaxDurationValidator,
@@ -20,21 +38,192 @@ from .validators import (
 )
 
 
+def to_pk(value) -> int | None:
+    """
+    Приводит id из входных данных к числу.
+    :param value: id из входных данных
+    :return: id или None, если значение не является числом
+    """
+    if isinstance(value, bool):
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+class PleasantHabitField(serializers.PrimaryKeyRelatedField):
+    """
+    Связанная приятная привычка текущего пользователя.
+    Привычка ищется одним запросом с фильтром по пользователю, поэтому чужая приятная привычка не находится.
+    Результаты поиска кешируются в контексте сериализатора (context["pleasant_habits"]) и используются повторно при
+    валидации нескольких привычек.
+    """
+
+    def get_queryset(self):
+        """
+        Возвращает приятные привычки текущего пользователя.
+        """
+        request = self.context.get("request")
+        if request is None:
+            return PleasantHabit.objects.none()
+        return PleasantHabit.objects.filter(user=request.user)
+
+    def get_cache(self) -> dict[int, PleasantHabit | None]:
+        """
+        Возвращает кеш приятных привычек в контексте сериализатора: id → привычка (None, если привычка не найдена).
+        """
+        return self.context.setdefault("pleasant_habits", {})
+
+    def prefetch(self, values) -> None:
+        """
+        Загружает одним запросом приятные привычки, которых ещё нет в кеше.
+        :param values: id приятных привычек из входных данных
+        :return:
+        """
+        cache = self.get_cache()
+        pks = {pk for pk in map(to_pk, values) if pk is not None and pk not in cache}
+        if not pks:
+            return
+        found = self.get_queryset().in_bulk(pks)
+        for pk in pks:
+            cache[pk] = found.get(pk)
+
+    def to_internal_value(self, data):
+        """
+        Возвращает приятную привычку по id, используя кеш контекста.
+        """
+        # fail() всегда выбрасывает ValidationError, но DRF не аннотирован, поэтому mypy сужает тип pk только в ветке
+        pk = to_pk(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        else:
+            self.prefetch([pk])
+            habit = self.get_cache()[pk]
+            if habit is not None:
+                return habit
+        self.fail("does_not_exist", pk_value=data)
+
+
+class HabitBulkSerializer(serializers.ListSerializer):
+    """
+    Сериализатор списка привычек для записи: перед валидацией загружает связанные приятные привычки всех элементов
+    одним запросом, сохраняет привычки через bulk_create и bulk_update.
+    Для обновления instance — словарь id → привычка, элементы данных должны содержать разные id.
+    """
+
+    def run_child_validation(self, data):
+        """
+        Валидирует элемент списка, при обновлении — вместе с обновляемой привычкой.
+        """
+        if self.instance is not None:
+            habit = self.instance.get(to_pk(data.get("id"))) if isinstance(data, dict) else None
+            if habit is None:
+                raise serializers.ValidationError({"id": ["Привычка не найдена."]})
+            if habit.pk in self.duplicate_ids:
+                raise serializers.ValidationError({"id": ["Привычка повторяется в списке."]})
+            self.child.instance = habit
+            self.child.initial_data = data
+        return super().run_child_validation(data)
+
+    def to_internal_value(self, data):
+        """
+        Загружает связанные приятные привычки, находит повторяющиеся id и валидирует элементы списка.
+        """
+        if isinstance(data, list):
+            self.child.fields["related_habit"].prefetch(
+                item.get("related_habit") for item in data if isinstance(item, dict)
+            )
+            # Несколько элементов с одним id обновляли бы одну привычку, и сохранился бы только последний
+            ids = Counter(to_pk(item.get("id")) for item in data if isinstance(item, dict))
+            self.duplicate_ids = {pk for pk, count in ids.items() if pk is not None and count > 1}
+        return super().to_internal_value(data)
+
+    def create(self, validated_data: list[dict]) -> list[Habit]:
+        """
+        Создаёт привычки одним запросом.
+        :param validated_data: Данные привычек
+        :return: Созданные привычки
+        """
+        habits = [Habit(**attrs) for attrs in validated_data]
+        for habit in habits:
+            habit.refresh_schedule()
+        habits = Habit.objects.bulk_create(habits)
+        self.invalidate_public_habits(habits)
+        if habits:
+            schedule_stats_refresh(habits[0].user_id)
+        return habits
+
+    def update(self, instance: dict[int, Habit], validated_data: list[dict]) -> list[Habit]:
+        """
+        Обновляет привычки одним запросом.
+        :param instance: Обновляемые привычки: id → привычка
+        :param validated_data: Данные привычек в порядке элементов входных данных
+        :return: Обновлённые привычки
+        """
+        # id элементов уже проверены в run_child_validation
+        habits = [instance[int(item["id"])] for item in self.initial_data]
+        fields: set[str] = set()
+        for habit, attrs in zip(habits, validated_data, strict=True):
+            for field, value in attrs.items():
+                setattr(habit, field, value)
+            fields.update(attrs)
+        if {"time", "periodicity"} & fields:
+            for habit in habits:
+                habit.refresh_schedule()
+            fields.update(Habit.SCHEDULE_FIELDS)
+        if fields:
+            # bulk_update не обновляет auto_now-поля
+            now = timezone.now()
+            for habit in habits:
+                habit.updated_at = now
+            Habit.objects.bulk_update(habits, [*fields, "updated_at"])
+        self.invalidate_public_habits(habits)
+        self.refresh_stats(habits)
+        return habits
+
+    @staticmethod
+    def invalidate_public_habits(habits: list[Habit]) -> None:
+        """
+        Сбрасывает кеш ленты публичных привычек, если среди сохранённых есть публичные или снятые с публикации
+        привычки (bulk_create и bulk_update не отправляют сигналы сохранения).
+        :param habits: Сохранённые привычки
+        :return:
+        """
+        if any(habit.is_public or habit.was_public for habit in habits):
+            transaction.on_commit(bump_public_habits_version)
+        for habit in habits:
+            habit._loaded_is_public = habit.is_public
+
+    @staticmethod
+    def refresh_stats(habits: list[Habit]) -> None:
+        """
+        Пересчитывает статистику привычек с изменённой периодичностью и недельную цель их владельца (bulk_update не
+        отправляет сигналы сохранения).
+        :param habits: Обновлённые привычки
+        :return:
+        """
+        changed = [habit.id for habit in habits if habit.periodicity_changed]
+        if changed:
+            schedule_stats_refresh(habits[0].user_id, changed)
+        for habit in habits:
+            habit._loaded_periodicity = habit.periodicity
+
+
 class HabitSerializer(serializers.ModelSerializer):
     """
     Проверяет валидность привычки согласно бизнес-правилам.
     Attributes:
         duration (DurationField): Время выполнения привычки
-        related_habit (PrimaryKeyRelatedField): Связанная привычка
+        related_habit (PleasantHabitField): Связанная привычка
         periodicity (IntegerField): Периодичность выполнения привычки
     """
 
     # Исключает выполнение привычки более 120 секунд
     duration = serializers.DurationField(validators=[MaxDurationValidator()], required=True)
 
-    # Проверяет, что в связанные привычки могут попадать только привычки с признаком приятной привычки
-    related_habit = serializers.PrimaryKeyRelatedField(
-        queryset=PleasantHabit.objects.all(),
+    # Проверяет, что в связанные привычки могут попадать только приятные привычки текущего пользователя
+    related_habit = PleasantHabitField(
         required=False,
         allow_null=True,
         validators=[RelatedHabitValidator()],
@@ -45,10 +234,273 @@ class HabitSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Habit
-        fields = "__all__"
+        exclude = (*Habit.SCHEDULE_FIELDS, "deleted_at")  # Служебные поля планировщика напоминаний и удаления
         validators = (
             RewardOrRelatedValidator(),  # Исключает одновременное указание вознаграждения и связанной привычки
             PleasantRestrictionsValidator(),  # Исключает появление у приятной привычки вознаграждения
             # или связанной привычки
         )
         read_only_fields = ("user",)
+        list_serializer_class = HabitBulkSerializer
+
+
+class HabitListSerializer(serializers.BaseSerializer):
+    """
+    Сериализатор только для чтения для списка привычек пользователя.
+    Принимает строки QuerySet.values(*HabitListSerializer.get_values()) и формирует тот же ответ, что и
+    HabitSerializer, без создания объектов модели и полей DRF для каждого значения.
+    Со связанной приятной привычкой (?expand=related_habit) её поля выбираются тем же запросом через JOIN и
+    встраиваются в ответ вместо id.
+    Attributes:
+        fields (tuple): Поля привычки в ответе
+        related_fields (tuple): Поля встроенной приятной привычки
+    """
+
+    fields: tuple[str, ...] = (
+        "id",
+        "user",
+        "place",
+        "time",
+        "action",
+        "is_pleasant",
+        "related_habit",
+        "periodicity",
+        "reward",
+        "duration",
+        "is_public",
+        "created_at",
+        "updated_at",
+    )
+    related_fields: tuple[str, ...] = ("id", "user", "is_pleasant", "place", "action", "created_at")
+
+    @classmethod
+    def get_values(cls, expand_related_habit: bool = False) -> list[str]:
+        """
+        Возвращает поля для QuerySet.values().
+        :param expand_related_habit: Признак встраивания связанной приятной привычки
+        :return: Поля строки привычки
+        """
+        values = list(cls.fields)
+        if expand_related_habit:
+            values += [f"related_habit__{field}" for field in dict.fromkeys(("id", *cls.related_fields))]
+        return values
+
+    @cached_property
+    def current_timezone(self) -> tzinfo:
+        """
+        Возвращает текущий часовой пояс один раз на сериализатор, а не для каждой строки.
+        """
+        return timezone.get_current_timezone()
+
+    def format_datetime(self, value: datetime) -> str:
+        """
+        Форматирует дату и время так же, как DateTimeField DRF.
+        :param value: Дата и время (aware)
+        :return: Дата и время в формате ISO 8601 в текущем часовом поясе
+        """
+        formatted = value.astimezone(self.current_timezone).isoformat()
+        return formatted[:-6] + "Z" if formatted.endswith("+00:00") else formatted
+
+    def to_representation(self, instance: dict) -> dict:
+        """
+        Преобразует строку привычки в ответ в формате HabitSerializer.
+        :param instance: Строка QuerySet.values()
+        :return: Данные привычки
+        """
+        data = {field: instance[field] for field in self.fields}
+        data["time"] = data["time"].isoformat()
+        data["duration"] = duration_string(data["duration"])
+        data["created_at"] = self.format_datetime(data["created_at"])
+        if "updated_at" in data:
+            data["updated_at"] = self.format_datetime(data["updated_at"])
+        if "related_habit__id" in instance:
+            data["related_habit"] = self.get_related_habit(instance)
+        return data
+
+    def get_related_habit(self, instance: dict) -> dict | None:
+        """
+        Возвращает встроенную приятную привычку в формате PleasantHabitSerializer.
+        :param instance: Строка QuerySet.values() с полями related_habit__*
+        :return: Данные приятной привычки или None, если привычка не связана с приятной
+        """
+        if instance["related_habit__id"] is None:
+            return None
+        related_habit = {field: instance[f"related_habit__{field}"] for field in self.related_fields}
+        if "created_at" in related_habit:
+            related_habit["created_at"] = self.format_datetime(related_habit["created_at"])
+        return related_habit
+
+
+class PublicHabitSerializer(HabitListSerializer):
+    """
+    Сериализатор только для чтения для ленты публичных привычек.
+    Лента видна всем пользователям, поэтому в ней нет владельца привычки и ссылки на его приятную привычку. При
+    ?expand=related_habit встраиваются только место и действие приятной привычки.
+    Attributes:
+        fields (tuple): Поля привычки в ответе
+        related_fields (tuple): Поля встроенной приятной привычки
+    """
+
+    fields = (
+        "id",
+        "place",
+        "time",
+        "action",
+        "is_pleasant",
+        "periodicity",
+        "reward",
+        "duration",
+        "created_at",
+    )
+    related_fields = ("place", "action")
+
+
+class EmbeddedHabitSerializer(serializers.ModelSerializer):
+    """
+    Краткое представление полезной привычки, встроенное в приятную привычку.
+    """
+
+    class Meta:
+        model = Habit
+        fields = ("id", "place", "time", "action", "periodicity", "duration")
+        read_only_fields = fields
+
+
+class PleasantHabitSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор приятной привычки.
+    """
+
+    class Meta:
+        model = PleasantHabit
+        fields = "__all__"
+        read_only_fields = ("user",)
+
+
+class PleasantHabitWithHabitsSerializer(PleasantHabitSerializer):
+    """
+    Сериализатор приятной привычки со связанными полезными привычками (?embed=habits).
+    Attributes:
+        habits (EmbeddedHabitSerializer): Полезные привычки, связанные с приятной привычкой
+    """
+
+    # Полезные привычки загружаются одним запросом для всей страницы (prefetch_related)
+    habits = EmbeddedHabitSerializer(many=True, read_only=True)
+
+
+class HabitExpandedSerializer(HabitSerializer):
+    """
+    Сериализатор привычки со встроенной связанной приятной привычкой (?expand=related_habit) — только для чтения.
+    Attributes:
+        related_habit (PleasantHabitSerializer): Связанная приятная привычка
+    """
+
+    # Приятная привычка загружается тем же запросом (select_related)
+    related_habit = PleasantHabitSerializer(read_only=True)
+
+
+class HabitStatsSerializer(serializers.ModelSerializer):
+    """
+    Сериализатор статистики выполнения привычки. Текущая серия, соблюдение и недельная статистика рассчитываются на
+    день context["today"].
+    Attributes:
+        current_streak (SerializerMethodField): Текущая серия на сегодня
+        adherence (SerializerMethodField): Доля выполненных периодов
+        week_completed (SerializerMethodField): Выполненных периодов за текущую неделю
+        weekly_adherence (SerializerMethodField): Доля выполненных периодов прошлой недели
+    """
+
+    current_streak = serializers.SerializerMethodField()
+    adherence = serializers.SerializerMethodField()
+    week_completed = serializers.SerializerMethodField()
+    weekly_adherence = serializers.SerializerMethodField()
+
+    class Meta:
+        model = HabitStats
+        fields = (
+            "completions",
+            "current_streak",
+            "longest_streak",
+            "last_completed_on",
+            "adherence",
+            "week_completed",
+            "weekly_adherence",
+        )
+
+    def get_current_streak(self, instance: HabitStats | UserStats) -> int:
+        """
+        Возвращает текущую серию на сегодня — 0, если период (у пользователя — день) после последнего выполненного
+        пропущен.
+        """
+        return instance.get_current_streak(self.context["today"])
+
+    def get_adherence(self, instance: HabitStats) -> float:
+        """
+        Возвращает долю выполненных периодов среди прошедших, текущий период — только если он уже выполнен.
+        """
+        return instance.get_adherence(self.context["today"])
+
+    def get_week_completed(self, instance: HabitStats | UserStats) -> int:
+        """
+        Возвращает количество выполнений за текущую календарную неделю.
+        """
+        return instance.get_week_completed(self.context["today"])[0]
+
+    def get_weekly_adherence(self, instance: HabitStats | UserStats) -> float:
+        """
+        Возвращает долю выполнений прошлой недели от недельной цели.
+        """
+        return instance.get_weekly_adherence(self.context["today"])
+
+
+class UserStatsSerializer(HabitStatsSerializer):
+    """
+    Сериализатор статистики пользователя по всем привычкам. Серия считается в днях с отметками о выполнении,
+    недельная статистика — в отметках.
+    """
+
+    class Meta:
+        model = UserStats
+        fields = (
+            "habits",
+            "completions",
+            "current_streak",
+            "longest_streak",
+            "last_completed_on",
+            "weekly_target",
+            "week_completed",
+            "weekly_adherence",
+        )
+
+
+class HabitCompletionSerializer(serializers.Serializer):
+    """
+    Отметка о выполнении привычки context["habit"]. По умолчанию отмечается текущий день пользователя
+    (context["today"]), можно передать более ранний день, но не раньше последней отметки.
+    Attributes:
+        date (DateField): День выполнения
+        stats (HabitStatsSerializer): Статистика привычки после отметки
+    """
+
+    date = serializers.DateField(required=False)
+    stats = HabitStatsSerializer(source="habit.stats", read_only=True)
+
+    def validate_date(self, value):
+        """
+        Исключает отметку о выполнении в будущем.
+        """
+        if value > self.context["today"]:
+            raise serializers.ValidationError("Нельзя отметить выполнение в будущем.")
+        return value
+
+    def create(self, validated_data: dict) -> HabitCompletion:
+        """
+        Сохраняет отметку о выполнении и обновляет статистику привычки.
+        """
+        try:
+            completion, _, self.created = HabitCompletion.objects.record(
+                self.context["habit"], validated_data.get("date", self.context["today"])
+            )
+        except ValueError:
+            raise serializers.ValidationError({"date": ["Нельзя отметить выполнение раньше последней отметки."]})
+        return completion
@@ -0,0 +1,106 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from django.utils import timezone
+
+from habit.cache import bump_public_habits_version
+from habit.models import Habit, PleasantHabit
+from habit.tasks import schedule_stats_refresh
+from user.models import User
+
+
+@receiver(post_save, sender=Habit)
+def fill_schedule_on_raw_save(sender, instance: Habit, raw: bool, **kwargs) -> None:
+    """
+    Рассчитывает расписание напоминаний для привычек, загруженных из фикстур (loaddata сохраняет объекты в режиме raw,
+    минуя Habit.save()).
+    :param sender: Класс модели
+    :param instance: Сохранённая привычка
+    :param raw: Признак сохранения «как есть» (при загрузке фикстур)
+    :return:
+    """
+    if not raw:
+        return
+    instance.refresh_schedule()
+    Habit.objects.filter(pk=instance.pk).update(**{field: getattr(instance, field) for field in Habit.SCHEDULE_FIELDS})
+
+
+@receiver(post_save, sender=User)
+def refresh_schedule_on_timezone_change(sender, instance: User, raw: bool, **kwargs) -> None:
+    """
+    Пересчитывает расписание напоминаний привычек пользователя после смены его часового пояса.
+    :param sender: Класс модели
+    :param instance: Сохранённый пользователь
+    :param raw: Признак сохранения «как есть» (при загрузке фикстур)
+    :return:
+    """
+    if raw or not instance.timezone_changed:
+        return
+    habits = list(Habit.objects.filter(user=instance))
+    for habit in habits:
+        habit.user = instance
+        habit.refresh_schedule()
+    Habit.objects.bulk_update(habits, Habit.SCHEDULE_FIELDS)
+    instance._loaded_timezone = instance.timezone
+
+
+@receiver(post_save, sender=Habit)
+@receiver(post_delete, sender=Habit)
+def invalidate_public_habits(sender, instance: Habit, **kwargs) -> None:
+    """
+    Сбрасывает кеш ленты публичных привычек, если публичная привычка создана, изменена, снята с публикации или
+    удалена. Версия ленты увеличивается после фиксации транзакции, чтобы в кеш не попала незафиксированная страница.
+    :param sender: Класс модели
+    :param instance: Сохранённая или удалённая привычка
+    :return:
+    """
+    if instance.is_public or instance.was_public:
+        transaction.on_commit(bump_public_habits_version)
+    instance._loaded_is_public = instance.is_public
+
+
+@receiver(post_save, sender=Habit)
+def refresh_stats_on_habit_change(sender, instance: Habit, created: bool, raw: bool, **kwargs) -> None:
+    """
+    Пересчитывает количество привычек и недельную цель пользователя после создания, удаления или изменения
+    периодичности привычки, а после изменения периодичности — и статистику привычки.
+    :param sender: Класс модели
+    :param instance: Сохранённая привычка
+    :param created: Признак создания привычки
+    :param raw: Признак сохранения «как есть» (при загрузке фикстур)
+    :return:
+    """
+    if raw:
+        return
+    if created or instance.deleted_at is not None or instance.periodicity_changed:
+        schedule_stats_refresh(instance.user_id, [instance.pk] if instance.periodicity_changed else None)
+    instance._loaded_periodicity = instance.periodicity
+
+
+@receiver(post_save, sender=PleasantHabit)
+def invalidate_public_habits_on_pleasant_change(sender, instance: PleasantHabit, raw: bool, **kwargs) -> None:
+    """
+    Сбрасывает кеш ленты публичных привычек, если изменённая приятная привычка связана с публичной привычкой (лента
+    с ?expand=related_habit встраивает приятные привычки).
+    :param sender: Класс модели
+    :param instance: Сохранённая приятная привычка
+    :param raw: Признак сохранения «как есть» (при загрузке фикстур)
+    :return:
+    """
+    if not raw and Habit.objects.filter(related_habit_id=instance.pk, is_public=True).exists():
+        transaction.on_commit(bump_public_habits_version)
+
+
+@receiver(pre_delete, sender=PleasantHabit)
+def unlink_habits_on_pleasant_delete(sender, instance: PleasantHabit, **kwargs) -> None:
+    """
+    Отвязывает полезные привычки от удаляемой приятной привычки, обновляя их дату изменения, чтобы клиенты
+    синхронизации получили изменение, и сбрасывает кеш ленты публичных привычек, если среди них есть публичные.
+    :param sender: Класс модели
+    :param instance: Удаляемая приятная привычка
+    :return:
+    """
+    habits = Habit.all_objects.filter(related_habit_id=instance.pk)
+    if habits.filter(is_public=True).exists():
+        transaction.on_commit(bump_public_habits_version)
+    habits.update(related_habit=None, updated_at=timezone.now())
@@ -0,0 +1,52 @@
+"""
+Модуль расчёта серий выполнения привычек.
+Привычка с периодичностью periodicity выполняется раз в periodicity дней, поэтому серия считается не в днях, а в
+периодах: дни с даты начала отсчёта (HabitStats.started_on) делятся на отрезки по periodicity дней, и привычка
+считается выполненной в периоде, если в нём есть хотя бы одна отметка о выполнении. Серия — количество выполненных
+периодов подряд, соблюдение — доля выполненных периодов среди прошедших.
+Номер периода вычисляется по дате без чтения истории выполнений, поэтому статистика обновляется при каждой отметке за
+постоянное время.
+Недельная статистика считается по календарным неделям (с понедельника): хранятся выполнения текущей и прошлой недели,
+недельное соблюдение — доля выполнений прошлой недели от недельной цели (ceil(7 / periodicity) на привычку).
+"""
+
+from datetime import date, timedelta
+
+
+def get_period(start: date, periodicity: int, day: date) -> int:
+    """
+    Возвращает номер периода, в который попадает день.
+    :param start: Первый день периода 0
+    :param periodicity: Периодичность выполнения в днях
+    :param day: День (не раньше start)
+    :return: Номер периода
+    """
+    return (day - start).days // periodicity
+
+
+def get_adherence(completed: int, elapsed: int) -> float:
+    """
+    Возвращает долю выполненных периодов.
+    :param completed: Количество выполненных периодов
+    :param elapsed: Количество прошедших периодов
+    :return: Доля от 0 до 1 (0, если периоды ещё не прошли)
+    """
+    return round(min(completed / elapsed, 1), 4) if elapsed else 0.0
+
+
+def get_week_start(day: date) -> date:
+    """
+    Возвращает понедельник недели, в которую попадает день.
+    :param day: День
+    :return: Первый день недели
+    """
+    return day - timedelta(days=day.weekday())
+
+
+def get_weekly_target(periodicity: int) -> int:
+    """
+    Возвращает количество выполнений привычки за неделю.
+    :param periodicity: Периодичность выполнения в днях
+    :return: Количество периодов, начинающихся в течение недели (деление с округлением вверх)
+    """
+    return -(-7 // periodicity)
@@ -1,53 +1,306 @@
 # поддержка отложенных аннотаций, все типы в аннотациях становятся строками до runtime, нужно для mypy
 from __future__ import annotations
 
+import logging
+from collections.abc import Iterator
 from datetime import datetime, timedelta
-from typing import TYPE_CHECKING, cast
+from functools import partial
+from itertools import islice
 
 from django.conf import settings
+from django.db import transaction
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 
-import requests
-from celery import shared_task
+from celery import chord, shared_task
 
-from habit.models import Habit
+from config.routers import use_replica
+from habit.ledger import get_reminder_ledger
+from habit.models import Habit, HabitStats, OutboundMessage, UserStats
+from habit.outbox import deliver
+from habit.schedule import (
+    get_due_at,
+    get_due_occurrence,
+    get_last_occurrence,
+    get_next_due_date,
+    group_by_slot_range,
+)
+from user.models import User
 
-if TYPE_CHECKING:  # безопасный импорт User только для mypy, чтобы mypy понял откуда user, не влияет на runtime
-    from user.models import User
+logger = logging.getLogger(__name__)
 
 
-def send_telegram_message(chat_id: int, text: str) -> None:
+@shared_task
+def send_habit_reminders() -> int:
+    """
+    Напоминает пользователям о полезной привычке за 15 минут до начала.
+    Тик обрабатывает окно минут выполнения от последней обработанной минуты до текущей, поэтому задержанные или
+    пропущенные тики не теряют напоминаний. Напоминания, опоздавшие больше чем на REMINDER_MAX_LATENESS минут,
+    пропускаются.
+    Напоминание отправляется только в дни выполнения привычки (next_due_at), привычки окна делятся на пачки по
+    REMINDER_CHUNK_SIZE, которые отправляются параллельно отдельными задачами (chord), итоговые счётчики собирает
+    aggregate_reminder_results.
+    :return: Количество запущенных пачек
+    """
+    ledger = get_reminder_ledger()
+    end = get_due_occurrence()
+    start = end - timedelta(minutes=settings.REMINDER_MAX_LATENESS)
+    last_processed = ledger.get_last_processed()
+    if last_processed is None or last_processed >= end:
+        start = end
+    elif last_processed >= start:
+        start = last_processed + timedelta(minutes=1)
+
+    # Поиск привычек окна читает реплику: пачки перечитывают привычки с основной БД и отбрасывают уже отправленные
+    with use_replica():
+        habit_ids = due_habit_ids(start, end)
+        chunks = list(iter(lambda: list(islice(habit_ids, settings.REMINDER_CHUNK_SIZE)), []))
+    if chunks:
+        header = (send_reminder_chunk.s(chunk, end.isoformat()) for chunk in chunks)
+        chord(header)(aggregate_reminder_results.s())
+    ledger.set_last_processed(end)
+    return len(chunks)
+
+
+def due_habits_query(slot_ranges: tuple[tuple[int, int], ...], end: datetime, tz_names: list[str]) -> QuerySet[Habit]:
+    """
+    Возвращает запрос привычек группы часовых поясов, которые нужно выполнить в диапазонах слотов.
+    :param slot_ranges: Диапазоны слотов (первый, последний). Если диапазон переходит через полночь, последний слот
+    меньше первого
+    :param end: Последняя минута окна выполнения (aware, UTC)
+    :param tz_names: Названия часовых поясов группы
+    :return: QuerySet привычек
+    """
+    slots = Q()
+    for first_slot, last_slot in slot_ranges:
+        if first_slot <= last_slot:
+            slots |= Q(reminder_slot__range=(first_slot, last_slot))
+        else:  # Окно переходит через полночь местного времени
+            slots |= Q(reminder_slot__gte=first_slot) | Q(reminder_slot__lte=last_slot)
+    return Habit.objects.filter(
+        slots,
+        next_due_at__lt=end + timedelta(minutes=1),
+        user__timezone__in=tz_names,
+        user__telegram_chat_id__gt="",
+    ).order_by("id")
+
+
+def due_habit_ids(start: datetime, end: datetime) -> Iterator[int]:
+    """
+    Возвращает id привычек, которые нужно выполнить в окне минут [start, end].
+    Часовые пояса пользователей группируются по текущему смещению от UTC, для каждой группы выполняется один запрос
+    диапазона по индексу (слот, следующее выполнение) вместо пересчёта времени каждой привычки.
+    :param start: Первая минута окна выполнения (aware, UTC)
+    :param end: Последняя минута окна выполнения (aware, UTC)
+    :return: Итератор id привычек
+    """
+    # Отсекает пользователей без chat id (NULL и пустую строку)
+    timezones = User.objects.filter(telegram_chat_id__gt="").values_list("timezone", flat=True).distinct()
+    for slot_ranges, tz_names in group_by_slot_range(start, end, timezones).items():
+        yield from due_habits_query(slot_ranges, end, tz_names).values_list("id", flat=True).iterator()
+
+
+@shared_task
+def send_reminder_chunk(habit_ids: list[int], end: str) -> dict[str, int]:
+    """
+    Отправляет напоминания для пачки привычек и сдвигает их следующее выполнение на periodicity дней. Привычки,
+    следующее выполнение которых осталось в прошлом после пропущенного напоминания, в дни вне сетки выполнения не
+    напоминаются, а выравниваются по сетке.
+    Повторный запуск задачи для той же минуты безопасен: отправленные напоминания отмечаются в журнале доставки.
+    Напоминания, которые не удалось отправить, остаются в очереди исходящих сообщений для повторных попыток.
+    :param habit_ids: id привычек пачки
+    :param end: Последняя минута окна выполнения тика в формате ISO 8601
+    :return: Количество отправленных и неотправленных напоминаний
+    """
+    window_end = datetime.fromisoformat(end)
+    # Одним запросом с JOIN берутся только нужные колонки, пользователи без chat id отсекаются на уровне БД.
+    # Размер пачки ограничен REMINDER_CHUNK_SIZE, строки нужны дважды — для отправки и для сдвига расписания
+    rows = Habit.objects.filter(
+        id__in=habit_ids, next_due_at__lt=window_end + timedelta(minutes=1), user__telegram_chat_id__gt=""
+    ).values_list(
+        "id", "action", "time", "periodicity", "next_due_at", "user__telegram_chat_id", "user__timezone", named=True
+    )
+    reminders = {}
+    realigned = []
+    for row in rows:
+        occurrence = get_last_occurrence(row.time, window_end, row.user__timezone)
+        day = timezone.localdate(occurrence, row.user__timezone)
+        # Следующее выполнение в прошлом остаётся после пропущенного напоминания: в день вне сетки выполнения
+        # напоминание не отправляется, а следующее выполнение выравнивается по сетке
+        due_day = get_next_due_date(timezone.localdate(row.next_due_at, row.user__timezone), row.periodicity, day)
+        if due_day == day:
+            reminders[row.id] = (row, occurrence)
+        else:
+            realigned.append(Habit(id=row.id, next_due_at=get_due_at(row.time, due_day, row.user__timezone)))
+
+    # Напоминания, уже отмеченные в журнале доставки (повторный тик или повтор задачи), пропускаются
+    claimed = get_reminder_ledger().claim((habit_id, occurrence) for habit_id, (_, occurrence) in reminders.items())
+    due = [reminders[habit_id] for habit_id in claimed]
+    # Сообщения сохраняются в очередь исходящих сообщений до отправки, неотправленные повторит drain_outbound_messages.
+    # На время отправки сообщения зарезервированы, как в drain_outbound_messages, иначе тик очереди, запущенный во
+    # время отправки пачки, отправил бы их повторно. Если воркер упадёт во время отправки, сообщения повторятся после
+    # окончания резерва
+    lease_until = timezone.now() + timedelta(seconds=settings.OUTBOUND_LEASE_SECONDS)
+    messages = OutboundMessage.objects.bulk_create(
+        OutboundMessage(
+            habit_id=row.id,
+            chat_id=row.user__telegram_chat_id,
+            text=f"Напоминание: через 15 минут необходимо выполнить привычку: {row.action}",
+            next_attempt_at=lease_until,
+        )
+        for row, _ in due
+    )
+    report = deliver(messages)
+
+    # Следующее выполнение отсчитывается от текущего выполнения в часовом поясе пользователя, одним запросом для
+    # всей пачки вместе с выровненными
+    Habit.objects.bulk_update(
+        [
+            *realigned,
+            *(
+                Habit(
+                    id=row.id,
+                    next_due_at=get_due_at(
+                        row.time,
+                        timezone.localdate(occurrence, row.user__timezone) + timedelta(days=row.periodicity),
+                        row.user__timezone,
+                    ),
+                )
+                for row, occurrence in due
+            ),
+        ],
+        ["next_due_at"],
+    )
+    return {"sent": report.sent, "failed": report.failed}
+
+
+@shared_task
+def drain_outbound_messages() -> dict[str, int]:
+    """
+    Повторяет отправку сообщений очереди, для которых наступило время следующей попытки.
+    Сообщения выбираются пачкой по OUTBOUND_DRAIN_BATCH_SIZE с блокировкой строк (SKIP LOCKED) и резервируются на
+    время отправки, поэтому задачу можно запускать параллельно на нескольких воркерах.
+    :return: Количество отправленных и неотправленных сообщений
+    """
+    with transaction.atomic():
+        message_ids = list(
+            OutboundMessage.objects.due()
+            .select_for_update(skip_locked=True)
+            .order_by("next_attempt_at")
+            .values_list("id", flat=True)[: settings.OUTBOUND_DRAIN_BATCH_SIZE]
+        )
+        OutboundMessage.objects.filter(id__in=message_ids).update(
+            next_attempt_at=timezone.now() + timedelta(seconds=settings.OUTBOUND_LEASE_SECONDS)
+        )
+    report = deliver(list(OutboundMessage.objects.filter(id__in=message_ids)))
+    stats = OutboundMessage.objects.stats()
+    logger.info(
+        "Очередь сообщений: отправлено %s, ошибок %s, в очереди %s, недоставленных %s",
+        report.sent,
+        report.failed,
+        stats["backlog"],
+        stats["dead"],
+    )
+    return {"sent": report.sent, "failed": report.failed}
+
+
+@shared_task
+def purge_outbound_messages() -> int:
+    """
+    Удаляет отправленные сообщения старше OUTBOUND_RETENTION_DAYS дней.
+    :return: Количество удалённых сообщений
+    """
+    deleted, _ = OutboundMessage.objects.filter(
+        status=OutboundMessage.Status.SENT,
+        sent_at__lt=timezone.now() - timedelta(days=settings.OUTBOUND_RETENTION_DAYS),
+    ).delete()
+    return deleted
+
+
+@shared_task
+def purge_deleted_habits() -> int:
     """
-    Отправляет сообщение в телеграм пользователя.
-    :param chat_id: id пользователя в телеграм-чате
-    :param text: Отправляемое сообщение
+    Удаляет из БД привычки, удалённые раньше HABIT_TOMBSTONE_RETENTION_DAYS дней назад.
+    :return: Количество удалённых привычек
+    """
+    habits = Habit.all_objects.filter(
+        deleted_at__lt=timezone.now() - timedelta(days=settings.HABIT_TOMBSTONE_RETENTION_DAYS)
+    )
+    # Статистика владельцев выполненных привычек пересчитывается без удалённых отметок о выполнении
+    user_ids = list(habits.filter(stats__isnull=False).values_list("user_id", flat=True).distinct())
+    deleted, _ = habits.hard_delete()
+    for user_id in user_ids:
+        rebuild_user_stats.delay(user_id)
+    return deleted
+
+
+def schedule_stats_refresh(user_id: int, rebuild_habit_ids: list[int] | None = None) -> None:
+    """
+    Запускает после фиксации транзакции пересчёт количества привычек и недельной цели пользователя и, если
+    периодичность привычек изменилась, — пересчёт их статистики.
+    :param user_id: id пользователя
+    :param rebuild_habit_ids: id привычек с изменённой периодичностью
     :return:
     """
-    token = settings.TELEGRAM_BOT_TOKEN
-    url = f"https://api.telegram.org/bot{token}/sendMessage"
-    requests.post(url, data={"chat_id": chat_id, "text": text})
+    transaction.on_commit(partial(refresh_user_stats.delay, user_id))
+    if rebuild_habit_ids:
+        transaction.on_commit(partial(rebuild_habit_stats.delay, rebuild_habit_ids))
 
 
 @shared_task
-def send_habit_reminders() -> None:
+def refresh_user_stats(user_id: int) -> None:
     """
-    Напоминает пользователям о полезной привычке за 15 минут до начала.
+    Пересчитывает количество привычек и недельную цель пользователя.
+    :param user_id: id пользователя
     :return:
     """
-    now = datetime.now()
-    notify_time = now + timedelta(minutes=15)
+    with transaction.atomic():
+        stats, created = UserStats.objects.get_locked(user_id)
+        if not created:
+            stats.refresh_habits()
+            stats.save(update_fields=["habits", "weekly_target"])
 
-    habits = cast(
-        list[Habit], list(Habit.objects.filter(time__hour=notify_time.hour, time__minute=notify_time.minute))
-    )
 
-    for habit in habits:
-        user: User = habit.user  # Явная аннотация помогает mypy - чтобы telegram_chat_id не вызывал ошибок
-        if user.telegram_chat_id:
-            message = f"Напоминание: через 15 минут необходимо выполнить привычку: {habit.action}"
-            try:
-                send_telegram_message(user.telegram_chat_id, message)
-            except Exception as e:
-                print(f"Ошибка при отправке сообщения в Telegram: {e}")
+@shared_task
+def rebuild_user_stats(user_id: int) -> None:
+    """
+    Пересчитывает статистику пользователя по всем его привычкам и отметкам о выполнении.
+    :param user_id: id пользователя
+    :return:
+    """
+    with transaction.atomic():
+        UserStats.objects.select_for_update().filter(user_id=user_id).first()
+        UserStats.build(user_id).save()
+
+
+@shared_task
+def rebuild_habit_stats(habit_ids: list[int]) -> int:
+    """
+    Пересчитывает по истории выполнений статистику привычек, периодичность которых изменилась.
+    :param habit_ids: id привычек
+    :return: Количество пересчитанных привычек
+    """
+    rebuilt = 0
+    for habit in Habit.all_objects.filter(id__in=habit_ids, stats__isnull=False):
+        with transaction.atomic():
+            stats = HabitStats.objects.select_for_update().get(habit=habit)
+            habit.refresh_from_db(fields=["periodicity"])
+            if stats.periodicity != habit.periodicity:
+                HabitStats.build(habit).save()
+                rebuilt += 1
+    return rebuilt
+
+
+@shared_task
+def aggregate_reminder_results(results: list[dict[str, int]]) -> dict[str, int]:
+    """
+    Суммирует результаты отправки напоминаний по всем пачкам тика.
+    :param results: Результаты задач send_reminder_chunk
+    :return: Общее количество отправленных и неотправленных напоминаний
+    """
+    total = {"sent": sum(result["sent"] for result in results), "failed": sum(result["failed"] for result in results)}
+    logger.info("Тик напоминаний: пачек %s, отправлено %s, ошибок %s", len(results), total["sent"], total["failed"])
+    return total
 
 
 @shared_task
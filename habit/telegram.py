@@ -0,0 +1,226 @@
+"""
+Модуль доставки сообщений в Telegram.
+TelegramClient — клиент Bot API с пулом HTTP-соединений (requests.Session), таймаутом и ограниченной
+конкурентностью отправки. Соблюдает ограничения Telegram на частоту отправки: общее (TELEGRAM_GLOBAL_RATE сообщений в
+секунду на бота) и для одного чата (TELEGRAM_CHAT_RATE сообщений в секунду).
+Адрес API задаётся настройкой TELEGRAM_API_URL, поэтому клиент можно проверять на локальном HTTP-сервере-заглушке.
+"""
+
+import logging
+import threading
+import time
+from collections.abc import Hashable, Iterable
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import lru_cache
+
+from django.conf import settings
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class OutgoingMessage:
+    """
+    Сообщение для отправки.
+    Attributes:
+        key (Hashable): Ключ сообщения, по которому сопоставляется результат отправки (например, id привычки)
+        chat_id (int | str): id чата пользователя в Telegram
+        text (str): Текст сообщения
+    """
+
+    key: Hashable
+    chat_id: int | str
+    text: str
+
+
+@dataclass(frozen=True)
+class DeliveryResult:
+    """
+    Результат отправки одного сообщения.
+    Attributes:
+        key (Hashable): Ключ сообщения
+        ok (bool): Признак успешной отправки
+        error (str | None): Описание ошибки
+        retry_after (float | None): Через сколько секунд Telegram разрешает повторить отправку (при ответе 429)
+    """
+
+    key: Hashable
+    ok: bool
+    error: str | None = None
+    retry_after: float | None = None
+
+
+@dataclass
+class DeliveryReport:
+    """
+    Отчёт об отправке пачки сообщений.
+    Attributes:
+        results (list[DeliveryResult]): Результаты отправки сообщений
+        elapsed (float): Время отправки в секундах
+    """
+
+    results: list[DeliveryResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    @property
+    def sent(self) -> int:
+        """
+        Возвращает количество успешно отправленных сообщений.
+        """
+        return sum(1 for result in self.results if result.ok)
+
+    @property
+    def failed(self) -> int:
+        """
+        Возвращает количество сообщений, которые не удалось отправить.
+        """
+        return len(self.results) - self.sent
+
+    @property
+    def throughput(self) -> float:
+        """
+        Возвращает пропускную способность отправки в сообщениях в секунду.
+        """
+        return len(self.results) / self.elapsed if self.elapsed else 0.0
+
+
+class RateLimiter:
+    """
+    Ограничивает частоту отправки: общую и для каждого чата отдельно.
+    Каждый вызов acquire() резервирует ближайшее свободное время отправки и ждёт его наступления, поэтому
+    ограничитель можно безопасно использовать из нескольких потоков.
+    """
+
+    def __init__(self, global_rate: float, chat_rate: float):
+        """
+        :param global_rate: Максимальное количество сообщений в секунду для всех чатов
+        :param chat_rate: Максимальное количество сообщений в секунду для одного чата
+        """
+        self.global_interval = 1 / global_rate if global_rate else 0.0
+        self.chat_interval = 1 / chat_rate if chat_rate else 0.0
+        self._lock = threading.Lock()
+        self._next_global = 0.0
+        self._next_chat: dict[int | str, float] = {}
+
+    def acquire(self, chat_id: int | str) -> None:
+        """
+        Ожидает, пока отправка сообщения в чат не будет разрешена ограничениями частоты.
+        :param chat_id: id чата пользователя в Telegram
+        :return:
+        """
+        with self._lock:
+            now = time.monotonic()
+            if len(self._next_chat) > 10_000:  # Забывает чаты, для которых ограничение уже не действует
+                self._next_chat = {chat: at for chat, at in self._next_chat.items() if at > now}
+            send_at = max(now, self._next_global, self._next_chat.get(chat_id, 0.0))
+            self._next_global = send_at + self.global_interval
+            self._next_chat[chat_id] = send_at + self.chat_interval
+        delay = send_at - now
+        if delay > 0:
+            time.sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """
+        Приостанавливает все отправки на заданное время (когда Telegram ответил 429 Too Many Requests).
+        :param seconds: Время паузы в секундах
+        :return:
+        """
+        with self._lock:
+            self._next_global = max(self._next_global, time.monotonic() + seconds)
+
+
+class TelegramClient:
+    """
+    Клиент Telegram Bot API для массовой отправки сообщений.
+    """
+
+    def __init__(
+        self,
+        token: str | None = None,
+        api_url: str | None = None,
+        timeout: float | None = None,
+        concurrency: int | None = None,
+        global_rate: float | None = None,
+        chat_rate: float | None = None,
+    ):
+        """
+        Параметры, которые не переданы явно, берутся из настроек проекта (TELEGRAM_*).
+        :param token: Токен бота
+        :param api_url: Адрес Bot API
+        :param timeout: Таймаут HTTP-запроса в секундах
+        :param concurrency: Количество одновременных запросов
+        :param global_rate: Максимальное количество сообщений в секунду для всех чатов
+        :param chat_rate: Максимальное количество сообщений в секунду для одного чата
+        """
+        token = token or settings.TELEGRAM_BOT_TOKEN
+        api_url = (api_url or settings.TELEGRAM_API_URL).rstrip("/")
+        self.url = f"{api_url}/bot{token}/sendMessage"
+        self.timeout = timeout or settings.TELEGRAM_TIMEOUT
+        self.concurrency = concurrency or settings.TELEGRAM_CONCURRENCY
+        self.rate_limiter = RateLimiter(
+            global_rate or settings.TELEGRAM_GLOBAL_RATE, chat_rate or settings.TELEGRAM_CHAT_RATE
+        )
+        # Пул соединений по размеру конкурентности — соединения переиспользуются между запросами и тиками
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.concurrency)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def send(self, message: OutgoingMessage) -> DeliveryResult:
+        """
+        Отправляет одно сообщение с соблюдением ограничений частоты.
+        :param message: Отправляемое сообщение
+        :return: Результат отправки
+        """
+        self.rate_limiter.acquire(message.chat_id)
+        try:
+            response = self.session.post(
+                self.url, data={"chat_id": message.chat_id, "text": message.text}, timeout=self.timeout
+            )
+        except requests.RequestException as e:
+            return DeliveryResult(message.key, ok=False, error=str(e))
+        if response.ok:
+            return DeliveryResult(message.key, ok=True)
+
+        try:
+            payload = response.json()
+        except ValueError:
+            payload = {}
+        retry_after = payload.get("parameters", {}).get("retry_after")
+        if retry_after is not None:
+            retry_after = float(retry_after)
+            self.rate_limiter.pause(retry_after)
+        error = payload.get("description") or f"HTTP {response.status_code}"
+        return DeliveryResult(message.key, ok=False, error=error, retry_after=retry_after)
+
+    def send_many(self, messages: Iterable[OutgoingMessage]) -> DeliveryReport:
+        """
+        Отправляет сообщения параллельно, не более concurrency запросов одновременно.
+        :param messages: Отправляемые сообщения
+        :return: Отчёт об отправке
+        """
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            results = list(executor.map(self.send, messages))
+        report = DeliveryReport(results=results, elapsed=time.perf_counter() - started)
+        logger.info(
+            "Отправлено сообщений в Telegram: %s, ошибок: %s, за %.2f с (%.1f сообщений/с)",
+            report.sent,
+            report.failed,
+            report.elapsed,
+            report.throughput,
+        )
+        return report
+
+
+@lru_cache(maxsize=1)
+def get_telegram_client() -> TelegramClient:
+    """
+    Возвращает общий для процесса клиент Telegram, чтобы пул соединений переиспользовался между тиками.
+    :return: Клиент Telegram
+    """
+    return TelegramClient()
@@ -1,16 +1,70 @@
-from datetime import time, timedelta
+import json
+import threading
+import time as time_module
+from datetime import UTC, datetime, time, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from io import StringIO
+from unittest.mock import patch
+from urllib.parse import parse_qs
 
-from django.test import TestCase
+from django.contrib.auth.models import Permission
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.core.management import CommandError, call_command
+from django.test import AsyncClient, SimpleTestCase, TestCase, override_settings
 from django.urls import reverse
+from django.utils import timezone
 
+import fakeredis
+from asgiref.sync import sync_to_async
 from rest_framework import status
 from rest_framework.response import Response
-from rest_framework.test import APIClient
+from rest_framework.test import APIClient, APIRequestFactory
 
-from habit.models import Habit
+from config.routers import is_sticky
+from habit.cache import bump_public_habits_version
+from habit.ledger import ReminderLedger
+from habit.management.commands._bench import get_access_token
+from habit.models import Habit, HabitCompletion, HabitStats, OutboundMessage, PleasantHabit, UserStats
+from habit.schedule import group_by_slot_range
+from habit.serializers import HabitSerializer, PleasantHabitSerializer
+from habit.streaks import get_week_start
+from habit.tasks import (
+    aggregate_reminder_results,
+    drain_outbound_messages,
+    due_habit_ids,
+    purge_outbound_messages,
+    send_habit_reminders,
+    send_reminder_chunk,
+)
+from habit.telegram import DeliveryReport, DeliveryResult, OutgoingMessage, TelegramClient
 from user.models import User
 
 
+def record_messages(sent: list[OutgoingMessage]):
+    """
+    Возвращает заглушку TelegramClient.send_many, которая запоминает сообщения и отправляет их успешно.
+    :param sent: Список, в который сохраняются сообщения
+    :return: Заглушка send_many
+    """
+
+    def send_many(messages):
+        messages = list(messages)
+        sent.extend(messages)
+        return DeliveryReport(results=[DeliveryResult(message.key, ok=True) for message in messages])
+
+    return send_many
+
+
+def habit_id(message: OutgoingMessage) -> int:
+    """
+    Возвращает id привычки, о которой напоминает сообщение (ключ сообщения — id сообщения очереди).
+    :param message: Отправленное сообщение
+    :return: id привычки
+    """
+    return OutboundMessage.objects.get(id=message.key).habit_id
+
+
 class HabitViewSetTestCase(TestCase):
     """
     Класс для тестирования представления HabitViewSet.
@@ -21,6 +75,7 @@ class HabitViewSetTestCase(TestCase):
         Настраивает тестовые данные.
         :return:
         """
+        cache.clear()
         self.user = User.objects.create_user(
             email="testuser@example.com", first_name="Test", last_name="User", password="pass1234"
         )
@@ -85,6 +140,58 @@ class HabitViewSetTestCase(TestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(Habit.objects.filter(action="Workout", user=self.user).exists())
 
+    def test_create_habit_with_related_habit_query_count(self):
+        """
+        Тестирует, что связанная приятная привычка проверяется одним запросом с фильтром по пользователю.
+        :return:
+        """
+        pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action="Tea")
+        data = {"place": "Gym", "time": "06:30:00", "action": "Workout", "periodicity": 1, "duration": "00:02:00"}
+
+        # Поиск приятной привычки и создание привычки
+        with self.assertNumQueries(2):
+            response: Response = self.client.post(reverse("habit:habit-list"), {**data, "related_habit": pleasant.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["related_habit"], pleasant.id)
+
+    def test_related_habit_of_other_user_is_rejected(self):
+        """
+        Тестирует, что нельзя связать привычку с чужой приятной привычкой.
+        :return:
+        """
+        pleasant = PleasantHabit.objects.create(user=self.other_user, place="Home", action="Tea")
+        response: Response = self.client.patch(
+            reverse("habit:habit-detail", args=[self.habit.id]), {"related_habit": pleasant.id, "reward": ""}
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("related_habit", response.data)
+
+    def test_related_habits_are_loaded_in_one_query(self):
+        """
+        Тестирует, что при валидации списка привычек связанные приятные привычки загружаются одним запросом.
+        :return:
+        """
+        pleasant = [
+            PleasantHabit.objects.create(user=self.user, place="Home", action=f"Tea {number}") for number in range(3)
+        ]
+        request = APIRequestFactory().post("/")
+        request.user = self.user
+        data = [
+            {
+                "place": "Gym",
+                "time": "06:30:00",
+                "action": f"Workout {number}",
+                "periodicity": 1,
+                "duration": "00:02:00",
+                "related_habit": pleasant[number % 3].id,
+            }
+            for number in range(10)
+        ]
+        serializer = HabitSerializer(data=data, many=True, context={"request": request})
+        with self.assertNumQueries(1):
+            self.assertTrue(serializer.is_valid(), serializer.errors)
+        self.assertEqual(serializer.validated_data[4]["related_habit"], pleasant[1])
+
     def test_retrieve_habit(self):
         """
         Тестирует получение конкретной привычки.
@@ -153,6 +260,178 @@ class HabitViewSetTestCase(TestCase):
         response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
 
+    def test_bulk_create_update_delete(self):
+        """
+        Тестирует массовое создание, обновление и удаление привычек постоянным количеством запросов.
+        :return:
+        """
+        pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action="Tea")
+        extra = Habit.objects.create(
+            user=self.user, place="Home", time=time(9, 0), action="Read", duration=timedelta(minutes=1)
+        )
+        data = {
+            "create": [
+                {
+                    "place": "Gym",
+                    "time": "06:30:00",
+                    "action": f"Workout {number}",
+                    "periodicity": 1,
+                    "duration": "00:02:00",
+                    "related_habit": pleasant.id,
+                }
+                for number in range(20)
+            ],
+            "update": [{"id": self.habit.id, "time": "09:30:00", "duration": "00:01:00"}],
+            "delete": [extra.id],
+        }
+
+        # Привычки пользователя, приятные привычки, создание, обновление, пометка удалёнными публичных и остальных
+        # привычек, точки сохранения транзакции
+        with self.assertNumQueries(8):
+            response: Response = self.client.post(reverse("habit:habit-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK, response.data)
+        self.assertEqual(len(response.data["created"]), 20)
+        self.assertEqual(response.data["deleted"], [extra.id])
+
+        self.assertEqual(Habit.objects.filter(user=self.user, related_habit=pleasant).count(), 20)
+        self.assertEqual(Habit.objects.get(action="Workout 0").reminder_slot, 6 * 60 + 30)
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.time, time(9, 30))
+        self.assertEqual(self.habit.reminder_slot, 9 * 60 + 30)
+        self.assertFalse(Habit.objects.filter(id=extra.id).exists())
+        self.assertIsNotNone(Habit.all_objects.get(id=extra.id).deleted_at)
+
+    def test_bulk_returns_item_errors_without_writing(self):
+        """
+        Тестирует, что при ошибке в любом элементе возвращаются ошибки по элементам и ничего не сохраняется.
+        :return:
+        """
+        valid = {"place": "Gym", "time": "06:30:00", "action": "Workout", "periodicity": 1, "duration": "00:02:00"}
+        data = {
+            "create": [valid, {**valid, "duration": "00:05:00"}, {**valid, "periodicity": 10}],
+            "update": [{"id": self.public_habit.id, "action": "Stolen"}],
+            "delete": [self.habit.id],
+        }
+        response: Response = self.client.post(reverse("habit:habit-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["create"][0], {})
+        self.assertIn("duration", response.data["create"][1])
+        self.assertIn("periodicity", response.data["create"][2])
+        self.assertIn("id", response.data["update"][0])
+        self.assertNotIn("delete", response.data)
+        self.assertFalse(Habit.objects.filter(action="Workout").exists())
+        self.assertTrue(Habit.objects.filter(id=self.habit.id).exists())
+
+    def test_bulk_rejects_duplicate_update_ids(self):
+        """
+        Тестирует ошибки по элементам update с повторяющимся id: ни одно из обновлений не сохраняется.
+        :return:
+        """
+        extra = Habit.objects.create(
+            user=self.user, place="Home", time=time(9, 0), action="Read", duration=timedelta(minutes=1)
+        )
+        data = {
+            "update": [
+                {"id": self.habit.id, "action": "First"},
+                {"id": extra.id, "action": "Write"},
+                {"id": self.habit.id, "action": "Second"},
+            ],
+        }
+        response: Response = self.client.post(reverse("habit:habit-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["update"][0], {"id": ["Привычка повторяется в списке."]})
+        self.assertEqual(response.data["update"][1], {})
+        self.assertEqual(response.data["update"][2], {"id": ["Привычка повторяется в списке."]})
+        self.assertEqual(Habit.objects.get(id=self.habit.id).action, "Do yoga")
+        self.assertEqual(Habit.objects.get(id=extra.id).action, "Read")
+
+    def test_bulk_rejects_duplicate_and_updated_delete_ids(self):
+        """
+        Тестирует ошибки по элементам delete с повторяющимся id и с id из update: привычки не удаляются.
+        :return:
+        """
+        extra = Habit.objects.create(
+            user=self.user, place="Home", time=time(9, 0), action="Read", duration=timedelta(minutes=1)
+        )
+        other = Habit.objects.create(
+            user=self.user, place="Home", time=time(9, 0), action="Write", duration=timedelta(minutes=1)
+        )
+        data = {
+            "update": [{"id": self.habit.id, "action": "Stretch"}],
+            "delete": [extra.id, self.habit.id, other.id, extra.id],
+        }
+        response: Response = self.client.post(reverse("habit:habit-bulk"), data, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(
+            response.data["delete"],
+            [
+                "Привычка повторяется в списке.",
+                "Привычка обновляется в том же запросе.",
+                {},
+                "Привычка повторяется в списке.",
+            ],
+        )
+        self.assertNotIn("update", response.data)
+        self.assertEqual(Habit.objects.filter(id__in=[self.habit.id, extra.id, other.id]).count(), 3)
+
+    def test_changes_returns_updates_and_tombstones(self):
+        """
+        Тестирует выдачу изменённых и удалённых после since привычек потоком NDJSON.
+        :return:
+        """
+        url = reverse("habit:habit-changes")
+        response = self.client.get(url)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([line["id"] for line in lines[:-1]], [self.habit.id])
+        since = lines[-1]["since"]
+
+        with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(seconds=1)):
+            deleted = Habit.objects.create(
+                user=self.user, place="Home", time=time(9, 0), action="Read", duration=timedelta(minutes=1)
+            )
+            deleted.delete()
+            self.habit.action = "Stretch"
+            self.habit.save()
+        self.assertFalse(Habit.objects.filter(id=deleted.id).exists())
+
+        with patch("django.utils.timezone.now", return_value=timezone.now() + timedelta(seconds=2)):
+            response = self.client.get(url, {"since": since})
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        changes = {line["id"]: line for line in lines[:-1]}
+        self.assertEqual(changes.keys(), {self.habit.id, deleted.id})
+        self.assertEqual(changes[self.habit.id]["action"], "Stretch")
+        self.assertEqual(changes[deleted.id].keys(), {"id", "deleted_at"})
+        self.assertIn("since", lines[-1])
+
+        self.assertEqual(self.client.get(url, {"since": "yesterday"}).status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get(url, {"since": (timezone.now() - timedelta(days=365)).isoformat()})
+        self.assertEqual(response.status_code, status.HTTP_410_GONE)
+
+    def test_changes_returns_late_committed_habit(self):
+        """
+        Тестирует, что привычка, время изменения которой рассчитано до запроса изменений, а транзакция зафиксирована
+        после него, попадает в следующий ответ.
+        :return:
+        """
+        url = reverse("habit:habit-changes")
+        requested_at = timezone.now() + timedelta(seconds=10)
+        with patch("django.utils.timezone.now", return_value=requested_at):
+            response = self.client.get(url)
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        since = lines[-1]["since"]
+
+        # Время изменения рассчитано за 5 секунд до первого запроса, но транзакция ещё не была зафиксирована
+        late = Habit.objects.create(
+            user=self.user, place="Home", time=time(9, 0), action="Late", duration=timedelta(minutes=1)
+        )
+        Habit.all_objects.filter(id=late.id).update(updated_at=requested_at - timedelta(seconds=5))
+
+        with patch("django.utils.timezone.now", return_value=requested_at + timedelta(seconds=1)):
+            response = self.client.get(url, {"since": since})
+        lines = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertIn(late.id, [line["id"] for line in lines[:-1]])
+
     def test_public_habit_list(self):
         """
         Тестирует получение списка публичных привычек.
@@ -162,3 +441,1157 @@ class HabitViewSetTestCase(TestCase):
         response: Response = self.client.get(url)
         self.assertEqual(response.status_code, status.HTTP_200_OK)
         self.assertTrue(any(h["id"] == self.public_habit.id for h in response.data["results"]))
+
+    def test_list_matches_model_serializer(self):
+        """
+        Тестирует, что сериализатор списка возвращает те же данные, что и HabitSerializer.
+        :return:
+        """
+        response: Response = self.client.get(reverse("habit:habit-list"))
+        self.assertEqual(response.data["results"], [HabitSerializer(self.habit).data])
+
+    def test_public_habit_list_hides_owner(self):
+        """
+        Тестирует, что лента публичных привычек не раскрывает владельца привычки и его приятные привычки.
+        :return:
+        """
+        response: Response = self.client.get(reverse("habit:habit-public"))
+        habit = response.data["results"][0]
+        self.assertNotIn("user", habit)
+        self.assertNotIn("related_habit", habit)
+        self.assertEqual(habit["action"], "Jogging")
+        self.assertEqual(habit["duration"], "00:20:00")
+
+    def test_expand_related_habit(self):
+        """
+        Тестирует встраивание приятной привычки по ?expand=related_habit в список, детальный просмотр и ленту
+        публичных привычек без дополнительных запросов на каждую привычку.
+        :return:
+        """
+        pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action="Tea")
+        for number in range(4):
+            Habit.objects.create(
+                user=self.user,
+                place="Gym",
+                time=time(7, 0),
+                action=f"Workout {number}",
+                duration=timedelta(minutes=1),
+                related_habit=pleasant,
+                is_public=True,
+            )
+
+        # COUNT(*) и страница привычек вместе с приятными привычками
+        with self.assertNumQueries(2):
+            response: Response = self.client.get(reverse("habit:habit-list"), {"expand": "related_habit"})
+        results = response.data["results"]
+        self.assertIsNone(results[0]["related_habit"])
+        self.assertEqual(results[1]["related_habit"]["id"], pleasant.id)
+        self.assertEqual(results[1]["related_habit"]["action"], "Tea")
+        self.assertEqual(results[1]["related_habit"], PleasantHabitSerializer(pleasant).data)
+
+        habit = Habit.objects.get(action="Workout 0")
+        url = reverse("habit:habit-detail", args=[habit.id])
+        with self.assertNumQueries(1):
+            response = self.client.get(url, {"expand": "related_habit"})
+        self.assertEqual(response.data["related_habit"], PleasantHabitSerializer(pleasant).data)
+        self.assertEqual(self.client.get(url).data["related_habit"], pleasant.id)
+
+        response = self.client.get(reverse("habit:habit-public"), {"expand": "related_habit"})
+        results = {habit["action"]: habit for habit in response.data["results"]}
+        self.assertEqual(results["Workout 0"]["related_habit"], {"place": "Home", "action": "Tea"})
+        self.assertIsNone(results["Jogging"]["related_habit"])
+
+        # Изменение приятной привычки публичной привычки сбрасывает кеш ленты
+        with self.captureOnCommitCallbacks(execute=True):
+            pleasant.action = "Green tea"
+            pleasant.save()
+        response = self.client.get(reverse("habit:habit-public"), {"expand": "related_habit"})
+        results = {habit["action"]: habit for habit in response.data["results"]}
+        self.assertEqual(results["Workout 0"]["related_habit"]["action"], "Green tea")
+
+    def test_public_habit_list_uses_cursor_pagination(self):
+        """
+        Тестирует курсорную пагинацию ленты публичных привычек и увеличенный размер страницы для доверенных клиентов.
+        :return:
+        """
+        for number in range(11):
+            Habit.objects.create(
+                user=self.other_user,
+                place="Park",
+                time=time(7, 30),
+                action=f"Public {number}",
+                duration=timedelta(minutes=1),
+                is_public=True,
+            )
+        url = reverse("habit:habit-public")
+        ids = []
+        response: Response = self.client.get(url, {"page_size": 50})
+        self.assertNotIn("count", response.data)
+        self.assertEqual(len(response.data["results"]), 10)
+        while True:
+            ids += [habit["id"] for habit in response.data["results"]]
+            if not response.data["next"]:
+                break
+            response = self.client.get(response.data["next"])
+        self.assertEqual(
+            ids, list(Habit.objects.filter(is_public=True).order_by("created_at", "id").values_list("id", flat=True))
+        )
+
+        self.user.user_permissions.add(Permission.objects.get(codename="bulk_read_habit"))
+        self.user = User.objects.get(pk=self.user.pk)  # Сбрасывает кеш прав пользователя
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get(url, {"page_size": 50})
+        self.assertEqual(len(response.data["results"]), 12)
+
+    def test_public_habit_list_is_cached(self):
+        """
+        Тестирует кеширование ленты публичных привычек, ответ 304 по ETag и сброс кеша при изменении публичной
+        привычки.
+        :return:
+        """
+        url = reverse("habit:habit-public")
+        response: Response = self.client.get(url)
+        etag = response.headers["ETag"]
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url)
+        self.assertEqual(response.headers["ETag"], etag)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, status.HTTP_304_NOT_MODIFIED)
+
+        # Снятие привычки с публикации сбрасывает кеш
+        with self.captureOnCommitCallbacks(execute=True):
+            self.public_habit.is_public = False
+            self.public_habit.save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["results"], [])
+
+        # Изменение непубличной привычки кеш не сбрасывает
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.habit.action = "Read"
+            self.habit.save()
+        self.assertEqual(callbacks, [])
+
+
+class PleasantHabitViewSetTestCase(TestCase):
+    """
+    Класс для тестирования представления PleasantHabitViewSet.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.user = User.objects.create(email="pleasant@example.com")
+        self.other_user = User.objects.create(email="other@example.com")
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action="Tea")
+
+    def create_pleasant_habits(self, count: int) -> None:
+        """
+        Создаёт приятные привычки пользователя, к каждой из которых привязаны две полезные привычки.
+        :param count: Количество приятных привычек
+        :return:
+        """
+        for number in range(count):
+            pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action=f"Pleasant {number}")
+            for habit_number in range(2):
+                Habit.objects.create(
+                    user=self.user,
+                    place="Gym",
+                    time=time(7, 0),
+                    action=f"Habit {number}.{habit_number}",
+                    duration=timedelta(minutes=1),
+                    related_habit=pleasant,
+                )
+
+    def test_crud_is_scoped_to_user(self):
+        """
+        Тестирует создание, изменение и удаление приятных привычек и недоступность чужих приятных привычек.
+        :return:
+        """
+        response: Response = self.client.post(
+            reverse("habit:pleasant-habit-list"), {"place": "Park", "action": "Walk"}
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["user"], self.user.id)
+
+        url = reverse("habit:pleasant-habit-detail", args=[self.pleasant.id])
+        response = self.client.patch(url, {"action": "Green tea"})
+        self.assertEqual(response.data["action"], "Green tea")
+
+        foreign = PleasantHabit.objects.create(user=self.other_user, place="Home", action="Cake")
+        response = self.client.get(reverse("habit:pleasant-habit-detail", args=[foreign.id]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        habit = Habit.objects.create(
+            user=self.user,
+            place="Gym",
+            time=time(7, 0),
+            action="Workout",
+            duration=timedelta(minutes=1),
+            related_habit=self.pleasant,
+        )
+        self.assertEqual(self.client.delete(url).status_code, status.HTTP_204_NO_CONTENT)
+        habit.refresh_from_db()
+        self.assertIsNone(habit.related_habit)
+
+    def test_list_with_embedded_habits_query_count(self):
+        """
+        Тестирует, что список приятных привычек со встроенными полезными привычками выполняет постоянное количество
+        запросов независимо от размера страницы.
+        :return:
+        """
+        self.create_pleasant_habits(9)
+        url = reverse("habit:pleasant-habit-list")
+
+        # Страница приятных привычек и полезные привычки всей страницы
+        with self.assertNumQueries(2):
+            response: Response = self.client.get(url, {"embed": "habits"})
+        self.assertEqual(len(response.data["results"]), 5)
+        self.assertEqual(response.data["results"][0]["habits"], [])
+        self.assertEqual(
+            [habit["action"] for habit in response.data["results"][1]["habits"]], ["Habit 0.0", "Habit 0.1"]
+        )
+
+        with self.assertNumQueries(2):
+            response = self.client.get(response.data["next"])
+        self.assertEqual(len(response.data["results"]), 5)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertNotIn("habits", response.data["results"][0])
+
+
+class HabitCompletionTestCase(TestCase):
+    """
+    Класс для тестирования отметок о выполнении привычек и расчёта серий.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.user = User.objects.create(email="streak@example.com")
+        self.habit = Habit.objects.create(
+            user=self.user, place="Gym", time=time(7, 0), action="Workout", duration=timedelta(minutes=1)
+        )
+        self.today = timezone.localdate(timezone=self.user.timezone)
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def complete(self, days_ago: int | None = None, habit: Habit | None = None):
+        """
+        Отмечает выполнение привычки.
+        :param days_ago: Сколько дней назад выполнена привычка (None — сегодня, без параметра date)
+        :param habit: Привычка. По умолчанию — привычка пользователя
+        :return: Ответ
+        """
+        url = reverse("habit:habit-complete", args=[(habit or self.habit).id])
+        data = {} if days_ago is None else {"date": str(self.today - timedelta(days=days_ago))}
+        return self.client.post(url, data, format="json")
+
+    def test_complete_updates_streak(self):
+        """
+        Тестирует продление серии ежедневной привычки, повторную отметку за тот же день и прерывание серии.
+        :return:
+        """
+        response = self.complete(5)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["stats"]["current_streak"], 0)
+        self.complete(4)
+        self.complete(3)
+
+        response = self.complete(3)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(HabitCompletion.objects.filter(habit=self.habit).count(), 3)
+
+        response = self.complete(1)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data["stats"]["completions"], 4)
+        self.assertEqual(response.data["stats"]["current_streak"], 1)
+        self.assertEqual(response.data["stats"]["longest_streak"], 3)
+        self.assertEqual(response.data["stats"]["adherence"], 0.8)
+
+        response = self.complete()
+        self.assertEqual(response.data["date"], str(self.today))
+        self.assertEqual(response.data["stats"]["current_streak"], 2)
+        self.assertEqual(response.data["stats"]["adherence"], round(5 / 6, 4))
+
+    def test_streak_respects_periodicity(self):
+        """
+        Тестирует серию привычки, которая выполняется раз в 2 дня: несколько отметок в одном периоде считаются одним
+        выполненным периодом, серия прерывается только после пропущенного периода.
+        :return:
+        """
+        self.habit.periodicity = 2
+        self.habit.save()
+        for days_ago in (10, 9, 8, 6):
+            self.complete(days_ago)
+
+        stats = HabitStats.objects.get(habit=self.habit)
+        self.assertEqual((stats.completions, stats.completed_periods, stats.current_streak), (4, 3, 3))
+        self.assertEqual(stats.get_current_streak(self.today - timedelta(days=3)), 3)
+        self.assertEqual(stats.get_current_streak(self.today - timedelta(days=2)), 0)
+
+        # После изменения периодичности статистика пересчитывается по истории выполнений
+        self.habit.periodicity = 1
+        with self.captureOnCommitCallbacks(execute=True):
+            self.habit.save()
+        stats.refresh_from_db()
+        self.assertEqual((stats.periodicity, stats.current_streak, stats.longest_streak), (1, 1, 3))
+        self.complete(5)
+        stats.refresh_from_db()
+        self.assertEqual((stats.completions, stats.current_streak, stats.longest_streak), (5, 2, 3))
+
+    def test_complete_rejects_invalid_dates(self):
+        """
+        Тестирует отказ в отметке о выполнении в будущем, раньше последней отметки и чужой привычки.
+        :return:
+        """
+        self.assertEqual(self.complete(-1).status_code, status.HTTP_400_BAD_REQUEST)
+        self.complete(1)
+        response = self.complete(2)
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn("date", response.data)
+        self.assertEqual(HabitStats.objects.get(habit=self.habit).completions, 1)
+
+        other = User.objects.create(email="other-streak@example.com")
+        habit = Habit.objects.create(
+            user=other, place="Home", time=time(8, 0), action="Read", duration=timedelta(minutes=1)
+        )
+        self.assertEqual(self.complete(habit=habit).status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_complete_does_not_read_history(self):
+        """
+        Тестирует, что количество запросов отметки о выполнении не зависит от количества прошлых отметок.
+        :return:
+        """
+        for days_ago in range(30, 2, -1):
+            self.complete(days_ago)
+        with self.assertNumQueries(9):
+            self.assertEqual(self.complete().status_code, status.HTTP_201_CREATED)
+
+    def test_user_stats(self):
+        """
+        Тестирует статистику пользователя по всем привычкам: количество привычек, недельную цель, серию дней и
+        выполнения прошлой недели. Статистика читается одним запросом.
+        :return:
+        """
+        with self.captureOnCommitCallbacks(execute=True):
+            habit = Habit.objects.create(
+                user=self.user,
+                place="Home",
+                time=time(8, 0),
+                action="Read",
+                duration=timedelta(minutes=1),
+                periodicity=7,
+            )
+        last_week = get_week_start(self.today) - timedelta(weeks=1)
+        for day, completed in (
+            (last_week, self.habit),
+            (last_week, habit),
+            (last_week + timedelta(days=1), self.habit),
+        ):
+            self.complete((self.today - day).days, completed)
+
+        url = reverse("habit:habit-stats")
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["habits"], 2)
+        self.assertEqual(response.data["completions"], 3)
+        self.assertEqual(response.data["longest_streak"], 2)
+        self.assertEqual(response.data["weekly_target"], 8)
+        self.assertEqual(response.data["week_completed"], 0)
+        self.assertEqual(response.data["weekly_adherence"], 0.375)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(
+                reverse("habit:habit-detail", args=[self.habit.id]), {"periodicity": 7}, format="json"
+            )
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.delete(reverse("habit:habit-detail", args=[habit.id]))
+        response = self.client.get(url)
+        self.assertEqual((response.data["habits"], response.data["weekly_target"]), (1, 1))
+        self.assertEqual(response.data["completions"], 3)
+        self.assertEqual(HabitStats.objects.get(habit=self.habit).periodicity, 7)
+
+    def test_user_stats_built_on_first_request(self):
+        """
+        Тестирует расчёт статистики пользователя по истории при первом запросе.
+        :return:
+        """
+        self.complete(1)
+        self.complete()
+        UserStats.objects.all().delete()
+        response = self.client.get(reverse("habit:habit-stats"))
+        self.assertEqual((response.data["habits"], response.data["completions"]), (1, 2))
+        self.assertEqual(response.data["current_streak"], 2)
+
+    def test_check_habit_stats(self):
+        """
+        Тестирует проверку статистики по истории выполнений и исправление расхождений.
+        :return:
+        """
+        for days_ago in (3, 2, 0):
+            self.complete(days_ago)
+        out = StringIO()
+        call_command("check_habit_stats", stdout=out)
+        self.assertIn("Расхождений: 0", out.getvalue())
+
+        UserStats.objects.filter(user=self.user).update(current_streak=5)
+        HabitStats.objects.filter(habit=self.habit).update(longest_streak=7)
+        with self.assertRaises(CommandError):
+            call_command("check_habit_stats", stdout=StringIO())
+        out = StringIO()
+        call_command("check_habit_stats", "--fix", stdout=out)
+        self.assertIn(f"habit {self.habit.id}: longest_streak 7 != 2", out.getvalue())
+        self.assertIn(f"user {self.user.id}: current_streak 5 != 1", out.getvalue())
+        self.assertEqual(UserStats.objects.get(user=self.user).current_streak, 1)
+        call_command("check_habit_stats", stdout=StringIO())
+
+
+@override_settings(DB_REPLICAS=["replica"])
+class ReplicaRoutingTestCase(TestCase):
+    """
+    Класс для тестирования чтения списка и ленты публичных привычек с реплики и чтения с основной БД после записи.
+    Реплика в тестах — отдельная БД, которая не получает записи основной БД, поэтому по ответу видно, откуда он
+    прочитан.
+    """
+
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        cache.clear()
+        self.user = User.objects.create(email="replica@example.com")
+        User.objects.using("replica").create(id=self.user.id, email=self.user.email)
+        for database in ("default", "replica"):
+            Habit.objects.using(database).create(
+                user_id=self.user.id,
+                place="Gym",
+                time=time(7, 0),
+                action=f"Workout on {database}",
+                duration=timedelta(minutes=1),
+                is_public=True,
+            )
+        self.client: APIClient = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+    def get_actions(self, url: str) -> list[str]:
+        """
+        Возвращает действия привычек первой страницы.
+        :param url: Адрес списка
+        :return: Действия привычек
+        """
+        return [habit["action"] for habit in self.client.get(url).data["results"]]
+
+    def test_list_reads_replica_until_user_writes(self):
+        """
+        Тестирует чтение списка привычек с реплики и с основной БД после записи пользователя.
+        :return:
+        """
+        url = reverse("habit:habit-list")
+        self.assertEqual(self.get_actions(url), ["Workout on replica"])
+
+        data = {
+            "place": "Home",
+            "time": "08:00",
+            "action": "Read",
+            "duration": "00:01:00",
+            "periodicity": 1,
+            "reward": "Tea",
+        }
+        response = self.client.post(url, data)
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED, response.data)
+        self.assertEqual(self.get_actions(url), ["Workout on default", "Read"])
+
+    def test_public_feed_reads_primary_after_change(self):
+        """
+        Тестирует чтение ленты публичных привычек с основной БД после изменения ленты.
+        :return:
+        """
+        url = reverse("habit:habit-public")
+        self.assertEqual(self.get_actions(url), ["Workout on replica"])
+        bump_public_habits_version()
+        self.assertEqual(self.get_actions(url), ["Workout on default"])
+
+    async def test_asgi_handler_keeps_middleware_async(self):
+        """
+        Тестирует обработку запроса через ASGI без переключения в поток на уровне ReplicaStickinessMiddleware и
+        чтение с основной БД после записи через асинхронный обработчик.
+        :return:
+        """
+        with self.settings(DEBUG=True), self.assertNoLogs("django.request", "DEBUG"):
+            ASGIHandler()
+
+        token = await sync_to_async(get_access_token)(self.user)
+        habit = await Habit.objects.aget(user=self.user)
+        self.assertFalse(await sync_to_async(is_sticky)(self.user.id))
+        response = await AsyncClient().patch(
+            reverse("habit:habit-detail", args=[habit.id]),
+            {"action": "Stretch"},
+            content_type="application/json",
+            headers={"Authorization": f"Bearer {token}"},
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(await sync_to_async(is_sticky)(self.user.id))
+
+
+class AsyncViewsTestCase(TestCase):
+    """
+    Класс для тестирования асинхронных представлений (config.urls_async): ответы совпадают с ответами HabitViewSet.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        cache.clear()
+        self.user = User.objects.create(email="async@example.com")
+        self.other_user = User.objects.create(email="other@example.com")
+        pleasant = PleasantHabit.objects.create(user=self.user, place="Home", action="Tea")
+        for number in range(7):
+            Habit.objects.create(
+                user=self.user if number % 2 else self.other_user,
+                place="Gym",
+                time=time(7, number),
+                action=f"Workout {number}",
+                duration=timedelta(minutes=1),
+                related_habit=pleasant if number % 2 else None,
+                is_public=number % 3 == 0,
+            )
+        self.habit = Habit.objects.filter(user=self.user).first()
+        self.client: APIClient = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {get_access_token(self.user)}")
+
+    def get_both(self, path: str, params: dict | None = None) -> tuple:
+        """
+        Выполняет запрос через синхронные и асинхронные маршруты.
+        :param path: Адрес
+        :param params: Параметры запроса
+        :return: Ответы синхронного и асинхронного представлений
+        """
+        with self.settings(ROOT_URLCONF="config.urls"):
+            cache.clear()
+            sync_response = self.client.get(path, params)
+        with self.settings(ROOT_URLCONF="config.urls_async"):
+            cache.clear()
+            async_response = self.client.get(path, params)
+        return sync_response, async_response
+
+    def test_responses_match_viewset(self):
+        """
+        Тестирует совпадение ответов асинхронных представлений с ответами HabitViewSet.
+        :return:
+        """
+        requests: list[tuple[str, dict]] = [
+            ("/api/habit/habits/", {}),
+            ("/api/habit/habits/", {"page": 2, "page_size": 2, "expand": "related_habit"}),
+            ("/api/habit/habits/", {"page": 9}),
+            ("/api/habit/habits/", {"page": 0}),
+            ("/api/habit/habits/", {"page": "first"}),
+            ("/api/habit/habits/", {"page": "last"}),
+            ("/api/habit/habits/", {"page": "last", "page_size": 2}),
+            ("/api/habit/habits/", {"page_size": 100}),
+            (f"/api/habit/habits/{self.habit.id}/", {}),
+            (f"/api/habit/habits/{self.habit.id}/", {"expand": "related_habit"}),
+            (f"/api/habit/habits/{Habit.objects.filter(user=self.other_user).first().id}/", {}),
+            ("/api/habit/habits/public/", {"expand": "related_habit"}),
+        ]
+        for path, params in requests:
+            with self.subTest(path=path, params=params):
+                sync_response, async_response = self.get_both(path, params)
+                self.assertEqual(async_response.status_code, sync_response.status_code)
+                self.assertEqual(async_response.json(), sync_response.json())
+
+        response = self.get_both("/api/habit/habits/public/")[1]
+        with self.settings(ROOT_URLCONF="config.urls_async"):
+            response = self.client.get("/api/habit/habits/public/", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    @override_settings(ROOT_URLCONF="config.urls_async")
+    def test_authentication_and_other_methods(self):
+        """
+        Тестирует отказ без токена, передачу остальных методов HabitViewSet и асинхронную регистрацию.
+        :return:
+        """
+        response = APIClient().get("/api/habit/habits/")
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertIn("detail", response.json())
+
+        response = self.client.patch(f"/api/habit/habits/{self.habit.id}/", {"action": "Stretch"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["action"], "Stretch")
+
+        response = APIClient().post(
+            "/api/user/register/", {"email": "new@example.com", "password": "StrongPassword123"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertTrue(User.objects.get(email="new@example.com").check_password("StrongPassword123"))
+        response = APIClient().post("/api/user/register/", {"email": "new@example.com", "password": "short"})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json().keys(), {"email", "password"})
+
+
+class HabitReminderTestCase(TestCase):
+    """
+    Класс для тестирования отправки напоминаний о привычках.
+    """
+
+    # 07:45 по времени проекта (Asia/Almaty, UTC+5) — за 15 минут до привычки в 08:00
+    now = datetime(2026, 1, 1, 2, 45, tzinfo=UTC)
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.freeze(self.now)
+        self.ledger = ReminderLedger(fakeredis.FakeRedis(), ttl=60)
+        patcher = patch("habit.tasks.get_reminder_ledger", return_value=self.ledger)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create(email="reminder@example.com", telegram_chat_id="100")
+        self.habit = self.create_habit(action="Do yoga")
+
+    def freeze(self, now: datetime) -> None:
+        """
+        Подменяет текущее время.
+        :param now: Текущий момент времени
+        :return:
+        """
+        patcher = patch("django.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def create_habit(self, **fields) -> Habit:
+        """
+        Создаёт привычку на 08:00 по времени проекта.
+        :param fields: Поля привычки
+        :return: Привычка
+        """
+        fields = {"user": self.user, "place": "Home", "time": time(8, 0), "duration": timedelta(minutes=1), **fields}
+        return Habit.objects.create(**fields)
+
+    def test_schedule_is_calculated_on_save(self):
+        """
+        Тестирует расчёт слота напоминания и следующего выполнения при сохранении и изменении времени привычки.
+        :return:
+        """
+        self.assertEqual(self.habit.reminder_slot, 8 * 60)
+        self.assertEqual(self.habit.next_due_at, datetime(2026, 1, 1, 3, 0, tzinfo=UTC))
+        self.habit.time = time(0, 30)
+        self.habit.save(update_fields=["time"])
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.reminder_slot, 30)
+        # 00:30 сегодняшнего дня уже прошло — следующее выполнение переносится на завтра
+        self.assertEqual(self.habit.next_due_at, datetime(2026, 1, 1, 19, 30, tzinfo=UTC))
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_habit_created_after_todays_time_starts_next_period(self, get_client):
+        """
+        Тестирует, что у привычки, созданной после её сегодняшнего времени, первое выполнение — следующий день сетки
+        периодичности, и в дни вне сетки напоминание не отправляется.
+        :return:
+        """
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+        # 10:00 по времени проекта — 08:00 сегодня уже прошло
+        self.freeze(datetime(2026, 1, 1, 5, 0, tzinfo=UTC))
+        habit = self.create_habit(action="Weekly", periodicity=7)
+        self.assertEqual(habit.next_due_at, datetime(2026, 1, 8, 3, 0, tzinfo=UTC))
+
+        for day in range(1, 8):
+            self.freeze(self.now + timedelta(days=day))
+            send_habit_reminders()
+
+        self.assertEqual([habit_id(message) for message in sent if habit_id(message) == habit.id], [habit.id])
+        habit.refresh_from_db()
+        self.assertEqual(habit.next_due_at, datetime(2026, 1, 15, 3, 0, tzinfo=UTC))
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_skipped_reminder_realigns_to_periodicity(self, get_client):
+        """
+        Тестирует, что после напоминания, пропущенного из-за опоздания, следующее напоминание отправляется в день
+        сетки периодичности, а не на следующий день.
+        :return:
+        """
+        self.habit.periodicity = 2
+        self.habit.save()
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+
+        # Тик 01.01 не выполнялся (напоминание опоздало больше REMINDER_MAX_LATENESS), следующее выполнение осталось
+        # в прошлом
+        sent_days = []
+        for day in range(1, 6):
+            self.freeze(self.now + timedelta(days=day))
+            sent.clear()
+            send_habit_reminders()
+            if sent:
+                sent_days.append(day)
+
+        self.assertEqual(sent_days, [2, 4])
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.next_due_at, datetime(2026, 1, 7, 3, 0, tzinfo=UTC))
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_uses_due_slot(self, get_client):
+        """
+        Тестирует, что напоминание отправляется за 15 минут до времени привычки.
+        :return:
+        """
+        sent: list[OutgoingMessage] = []
+        send_many = get_client.return_value.send_many
+        send_many.side_effect = record_messages(sent)
+        send_habit_reminders()
+        self.assertEqual([(habit_id(message), message.chat_id) for message in sent], [(self.habit.id, "100")])
+
+        send_many.reset_mock()
+        self.freeze(self.now + timedelta(minutes=1))
+        self.assertEqual(send_habit_reminders(), 0)
+        send_many.assert_not_called()
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_respects_periodicity(self, get_client):
+        """
+        Тестирует, что напоминание отправляется только в дни выполнения привычки, и сдвиг следующего выполнения.
+        :return:
+        """
+        self.habit.periodicity = 2
+        self.habit.save()
+        get_client.return_value.send_many.side_effect = lambda messages: DeliveryReport(
+            results=[DeliveryResult(message.key, ok=True) for message in messages]
+        )
+
+        sent_days = []
+        for day in range(5):
+            self.freeze(self.now + timedelta(days=day))
+            if send_habit_reminders():
+                sent_days.append(day)
+
+        self.assertEqual(sent_days, [0, 2, 4])
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.next_due_at, datetime(2026, 1, 7, 3, 0, tzinfo=UTC))
+
+    @patch("habit.tasks.aggregate_reminder_results.run", wraps=aggregate_reminder_results.run)
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_fans_out_chunks(self, get_client, aggregate):
+        """
+        Тестирует разбиение привычек тика на пачки и суммирование результатов пачек.
+        :return:
+        """
+        for number in range(4):
+            self.create_habit(action=f"Habit {number}")
+        get_client.return_value.send_many.side_effect = lambda messages: DeliveryReport(
+            results=[DeliveryResult(message.key, ok=habit_id(message) != self.habit.id) for message in messages]
+        )
+
+        with self.settings(REMINDER_CHUNK_SIZE=2):
+            self.assertEqual(send_habit_reminders(), 3)
+
+        self.assertEqual(get_client.return_value.send_many.call_count, 3)
+        self.assertEqual(
+            aggregate.call_args.args[0],
+            [{"sent": 1, "failed": 1}, {"sent": 2, "failed": 0}, {"sent": 1, "failed": 0}],
+        )
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_query_count(self, get_client):
+        """
+        Тестирует, что тик выполняет постоянное количество запросов независимо от числа привычек и пропускает
+        пользователей без chat id.
+        :return:
+        """
+        silent_user = User.objects.create(email="silent@example.com")
+        for number in range(10):
+            self.create_habit(user=self.user if number % 2 else silent_user, action=f"Habit {number}")
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+
+        # Запрос часовых поясов, запрос id привычек группы поясов, запрос строк пачки, сохранение сообщений в очередь,
+        # сохранение результатов отправки и сдвиг следующего выполнения
+        with self.assertNumQueries(6):
+            send_habit_reminders()
+
+        self.assertEqual(len(sent), 6)
+        self.assertEqual({message.chat_id for message in sent}, {"100"})
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_groups_timezones_by_offset(self, get_client):
+        """
+        Тестирует, что пользователи из поясов с одинаковым смещением обрабатываются одним запросом, а время привычки
+        трактуется в часовом поясе пользователя.
+        :return:
+        """
+        tashkent = User.objects.create(email="tashkent@example.com", telegram_chat_id="200", timezone="Asia/Tashkent")
+        berlin = User.objects.create(email="berlin@example.com", telegram_chat_id="300", timezone="Europe/Berlin")
+        self.create_habit(user=tashkent, action="Tashkent")
+        self.create_habit(user=berlin, action="Berlin")
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+
+        # Almaty и Tashkent (UTC+5) — одна группа, Berlin (UTC+1) — вторая
+        with self.assertNumQueries(7):
+            send_habit_reminders()
+        self.assertEqual(sorted(message.chat_id for message in sent), ["100", "200"])
+
+        sent.clear()
+        self.freeze(datetime(2026, 1, 1, 6, 45, tzinfo=UTC))
+        send_habit_reminders()
+        self.assertEqual([message.chat_id for message in sent], ["300"])
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_send_habit_reminders_across_dst_transition(self, get_client):
+        """
+        Тестирует, что напоминание приходит в 07:45 по местному времени до и после перехода на летнее время.
+        :return:
+        """
+        # 28.03.2026 в Берлине действует CET (UTC+1), с 29.03.2026 — CEST (UTC+2)
+        self.freeze(datetime(2026, 3, 28, 5, 0, tzinfo=UTC))
+        user = User.objects.create(email="dst@example.com", telegram_chat_id="300", timezone="Europe/Berlin")
+        habit = self.create_habit(user=user, action="DST")
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+
+        for now in (
+            datetime(2026, 3, 28, 5, 45, tzinfo=UTC),  # 06:45 CET — напоминание ещё не нужно
+            datetime(2026, 3, 28, 6, 45, tzinfo=UTC),  # 07:45 CET
+            datetime(2026, 3, 29, 5, 45, tzinfo=UTC),  # 07:45 CEST
+            datetime(2026, 3, 29, 6, 45, tzinfo=UTC),  # 08:45 CEST — напоминание уже отправлено
+        ):
+            self.freeze(now)
+            send_habit_reminders()
+
+        self.assertEqual([habit_id(message) for message in sent], [habit.id, habit.id])
+        habit.refresh_from_db()
+        self.assertEqual(habit.next_due_at, datetime(2026, 3, 30, 6, 0, tzinfo=UTC))
+
+    def test_catch_up_window_across_dst_fall_back(self):
+        """
+        Тестирует, что окно догоняющего тика, в котором часы переводятся назад, делится на диапазоны слотов до и после
+        перевода, а не трактуется как переход через полночь.
+        :return:
+        """
+        # 25.10.2026 в 03:00 CEST (01:00 UTC) часы в Берлине переводятся на 02:00 CET
+        self.freeze(datetime(2026, 10, 24, 0, 0, tzinfo=UTC))
+        user = User.objects.create(email="dst@example.com", telegram_chat_id="300", timezone="Europe/Berlin")
+        in_window = self.create_habit(user=user, time=time(2, 55), action="In window")
+        self.create_habit(user=user, time=time(10, 0), action="Out of window")
+
+        start = datetime(2026, 10, 25, 0, 51, tzinfo=UTC)  # 02:51 CEST
+        end = datetime(2026, 10, 25, 1, 5, tzinfo=UTC)  # 02:05 CET
+        self.assertEqual(
+            group_by_slot_range(start, end, [user.timezone]),
+            {((2 * 60 + 51, 2 * 60 + 59), (2 * 60, 2 * 60 + 5)): ["Europe/Berlin"]},
+        )
+        self.assertEqual(list(due_habit_ids(start, end)), [in_window.id])
+
+    def test_timezone_change_refreshes_schedule(self):
+        """
+        Тестирует пересчёт следующего выполнения привычек после смены часового пояса пользователя.
+        :return:
+        """
+        user = User.objects.get(pk=self.user.pk)
+        user.timezone = "Europe/Berlin"
+        user.save()
+        self.habit.refresh_from_db()
+        self.assertEqual(self.habit.next_due_at, datetime(2026, 1, 1, 7, 0, tzinfo=UTC))
+
+    def test_ledger_claims_reminder_once(self):
+        """
+        Тестирует, что напоминание отмечается в журнале доставки только один раз и запись имеет TTL.
+        :return:
+        """
+        occurrence = datetime(2026, 1, 1, 3, 0, tzinfo=UTC)
+        self.assertEqual(self.ledger.claim([(1, occurrence), (2, occurrence)]), [1, 2])
+        self.assertEqual(self.ledger.claim([(2, occurrence), (3, occurrence)]), [3])
+        self.assertEqual(self.ledger.claim([(1, occurrence + timedelta(days=1))]), [1])
+        self.assertEqual(self.ledger.client.ttl(self.ledger.key(1, occurrence)), 60)
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_retried_chunk_does_not_resend(self, get_client):
+        """
+        Тестирует, что повтор задачи пачки после сбоя не отправляет напоминание повторно.
+        :return:
+        """
+        occurrence = datetime(2026, 1, 1, 3, 0, tzinfo=UTC).isoformat()
+        send_many = get_client.return_value.send_many
+        send_many.side_effect = ConnectionError("worker lost")
+        with self.assertRaises(ConnectionError):
+            send_reminder_chunk([self.habit.id], occurrence)
+
+        sent: list[OutgoingMessage] = []
+        send_many.side_effect = record_messages(sent)
+        send_reminder_chunk([self.habit.id], occurrence)
+        self.assertEqual(sent, [])
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_drain_does_not_resend_chunk_in_flight(self, get_client):
+        """
+        Тестирует, что тик очереди исходящих сообщений, запущенный во время отправки пачки напоминаний, не отправляет
+        её сообщения повторно.
+        :return:
+        """
+        sent: list[OutgoingMessage] = []
+        record = record_messages(sent)
+        drained: list[dict[str, int]] = []
+
+        def send_many(messages):
+            get_client.return_value.send_many.side_effect = record
+            self.freeze(self.now + timedelta(minutes=1))
+            drained.append(drain_outbound_messages())
+            return record(messages)
+
+        get_client.return_value.send_many.side_effect = send_many
+        # Значение по умолчанию next_attempt_at вычисляется настоящим timezone.now, а не подменённым
+        with patch.object(OutboundMessage._meta.get_field("next_attempt_at"), "default", lambda: self.now):
+            send_habit_reminders()
+        self.assertEqual(drained, [{"sent": 0, "failed": 0}])
+        self.assertEqual([habit_id(message) for message in sent], [self.habit.id])
+        self.assertEqual(OutboundMessage.objects.get().status, OutboundMessage.Status.SENT)
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_delayed_tick_catches_up_missed_minutes(self, get_client):
+        """
+        Тестирует, что задержанный тик отправляет напоминания за пропущенные минуты.
+        :return:
+        """
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+        self.freeze(self.now - timedelta(minutes=10))
+        send_habit_reminders()
+        self.assertEqual(sent, [])
+
+        # Тики с 07:36 до 07:49 по времени проекта пропущены
+        self.freeze(self.now + timedelta(minutes=5))
+        send_habit_reminders()
+        self.assertEqual([habit_id(message) for message in sent], [self.habit.id])
+
+    @patch("habit.outbox.get_telegram_client")
+    def test_too_late_reminder_is_skipped(self, get_client):
+        """
+        Тестирует, что напоминание, опоздавшее больше чем на REMINDER_MAX_LATENESS минут, пропускается, а на следующий
+        день отправляется как обычно.
+        :return:
+        """
+        sent: list[OutgoingMessage] = []
+        get_client.return_value.send_many.side_effect = record_messages(sent)
+        self.freeze(self.now - timedelta(minutes=10))
+        send_habit_reminders()
+
+        with self.settings(REMINDER_MAX_LATENESS=30):
+            self.freeze(self.now + timedelta(minutes=40))
+            send_habit_reminders()
+            self.assertEqual(sent, [])
+
+            self.freeze(self.now + timedelta(days=1))
+            send_habit_reminders()
+        self.assertEqual([habit_id(message) for message in sent], [self.habit.id])
+
+
+class OutboundMessageTestCase(TestCase):
+    """
+    Класс для тестирования очереди исходящих сообщений.
+    """
+
+    now = datetime(2026, 1, 1, 2, 45, tzinfo=UTC)
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.freeze(self.now)
+        patcher = patch("habit.outbox.get_telegram_client")
+        self.send_many = patcher.start().return_value.send_many
+        self.addCleanup(patcher.stop)
+        self.message = OutboundMessage.objects.create(chat_id="100", text="Do yoga", next_attempt_at=self.now)
+
+    def freeze(self, now: datetime) -> None:
+        """
+        Подменяет текущее время.
+        :param now: Текущий момент времени
+        :return:
+        """
+        patcher = patch("django.utils.timezone.now", return_value=now)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def fail_with(self, error: str, retry_after: float | None = None) -> None:
+        """
+        Настраивает заглушку отправки на ошибку.
+        :param error: Описание ошибки
+        :param retry_after: Через сколько секунд Telegram разрешает повторить отправку
+        :return:
+        """
+        self.send_many.side_effect = lambda messages: DeliveryReport(
+            results=[
+                DeliveryResult(message.key, ok=False, error=error, retry_after=retry_after) for message in messages
+            ]
+        )
+
+    def test_failed_message_is_retried_with_backoff(self):
+        """
+        Тестирует экспоненциальную задержку повторной отправки и учёт retry_after из ответа Telegram.
+        :return:
+        """
+        self.fail_with("Bad Gateway")
+        with self.settings(OUTBOUND_RETRY_BASE_DELAY=10):
+            drain_outbound_messages()
+            self.message.refresh_from_db()
+            self.assertEqual(self.message.attempts, 1)
+            self.assertEqual(self.message.last_error, "Bad Gateway")
+            self.assertEqual(self.message.next_attempt_at, self.now + timedelta(seconds=10))
+
+            # До следующей попытки сообщение не отправляется
+            self.assertEqual(drain_outbound_messages(), {"sent": 0, "failed": 0})
+
+            self.freeze(self.message.next_attempt_at)
+            self.fail_with("Too Many Requests", retry_after=60)
+            drain_outbound_messages()
+            self.message.refresh_from_db()
+            self.assertEqual(self.message.attempts, 2)
+            self.assertEqual(self.message.next_attempt_at, self.now + timedelta(seconds=70))
+
+        self.freeze(self.message.next_attempt_at)
+        sent: list[OutgoingMessage] = []
+        self.send_many.side_effect = record_messages(sent)
+        self.assertEqual(drain_outbound_messages(), {"sent": 1, "failed": 0})
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboundMessage.Status.SENT)
+        self.assertEqual(self.message.sent_at, self.now + timedelta(seconds=70))
+        self.assertEqual([message.text for message in sent], ["Do yoga"])
+
+    def test_message_becomes_dead_after_max_attempts(self):
+        """
+        Тестирует перевод сообщения в очередь недоставленных после OUTBOUND_MAX_ATTEMPTS попыток.
+        :return:
+        """
+        self.fail_with("Forbidden: bot was blocked by the user")
+        with self.settings(OUTBOUND_MAX_ATTEMPTS=3):
+            for attempt in range(3):
+                self.freeze(self.now + timedelta(hours=attempt))
+                drain_outbound_messages()
+
+        self.message.refresh_from_db()
+        self.assertEqual(self.message.status, OutboundMessage.Status.DEAD)
+        self.assertEqual(self.message.attempts, 3)
+        self.freeze(self.now + timedelta(days=1))
+        self.assertEqual(drain_outbound_messages(), {"sent": 0, "failed": 0})
+        self.assertEqual(OutboundMessage.objects.stats()["dead"], 1)
+
+    def test_stats_and_purge(self):
+        """
+        Тестирует показатели очереди и удаление старых отправленных сообщений.
+        :return:
+        """
+        self.send_many.side_effect = record_messages([])
+        OutboundMessage.objects.create(chat_id="200", text="Later", next_attempt_at=self.now + timedelta(hours=1))
+        stats = OutboundMessage.objects.stats()
+        self.assertEqual((stats["backlog"], stats["due"], stats["sent"]), (2, 1, 0))
+
+        drain_outbound_messages()
+        stats = OutboundMessage.objects.stats()
+        self.assertEqual((stats["backlog"], stats["due"], stats["sent"]), (1, 0, 1))
+        self.assertEqual(stats["throughput_per_minute"], 0.2)
+
+        self.freeze(self.now + timedelta(days=8))
+        self.assertEqual(purge_outbound_messages(), 1)
+        self.assertFalse(OutboundMessage.objects.filter(id=self.message.id).exists())
+
+
+class HabitQueryPlanTestCase(TestCase):
+    """
+    Класс для тестирования планов запросов привычек.
+    """
+
+    def test_queries_use_indexes(self):
+        """
+        Тестирует, что запросы эндпоинтов и тика напоминаний на наполненной БД читают таблицу привычек по индексу.
+        :return:
+        """
+        out = StringIO()
+        call_command("explain_queries", habits=5000, users=20, stdout=out)
+        self.assertNotIn("SEQ SCAN", out.getvalue())
+
+
+class TelegramStubHandler(BaseHTTPRequestHandler):
+    """
+    Заглушка Telegram Bot API: принимает sendMessage и отвечает 429 для чата "429".
+    """
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        data = parse_qs(self.rfile.read(length).decode())
+        chat_id = data["chat_id"][0]
+        self.server.received.append((chat_id, data["text"][0]))  # type: ignore[attr-defined]
+        if chat_id == "429":
+            status_code = 429
+            body = {"ok": False, "description": "Too Many Requests", "parameters": {"retry_after": 0.01}}
+        else:
+            status_code, body = 200, {"ok": True}
+        payload = json.dumps(body).encode()
+        self.send_response(status_code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class TelegramClientTestCase(SimpleTestCase):
+    """
+    Класс для тестирования клиента Telegram на локальной заглушке Bot API.
+    """
+
+    def setUp(self):
+        """
+        Запускает заглушку Bot API.
+        :return:
+        """
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), TelegramStubHandler)
+        self.server.received = []  # type: ignore[attr-defined]
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        self.api_url = f"http://127.0.0.1:{self.server.server_port}"
+
+    def test_send_many_reports_results(self):
+        """
+        Тестирует параллельную отправку сообщений и отчёт об отправке.
+        :return:
+        """
+        client = TelegramClient(token="test", api_url=self.api_url, concurrency=4, global_rate=1000, chat_rate=1000)
+        messages = [OutgoingMessage(key=number, chat_id=str(number), text="hi") for number in range(20)]
+        messages.append(OutgoingMessage(key="limited", chat_id="429", text="hi"))
+
+        report = client.send_many(messages)
+
+        self.assertEqual((report.sent, report.failed), (20, 1))
+        self.assertEqual(len(self.server.received), 21)  # type: ignore[attr-defined]
+        failed = next(result for result in report.results if not result.ok)
+        self.assertEqual((failed.key, failed.error, failed.retry_after), ("limited", "Too Many Requests", 0.01))
+
+    def test_send_respects_chat_rate(self):
+        """
+        Тестирует ограничение частоты отправки в один чат.
+        :return:
+        """
+        client = TelegramClient(token="test", api_url=self.api_url, concurrency=4, global_rate=1000, chat_rate=10)
+        started = time_module.monotonic()
+        report = client.send_many([OutgoingMessage(key=number, chat_id="1", text="hi") for number in range(3)])
+        self.assertEqual(report.sent, 3)
+        self.assertGreaterEqual(time_module.monotonic() - started, 0.2)
@@ -3,12 +3,13 @@ from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
 from .apps import HabitConfig
-from .views import HabitViewSet
+from .views import HabitViewSet, PleasantHabitViewSet
 
 app_name = HabitConfig.name
 
 router = DefaultRouter()
 router.register(r"habits", HabitViewSet, basename="habit")
+router.register(r"pleasant-habits", PleasantHabitViewSet, basename="pleasant-habit")
 
 urlpatterns = [
     path("", include(router.urls)),
@@ -1,11 +1,41 @@
+import json
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Prefetch
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.pagination import BasePagination
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import ModelViewSet
 
-from .models import Habit
-from .paginators import HabitPagination
-from .serializers import HabitSerializer
+from config.routers import use_replica
+
+from .cache import PUBLIC_HABITS_STICKY_KEY, get_cached_page, get_etag, get_public_habits_version, set_cached_page
+from .models import Habit, PleasantHabit, UserStats
+from .paginators import HabitCursorPagination, HabitPagination
+from .serializers import (
+    EmbeddedHabitSerializer,
+    HabitCompletionSerializer,
+    HabitExpandedSerializer,
+    HabitListSerializer,
+    HabitSerializer,
+    PleasantHabitSerializer,
+    PleasantHabitWithHabitsSerializer,
+    PublicHabitSerializer,
+    UserStatsSerializer,
+    to_pk,
+)
+from .tasks import schedule_stats_refresh
 
 # Так как нужно реализовать полный набор CRUD-действий (создание, список, редактирование, удаление, просмотр) —
 # лучше использовать ModelViewSet.
@@ -16,6 +46,33 @@ from .serializers import HabitSerializer
 # позволяет использовать router для удобной маршрутизации.
 
 
+def get_public_page(request: Request, paginator: BasePagination, expand_related_habit: bool) -> tuple[object, str]:
+    """
+    Возвращает страницу ленты публичных привычек и её ETag. Лента одинакова для всех пользователей — страницы
+    кешируются до изменения любой публичной привычки. Размер страницы зависит от прав пользователя, поэтому входит в
+    ключ кеша.
+    :param request: Запрос
+    :param paginator: Пагинатор ленты
+    :param expand_related_habit: Встраивать место и действие связанной приятной привычки
+    :return: Данные страницы и ETag
+    """
+    url = f"{request.build_absolute_uri()}#{paginator.get_page_size(request)}"
+    version = get_public_habits_version()
+    cached = get_cached_page(version, url)
+    if cached is None:
+        habits = (
+            Habit.objects.filter(is_public=True)
+            .order_by("created_at", "id")
+            .values(*PublicHabitSerializer.get_values(expand_related_habit))
+        )
+        with use_replica(PUBLIC_HABITS_STICKY_KEY, request.user.pk):
+            page = paginator.paginate_queryset(habits, request)
+        data = paginator.get_paginated_response(PublicHabitSerializer(page, many=True).data).data
+        cached = (data, get_etag(data))
+        set_cached_page(version, url, *cached)
+    return cached
+
+
 class HabitViewSet(ModelViewSet):
     """
     CRUD для привычек текущего пользователя.
@@ -26,18 +83,66 @@ class HabitViewSet(ModelViewSet):
     GET /habits/{id}/ — просмотр,
     PUT /habits/{id}/ — полное обновление,
     PATCH /habits/{id}/ — частичное обновление,
-    DELETE /habits/{id}/ — удаление.
+    DELETE /habits/{id}/ — удаление,
+    POST /habits/bulk/ — массовое создание, обновление и удаление,
+    GET /habits/changes/?since= — изменения и удаления после заданного момента,
+    POST /habits/{id}/complete/ — отметка о выполнении,
+    GET /habits/stats/ — статистика выполнения всех привычек.
     """
 
     serializer_class = HabitSerializer
     permission_classes = [IsAuthenticated]
     pagination_class = HabitPagination
+    # Пагинация отдельных действий: лента публичных привычек листается курсором, без COUNT(*) и OFFSET
+    action_pagination_classes = {"public": HabitCursorPagination}
+    # Сериализаторы списков: только для чтения, работают со строками QuerySet.values()
+    action_serializer_classes = {"list": HabitListSerializer, "public": PublicHabitSerializer}
+
+    @property
+    def paginator(self):
+        """
+        Возвращает пагинатор текущего действия.
+        """
+        if not hasattr(self, "_paginator"):
+            pagination_class = self.action_pagination_classes.get(self.action, self.pagination_class)
+            self._paginator = pagination_class() if pagination_class is not None else None
+        return self._paginator
+
+    @property
+    def expand_related_habit(self) -> bool:
+        """
+        Признак запроса со встроенной связанной приятной привычкой (?expand=related_habit).
+        """
+        expand = self.request.query_params.get("expand", "").split(",")
+        return self.request.method == "GET" and "related_habit" in expand
+
+    def get_serializer_class(self):
+        """
+        Возвращает сериализатор текущего действия.
+        """
+        if self.action == "retrieve" and self.expand_related_habit:
+            return HabitExpandedSerializer
+        return self.action_serializer_classes.get(self.action, self.serializer_class)
 
     def get_queryset(self):
         """
-        Возвращает queryset привычек, принадлежащих текущему пользователю.
+        Возвращает queryset привычек, принадлежащих текущему пользователю. Для списка возвращаются только строки
+        с полями HabitListSerializer. Связанная приятная привычка (?expand=related_habit) выбирается тем же запросом.
         """
-        return Habit.objects.filter(user=self.request.user).order_by("created_at")
+        habits = Habit.objects.filter(user=self.request.user).order_by("created_at", "id")
+        if self.action == "list":
+            return habits.values(*HabitListSerializer.get_values(self.expand_related_habit))
+        if self.expand_related_habit:
+            return habits.select_related("related_habit")
+        return habits
+
+    def list(self, request, *args, **kwargs):
+        """
+        Возвращает список привычек текущего пользователя. Список читается с реплики, если пользователь недавно не
+        изменял данные.
+        """
+        with use_replica(request.user.pk):
+            return super().list(request, *args, **kwargs)
 
     def perform_create(self, serializer):
         """
@@ -45,6 +150,175 @@ class HabitViewSet(ModelViewSet):
         """
         serializer.save(user=self.request.user)
 
+    @action(detail=False, methods=["post"], permission_classes=[IsAuthenticated])
+    def bulk(self, request):
+        """
+        Создаёт, обновляет и удаляет привычки текущего пользователя одним запросом.
+        Все элементы валидируются за один проход, связанные приятные привычки загружаются одним запросом. Изменения
+        сохраняются в одной транзакции через bulk_create и bulk_update только если все элементы валидны, иначе
+        возвращаются ошибки по каждому элементу ({} — элемент валиден). id в update и в delete не должны повторяться,
+        и одна привычка не может быть одновременно обновлена и удалена.
+
+        Эндпоинт:
+        POST /habits/bulk/
+        {"create": [{...}], "update": [{"id": 1, ...}], "delete": [2, 3]}
+        """
+        data = request.data if isinstance(request.data, dict) else {}
+        max_length = settings.HABIT_BULK_MAX_ITEMS
+        context = self.get_serializer_context()
+        update_data = data.get("update", [])
+        delete_ids = data.get("delete", [])
+        if not isinstance(update_data, list) or not isinstance(delete_ids, list):
+            return Response(
+                {"non_field_errors": ["Ожидается список в update и delete."]}, status=status.HTTP_400_BAD_REQUEST
+            )
+
+        habits = self.get_queryset().in_bulk(
+            [to_pk(item.get("id")) for item in update_data if isinstance(item, dict)]
+            + [to_pk(habit_id) for habit_id in delete_ids]
+        )
+        for habit in habits.values():
+            habit.user = request.user  # Пользователь нужен для пересчёта расписания, без повторной загрузки
+        create = HabitSerializer(data=data.get("create", []), many=True, max_length=max_length, context=context)
+        update = HabitSerializer(
+            habits,
+            data=update_data,
+            many=True,
+            partial=True,
+            max_length=max_length,
+            context=context,
+        )
+        errors = {}
+        if not create.is_valid():
+            errors["create"] = create.errors
+        if not update.is_valid():
+            errors["update"] = update.errors
+        if len(delete_ids) > max_length:
+            errors["delete"] = [f"Не более {max_length} элементов."]
+        else:
+            update_ids = {to_pk(item.get("id")) for item in update_data if isinstance(item, dict)}
+            delete_counts = Counter(to_pk(habit_id) for habit_id in delete_ids)
+            delete_errors: list[dict | str] = []
+            for habit_id in map(to_pk, delete_ids):
+                if habit_id not in habits:
+                    delete_errors.append("Привычка не найдена.")
+                elif delete_counts[habit_id] > 1:
+                    delete_errors.append("Привычка повторяется в списке.")
+                elif habit_id in update_ids:
+                    delete_errors.append("Привычка обновляется в том же запросе.")
+                else:
+                    delete_errors.append({})
+            if any(delete_errors):
+                errors["delete"] = delete_errors
+        if errors:
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        with transaction.atomic():
+            created = create.save(user=request.user)
+            updated = update.save()
+            deleted = [habits[to_pk(habit_id)] for habit_id in delete_ids]
+            Habit.objects.filter(id__in=[habit.id for habit in deleted]).delete()
+            if deleted:
+                schedule_stats_refresh(request.user.pk)
+        return Response(
+            {
+                "created": HabitSerializer(created, many=True).data,
+                "updated": HabitSerializer(updated, many=True).data,
+                "deleted": [habit.id for habit in deleted],
+            }
+        )
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def changes(self, request):
+        """
+        Возвращает привычки текущего пользователя, изменённые или удалённые после момента since, потоком NDJSON: по
+        строке на привычку (удалённая — {"id": ..., "deleted_at": ...}) и последняя строка {"since": ...} — момент,
+        который нужно передать в следующем запросе. Без since возвращаются все неудалённые привычки.
+        Время изменения рассчитывается до фиксации транзакции, поэтому изменение может стать видимым уже после запроса
+        с более поздним моментом. Возвращаемый since отстаёт от момента запроса на HABIT_CHANGES_OVERLAP_SECONDS:
+        такие изменения попадут в следующий ответ, а привычки из перекрытия окон придут повторно — клиент объединяет
+        их по id и updated_at.
+        Если since старше срока хранения отметок об удалении (HABIT_TOMBSTONE_RETENTION_DAYS), возвращается 410 —
+        клиенту нужна полная синхронизация.
+
+        Эндпоинт:
+        GET /habits/changes/?since=2026-01-01T00:00:00Z
+        """
+        until = timezone.now()
+        watermark = until - timedelta(seconds=settings.HABIT_CHANGES_OVERLAP_SECONDS)
+        habits = Habit.all_objects.filter(user=request.user, updated_at__lte=until)
+        since = request.query_params.get("since")
+        if since is None:
+            habits = habits.filter(deleted_at__isnull=True)
+        else:
+            since = parse_datetime(since)
+            if since is None or timezone.is_naive(since):
+                return Response(
+                    {"since": ["Ожидается дата и время в формате ISO 8601 с часовым поясом."]},
+                    status=status.HTTP_400_BAD_REQUEST,
+                )
+            if since < until - timedelta(days=settings.HABIT_TOMBSTONE_RETENTION_DAYS):
+                return Response(
+                    {"since": ["Изменения за этот период не хранятся, нужна полная синхронизация."]},
+                    status=status.HTTP_410_GONE,
+                )
+            habits = habits.filter(updated_at__gt=since)
+
+        serializer = HabitListSerializer()
+        rows = habits.order_by("updated_at", "id").values(*HabitListSerializer.fields, "deleted_at")
+
+        def stream():
+            for row in rows.iterator(chunk_size=1000):
+                if row["deleted_at"] is None:
+                    del row["deleted_at"]
+                    item = serializer.to_representation(row)
+                else:
+                    item = {"id": row["id"], "deleted_at": serializer.format_datetime(row["deleted_at"])}
+                yield json.dumps(item, cls=JSONEncoder, ensure_ascii=False) + "\n"
+            yield json.dumps({"since": serializer.format_datetime(watermark)}) + "\n"
+
+        return StreamingHttpResponse(stream(), content_type="application/x-ndjson")
+
+    @action(detail=True, methods=["post"], permission_classes=[IsAuthenticated])
+    def complete(self, request, pk=None):
+        """
+        Отмечает выполнение привычки и возвращает её статистику: количество отметок, текущую и лучшую серию, долю
+        выполненных периодов. Серии считаются в периодах по periodicity дней и обновляются при отметке без чтения
+        истории выполнений. Повторная отметка за тот же день возвращает 200 без изменения статистики.
+
+        Эндпоинт:
+        POST /habits/{id}/complete/
+        {"date": "2026-01-01"} (необязательно, по умолчанию — текущий день пользователя)
+        """
+        habit = self.get_object()
+        context = {
+            **self.get_serializer_context(),
+            "habit": habit,
+            "today": timezone.localdate(timezone=request.user.timezone),
+        }
+        serializer = HabitCompletionSerializer(data=request.data, context=context)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data, status=status.HTTP_201_CREATED if serializer.created else status.HTTP_200_OK)
+
+    @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
+    def stats(self, request):
+        """
+        Возвращает статистику текущего пользователя по всем привычкам: количество привычек и отметок о выполнении,
+        текущую и лучшую серию дней, недельную цель, выполнения текущей недели и долю выполнений прошлой недели.
+        Статистика обновляется при изменении привычек и отметках о выполнении и читается одной строкой. При первом
+        запросе она рассчитывается по всей истории пользователя.
+
+        Эндпоинт:
+        GET /habits/stats/
+        """
+        stats = UserStats.objects.filter(user_id=request.user.pk).first()
+        if stats is None:
+            with transaction.atomic():
+                stats, _ = UserStats.objects.get_locked(request.user.pk)
+        context = {**self.get_serializer_context(), "today": timezone.localdate(timezone=request.user.timezone)}
+        return Response(UserStatsSerializer(stats, context=context).data)
+
     @action(detail=False, methods=["get"], permission_classes=[IsAuthenticated])
     def public(self, request):
         """
@@ -54,12 +328,64 @@ class HabitViewSet(ModelViewSet):
         автоматически даст новый маршрут используя DefaultRouter.
 
         Эндпоинт:
-        GET /habits/public/
-        """
-        habits = Habit.objects.filter(is_public=True).order_by("created_at")
-        page = self.paginate_queryset(habits)
-        if page is not None:
-            serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
-        serializer = self.get_serializer(habits, many=True)
-        return Response(serializer.data)
+        GET /habits/public/ (?expand=related_habit — с местом и действием связанной приятной привычки)
+        """
+        data, etag = get_public_page(request, self.paginator, self.expand_related_habit)
+        if etag in request.headers.get("If-None-Match", ""):
+            return Response(status=status.HTTP_304_NOT_MODIFIED, headers={"ETag": etag})
+        return Response(data, headers={"ETag": etag})
+
+
+class PleasantHabitViewSet(ModelViewSet):
+    """
+    CRUD для приятных привычек текущего пользователя.
+    Параметр ?embed=habits встраивает в каждую приятную привычку связанные полезные привычки — они загружаются одним
+    запросом для всей страницы.
+
+    Эндпоинты:
+    GET /pleasant-habits/ — список приятных привычек текущего пользователя (с курсорной пагинацией),
+    POST /pleasant-habits/ — создание,
+    GET /pleasant-habits/{id}/ — просмотр,
+    PUT /pleasant-habits/{id}/ — полное обновление,
+    PATCH /pleasant-habits/{id}/ — частичное обновление,
+    DELETE /pleasant-habits/{id}/ — удаление.
+    """
+
+    serializer_class = PleasantHabitSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = HabitCursorPagination
+
+    @property
+    def embed_habits(self) -> bool:
+        """
+        Признак запроса со встроенными полезными привычками (?embed=habits).
+        """
+        return self.request.method == "GET" and "habits" in self.request.query_params.get("embed", "").split(",")
+
+    def get_serializer_class(self):
+        """
+        Возвращает сериализатор приятной привычки, со встроенными полезными привычками для ?embed=habits.
+        """
+        return PleasantHabitWithHabitsSerializer if self.embed_habits else self.serializer_class
+
+    def get_queryset(self):
+        """
+        Возвращает queryset приятных привычек, принадлежащих текущему пользователю.
+        """
+        pleasant_habits = PleasantHabit.objects.filter(user=self.request.user).order_by("created_at", "id")
+        if self.embed_habits:
+            return pleasant_habits.prefetch_related(
+                Prefetch(
+                    "habits",
+                    queryset=Habit.objects.order_by("created_at", "id").only(
+                        "related_habit", *EmbeddedHabitSerializer.Meta.fields
+                    ),
+                )
+            )
+        return pleasant_habits
+
+    def perform_create(self, serializer):
+        """
+        Автоматически устанавливает пользователя при создании приятной привычки.
+        """
+        serializer.save(user=self.request.user)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class UserConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "user"
+
+    def ready(self):
+        """
+        Подключает обработчики сигналов приложения.
+        """
+        from user import signals  # noqa: F401
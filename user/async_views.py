@@ -0,0 +1,89 @@
+"""
+Асинхронные представления для запуска через ASGI (config.urls_async). Представления не занимают поток на время
+ожидания БД, кеша и хеширования паролей, поэтому один процесс обслуживает много одновременных запросов.
+"""
+
+from collections.abc import Awaitable, Callable
+from functools import wraps
+
+from django.http import HttpRequest, HttpResponse, JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from asgiref.sync import sync_to_async
+from rest_framework import status
+from rest_framework.exceptions import APIException, ValidationError
+from rest_framework.parsers import FormParser, JSONParser, MultiPartParser
+from rest_framework.request import Request
+from rest_framework.utils.encoders import JSONEncoder
+
+from user.authentication import aauthenticate
+from user.models import User
+from user.serializer import RegisterSerializer
+
+AsyncView = Callable[..., Awaitable[HttpResponse]]
+
+
+def api_response(data, status: int = status.HTTP_200_OK, headers: dict | None = None) -> JsonResponse:
+    """
+    Возвращает JSON-ответ в том же виде, что и JSONRenderer DRF.
+    :param data: Данные ответа
+    :param status: Код ответа
+    :param headers: Заголовки ответа
+    :return: Ответ
+    """
+    return JsonResponse(
+        data,
+        encoder=JSONEncoder,
+        safe=False,
+        status=status,
+        headers=headers,
+        json_dumps_params={"ensure_ascii": False, "separators": (",", ":")},
+    )
+
+
+def async_api_view(view: AsyncView | None = None, *, authenticated: bool = True):
+    """
+    Декоратор асинхронного представления API: аутентифицирует запрос по JWT и превращает исключения DRF в ответы с
+    тем же телом и кодом, что и у представлений DRF. Как и APIView, представление освобождается от проверки CSRF.
+    :param view: Асинхронное представление
+    :param authenticated: Требовать аутентификацию (пользователь запроса доступен в request.user)
+    :return: Декорированное представление
+    """
+
+    def decorator(view: AsyncView) -> AsyncView:
+        @wraps(view)
+        async def wrapper(request: HttpRequest, *args, **kwargs) -> HttpResponse:
+            try:
+                if authenticated:
+                    request.user = await aauthenticate(request)
+                return await view(request, *args, **kwargs)
+            except APIException as exc:
+                data = exc.detail if isinstance(exc.detail, (list, dict)) else {"detail": exc.detail}
+                return api_response(data, status=exc.status_code)
+
+        return csrf_exempt(wrapper)
+
+    return decorator(view) if view is not None else decorator
+
+
+@require_POST
+@async_api_view(authenticated=False)
+async def register(request: HttpRequest) -> HttpResponse:
+    """
+    Асинхронная регистрация нового пользователя — то же, что RegisterAPIView. Пароль хешируется в пуле потоков
+    хеширования паролей, не блокируя цикл событий.
+
+    Эндпоинт:
+    POST /api/user/register/
+    """
+    # Тело запроса разбирается парсерами DRF, как в RegisterAPIView
+    data = Request(request, parsers=[JSONParser(), FormParser(), MultiPartParser()]).data
+    serializer = RegisterSerializer(data=data)
+    # Проверка уникальности email обращается к БД
+    if not await sync_to_async(serializer.is_valid)():
+        raise ValidationError(serializer.errors)
+    user = await User.objects.acreate_user(**serializer.validated_data)
+    return api_response(
+        {"message": f"Регистрация пользователя {user.email} прошла успешно."}, status=status.HTTP_201_CREATED
+    )
@@ -0,0 +1,71 @@
+from typing import cast
+
+from django.conf import settings
+from django.http import HttpRequest
+
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from user.models import User
+
+
+class ClaimsJWTAuthentication(JWTAuthentication):
+    """
+    Аутентификация по JWT без запроса пользователя к БД: пользователь создаётся по подписанным утверждениям токена
+    (id, is_active, token_version), остальные его поля загружаются из кеша пользователей процесса только при обращении
+    к ним. Большинству эндпоинтов привычек нужен лишь id пользователя.
+
+    Токен отзывается увеличением версии токенов пользователя (смена пароля, деактивация): обновить его уже нельзя, а
+    процесс, в кеше которого есть актуальная запись пользователя, отклоняет его сразу. Остальные процессы принимают
+    такой токен до истечения срока его действия (ACCESS_TOKEN_LIFETIME).
+    Токены без утверждения token_version (выданные до включения режима) проверяются по БД, как в JWTAuthentication.
+    """
+
+    def get_user(self, validated_token):
+        """
+        Возвращает пользователя по утверждениям токена.
+        :param validated_token: Проверенный токен
+        :return: Объект пользователя
+        """
+        if "token_version" not in validated_token:
+            return super().get_user(validated_token)
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Токен не содержит идентификатор пользователя")
+
+        if not validated_token.get("is_active"):
+            raise AuthenticationFailed("Пользователь неактивен", code="user_inactive")
+        cached = User.objects.get_cached(user_id, load=False)
+        if cached is not None and (not cached.is_active or cached.token_version != validated_token["token_version"]):
+            raise AuthenticationFailed("Токен отозван", code="token_revoked")
+        return User.from_claims(user_id, validated_token["is_active"], validated_token["token_version"])
+
+
+async def aauthenticate(request: HttpRequest) -> User:
+    """
+    Аутентифицирует запрос асинхронного представления по JWT. При JWT_CLAIMS_AUTH токен с утверждениями проверяется
+    без обращения к БД, как в ClaimsJWTAuthentication, иначе пользователь загружается асинхронным запросом.
+    :param request: Запрос
+    :return: Объект пользователя
+    :raise NotAuthenticated: Запрос без токена
+    :raise AuthenticationFailed: Токен недействителен, пользователь не найден или неактивен
+    """
+    authentication = ClaimsJWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header is not None else None
+    if raw_token is None:
+        raise NotAuthenticated()
+    validated_token = authentication.get_validated_token(raw_token)
+    if settings.JWT_CLAIMS_AUTH and "token_version" in validated_token:
+        # simplejwt аннотирует get_user базовым AbstractBaseUser, модель пользователя проекта — User
+        return cast(User, authentication.get_user(validated_token))
+
+    user = await User.objects.filter(pk=validated_token.get(api_settings.USER_ID_CLAIM)).afirst()
+    if user is None:
+        raise AuthenticationFailed("Пользователь не найден", code="user_not_found")
+    if not user.is_active:
+        raise AuthenticationFailed("Пользователь неактивен", code="user_inactive")
+    return user
@@ -0,0 +1,134 @@
+"""
+Хеширование паролей: хешеры с параметрами из настроек и выполнение хеширования в ограниченном пуле потоков.
+
+Алгоритм новых хешей выбирается переменной окружения PASSWORD_HASHER (pbkdf2, scrypt или argon2), остальные хешеры
+остаются в PASSWORD_HASHERS для проверки ранее сохранённых паролей. При успешном входе Django пересчитывает хеш пароля,
+если он получен другим алгоритмом или с другими параметрами, поэтому смена алгоритма или параметров применяется
+постепенно, по мере входа пользователей.
+"""
+
+import asyncio
+import threading
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import TypeVar
+
+from django.conf import settings
+from django.contrib.auth.hashers import ScryptPasswordHasher  # type: ignore[attr-defined]  # нет в django-stubs 5.1
+from django.contrib.auth.hashers import Argon2PasswordHasher, PBKDF2PasswordHasher
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+from asgiref.sync import sync_to_async
+
+T = TypeVar("T")
+
+# Пул потоков хеширования паролей, создаётся при первом хешировании
+_executor: ThreadPoolExecutor | None = None
+# Блокировка создания пула: одновременные первые входы в потоках воркера не должны создать несколько пулов
+_executor_lock = threading.Lock()
+
+
+class TunedPBKDF2PasswordHasher(PBKDF2PasswordHasher):
+    """
+    PBKDF2 с количеством итераций из настройки PASSWORD_PBKDF2_ITERATIONS.
+    """
+
+    iterations = settings.PASSWORD_PBKDF2_ITERATIONS
+
+
+class TunedScryptPasswordHasher(ScryptPasswordHasher):
+    """
+    scrypt с параметрами из настроек PASSWORD_SCRYPT_WORK_FACTOR, PASSWORD_SCRYPT_BLOCK_SIZE и
+    PASSWORD_SCRYPT_PARALLELISM. Память на один хеш — 128 * work_factor * block_size байт.
+    """
+
+    work_factor = settings.PASSWORD_SCRYPT_WORK_FACTOR
+    block_size = settings.PASSWORD_SCRYPT_BLOCK_SIZE
+    parallelism = settings.PASSWORD_SCRYPT_PARALLELISM
+
+
+class TunedArgon2PasswordHasher(Argon2PasswordHasher):
+    """
+    Argon2id с параметрами из настроек PASSWORD_ARGON2_TIME_COST, PASSWORD_ARGON2_MEMORY_COST (в КиБ) и
+    PASSWORD_ARGON2_PARALLELISM. Требует пакет argon2-cffi.
+    """
+
+    time_cost = settings.PASSWORD_ARGON2_TIME_COST
+    memory_cost = settings.PASSWORD_ARGON2_MEMORY_COST
+    parallelism = settings.PASSWORD_ARGON2_PARALLELISM
+
+
+# Параметры хешеров, которые задаются настройками: настройка → (хешер, атрибут)
+HASHER_SETTINGS = {
+    "PASSWORD_PBKDF2_ITERATIONS": (TunedPBKDF2PasswordHasher, "iterations"),
+    "PASSWORD_SCRYPT_WORK_FACTOR": (TunedScryptPasswordHasher, "work_factor"),
+    "PASSWORD_SCRYPT_BLOCK_SIZE": (TunedScryptPasswordHasher, "block_size"),
+    "PASSWORD_SCRYPT_PARALLELISM": (TunedScryptPasswordHasher, "parallelism"),
+    "PASSWORD_ARGON2_TIME_COST": (TunedArgon2PasswordHasher, "time_cost"),
+    "PASSWORD_ARGON2_MEMORY_COST": (TunedArgon2PasswordHasher, "memory_cost"),
+    "PASSWORD_ARGON2_PARALLELISM": (TunedArgon2PasswordHasher, "parallelism"),
+}
+
+
+@receiver(setting_changed)
+def update_hasher_parameters(*, setting: str, value, **kwargs) -> None:
+    """
+    Обновляет параметры хешеров при изменении настроек (override_settings в тестах): параметры читаются из настроек
+    при импорте модуля.
+    :param setting: Имя изменённой настройки
+    :param value: Новое значение настройки
+    :return:
+    """
+    if setting in HASHER_SETTINGS:
+        hasher, attribute = HASHER_SETTINGS[setting]
+        setattr(hasher, attribute, value)
+
+
+def get_executor() -> ThreadPoolExecutor | None:
+    """
+    Возвращает пул потоков хеширования паролей размером PASSWORD_HASH_THREADS.
+    :return: Пул потоков или None, если хеширование выполняется в потоке запроса (PASSWORD_HASH_THREADS=0)
+    """
+    global _executor
+    if settings.PASSWORD_HASH_THREADS <= 0:
+        return None
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.PASSWORD_HASH_THREADS, thread_name_prefix="password-hash"
+                )
+    return _executor
+
+
+def run_hasher(func: Callable[..., T], *args) -> T:
+    """
+    Выполняет хеширование или проверку пароля в пуле потоков хеширования и ожидает результат.
+    Поток запроса ждёт результат, поэтому пул не освобождает его — он только ограничивает количество одновременно
+    хешируемых паролей в процессе: при наплыве входов и регистраций в воркере с потоками (gunicorn --threads больше
+    PASSWORD_HASH_THREADS) остальные потоки не ждут освобождения процессора от хеширования. Хеширование PBKDF2, scrypt
+    и Argon2 отпускает GIL, поэтому потоки пула выполняются параллельно.
+    В главном потоке (синхронный воркер без потоков) процесс обрабатывает один запрос, ограничивать нечего, поэтому
+    хеширование выполняется без пула.
+    :param func: Функция хеширования (make_password, check_password)
+    :param args: Аргументы функции
+    :return: Результат функции
+    """
+    executor = get_executor()
+    if executor is None or threading.current_thread() is threading.main_thread():
+        return func(*args)
+    return executor.submit(func, *args).result()
+
+
+async def arun_hasher(func: Callable[..., T], *args) -> T:
+    """
+    Асинхронно выполняет хеширование или проверку пароля в пуле потоков хеширования, не блокируя цикл событий.
+    :param func: Функция хеширования (make_password, verify_password)
+    :param args: Аргументы функции
+    :return: Результат функции
+    """
+    executor = get_executor()
+    if executor is None:
+        return await sync_to_async(func, thread_sensitive=False)(*args)
+    return await asyncio.wrap_future(executor.submit(func, *args))
@@ -0,0 +1,21 @@
+# Generated by Django 5.2 on 2026-10-18 12:00
+
+import timezone_field.fields
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("user", "0003_user_telegram_chat_id"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="timezone",
+            field=timezone_field.fields.TimeZoneField(
+                db_index=True, default="Asia/Almaty", verbose_name="Часовой пояс"
+            ),
+        ),
+    ]
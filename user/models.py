@@ -1,6 +1,21 @@
+import threading
+import time
+from itertools import islice
+
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
 from django.contrib.auth.models import AbstractBaseUser, BaseUserManager, PermissionsMixin
 from django.db import models
 
+from timezone_field import TimeZoneField
+
+from user.hashers import arun_hasher, run_hasher
+
+# Кеш пользователей процесса: id пользователя -> (момент устаревания записи по time.monotonic(), пользователь)
+_cached_users: dict[int, tuple[float, "User"]] = {}
+# Блокировка вытеснения и добавления записей кеша пользователей: кеш общий для потоков процесса
+_cached_users_lock = threading.Lock()
+
 
 class UserManager(BaseUserManager):
     """
@@ -27,6 +42,23 @@ class UserManager(BaseUserManager):
         user.save(using=self._db)
         return user
 
+    async def acreate_user(self, email, password=None, **extra_fields):
+        """
+        Асинхронно создаёт обычного пользователя. Пароль хешируется в пуле потоков хеширования, не блокируя цикл
+        событий.
+        :param email: Электронная почта пользователя
+        :param password: Пароль пользователя
+        :param extra_fields: Дополнительные поля пользователя
+        :return: Объект пользователя
+        """
+        if not email:
+            raise ValueError("Email обязателен")
+        email = self.normalize_email(email)
+        user = self.model(email=email, **extra_fields)
+        await user.aset_password(password)
+        await user.asave(using=self._db)
+        return user
+
     def create_superuser(self, email, password=None, **extra_fields):
         """
         Создаёт суперпользователя.
@@ -45,6 +77,40 @@ class UserManager(BaseUserManager):
             raise ValueError("У суперпользователя должно быть is_superuser=True.")
         return self.create_user(email, password, **extra_fields)
 
+    def get_cached(self, user_id: int, load: bool = True) -> "User | None":
+        """
+        Возвращает пользователя из кеша процесса. Записи кеша живут USER_CACHE_TIMEOUT секунд и удаляются при
+        сохранении пользователя в этом процессе; другие процессы видят изменения по истечении времени жизни записи.
+        :param user_id: id пользователя
+        :param load: Загрузить пользователя из БД, если его нет в кеше
+        :return: Объект пользователя или None, если пользователь не найден (или не загружен при load=False)
+        """
+        now = time.monotonic()
+        cached = _cached_users.get(user_id)
+        if cached is not None and cached[0] > now:
+            return cached[1]
+        if not load:
+            return None
+        user = self.filter(pk=user_id).first()
+        if user is not None and settings.USER_CACHE_TIMEOUT > 0:
+            with _cached_users_lock:
+                if len(_cached_users) >= settings.USER_CACHE_MAX_SIZE:
+                    # Сначала удаляются устаревшие записи, затем, если их не было, — самая старая (если кеш не пуст)
+                    expired = [key for key, (expires, _) in _cached_users.items() if expires <= now]
+                    for key in expired or list(islice(_cached_users, 1)):
+                        _cached_users.pop(key, None)
+                _cached_users[user_id] = (now + settings.USER_CACHE_TIMEOUT, user)
+        return user
+
+    def invalidate_cached(self, user_id: int) -> None:
+        """
+        Удаляет пользователя из кеша процесса.
+        :param user_id: id пользователя
+        :return:
+        """
+        with _cached_users_lock:
+            _cached_users.pop(user_id, None)
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     """
@@ -57,6 +123,10 @@ class User(AbstractBaseUser, PermissionsMixin):
         is_staff (bool): Признак, является ли пользователь суперпользователем
         is_superuser (bool): Признак, является ли пользователь суперпользователем
         date_joined (datetime): Дата и время регистрации
+        telegram_chat_id (str): id чата пользователя в Telegram
+        timezone (ZoneInfo): Часовой пояс пользователя, в котором задано время его привычек
+        token_version (int): Версия токенов пользователя, увеличивается при смене пароля и деактивации, отзывая
+            выданные ранее токены
     """
 
     # Комменты '# type: ignore[var-annotated]' для mypy - чтобы не требовал аннотаций типов
@@ -72,6 +142,13 @@ class User(AbstractBaseUser, PermissionsMixin):
     telegram_chat_id = models.CharField(
         max_length=50, blank=True, null=True, verbose_name="Telegram chat ID"
     )  # type: ignore[var-annotated]
+    timezone = TimeZoneField(
+        default=settings.TIME_ZONE, db_index=True, verbose_name="Часовой пояс"
+    )  # type: ignore[var-annotated]
+    # Версия токенов — передаётся в утверждениях JWT и увеличивается при смене пароля и деактивации пользователя
+    token_version = models.PositiveIntegerField(
+        default=0, verbose_name="Версия токенов"
+    )  # type: ignore[var-annotated]
 
     objects = UserManager()
 
@@ -82,6 +159,112 @@ class User(AbstractBaseUser, PermissionsMixin):
     ]  # поля, требуемые при создании пользователя (кроме email и пароля)
 
     id: int  # Для mypy
+    _loaded_is_active: bool | None  # Для mypy: признак активности при загрузке из БД (from_db)
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        """
+        Создаёт объект пользователя из строки БД и запоминает загруженный часовой пояс, чтобы после сохранения можно
+        было определить, изменился ли он.
+        """
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_timezone = instance.__dict__.get("timezone")
+        instance._loaded_is_active = instance.__dict__.get("is_active")
+        return instance
+
+    @classmethod
+    def from_claims(cls, user_id: int, is_active: bool, token_version: int) -> "User":
+        """
+        Создаёт объект пользователя по утверждениям JWT без запроса к БД. Остальные поля пользователя отложены и
+        загружаются из кеша пользователей процесса при первом обращении к любому из них.
+        :param user_id: id пользователя
+        :param is_active: Признак активности пользователя
+        :param token_version: Версия токенов пользователя
+        :return: Объект пользователя
+        """
+        claims = {"id": user_id, "is_active": is_active, "token_version": token_version}
+        fields = [field.attname for field in cls._meta.fields if field.attname in claims]
+        instance = cls.from_db(None, fields, [claims[field] for field in fields])
+        instance._from_claims = True
+        return instance
+
+    def refresh_from_db(self, using=None, fields=None, from_queryset=None):
+        """
+        Загружает отложенные поля пользователя, созданного по утверждениям JWT, из кеша пользователей процесса — все
+        сразу, а не по одному запросу на поле.
+        """
+        deferred = self.get_deferred_fields()
+        if not getattr(self, "_from_claims", False) or fields is None or not set(fields) <= deferred:
+            return super().refresh_from_db(using=using, fields=fields, from_queryset=from_queryset)
+        user = User.objects.get_cached(self.pk)
+        if user is None:
+            raise User.DoesNotExist(f"Пользователь {self.pk} не найден")
+        for field in deferred:
+            self.__dict__[field] = user.__dict__[field]
+        self._loaded_timezone = self.timezone
+        self._from_claims = False
+
+    @property
+    def deactivated(self) -> bool:
+        """
+        Признак того, что пользователь деактивирован после загрузки из БД.
+        """
+        return getattr(self, "_loaded_is_active", None) is True and not self.is_active
+
+    def set_password(self, raw_password):
+        """
+        Устанавливает пароль пользователя и отзывает выданные ранее токены. Хеш вычисляется в пуле потоков
+        хеширования паролей.
+        :param raw_password: Новый пароль
+        :return:
+        """
+        self.password = run_hasher(make_password, raw_password)
+        self._password = raw_password
+        self.token_version += 1
+
+    async def aset_password(self, raw_password):
+        """
+        Асинхронно устанавливает пароль пользователя и отзывает выданные ранее токены.
+        :param raw_password: Новый пароль
+        :return:
+        """
+        self.password = await arun_hasher(make_password, raw_password)
+        self._password = raw_password
+        self.token_version += 1
+
+    def check_password(self, raw_password):
+        """
+        Проверяет пароль пользователя в пуле потоков хеширования паролей. Если хеш получен другим алгоритмом или с
+        другими параметрами, чем у текущего хешера, пересчитывает и сохраняет его — без отзыва токенов, так как
+        пароль не изменился.
+        :param raw_password: Проверяемый пароль
+        :return: Признак совпадения пароля
+        """
+        is_correct, must_update = run_hasher(verify_password, raw_password, self.password)
+        if is_correct and must_update:
+            self.password = run_hasher(make_password, raw_password)
+            self._password = None
+            self.save(update_fields=["password"])
+        return is_correct
+
+    def save(self, *args, **kwargs):
+        """
+        Сохраняет пользователя. При деактивации увеличивает версию токенов, отзывая выданные ранее токены.
+        """
+        if self.deactivated:
+            self.token_version += 1
+            if kwargs.get("update_fields") is not None:
+                kwargs["update_fields"] = {*kwargs["update_fields"], "token_version"}
+        super().save(*args, **kwargs)
+        self._loaded_is_active = self.is_active
+
+    @property
+    def timezone_changed(self) -> bool:
+        """
+        Признак того, что часовой пояс изменён после загрузки пользователя из БД.
+        """
+        loaded = getattr(self, "_loaded_timezone", None)
+        return loaded is not None and loaded != self.timezone
 
     def __str__(self):
         """
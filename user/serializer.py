@@ -1,4 +1,8 @@
 from rest_framework import serializers
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from timezone_field.rest_framework import TimeZoneSerializerField
 
 from user.models import User
 
@@ -9,16 +13,18 @@ class RegisterSerializer(serializers.ModelSerializer):
     Attributes:
         email (str): Электронная почта пользователя
         password (str): Пароль
+        timezone (str): Часовой пояс пользователя (необязательный)
     """
 
     password = serializers.CharField(write_only=True, min_length=8)
+    timezone = TimeZoneSerializerField(required=False)
 
     class Meta:
         model = User
-        fields = ("email", "password")
+        fields = ("email", "password", "timezone")
 
     def create(self, validated_data):
-        user = User.objects.create_user(email=validated_data.get("email"), password=validated_data["password"])
+        user = User.objects.create_user(**validated_data)
         return user
 
 
@@ -36,3 +42,46 @@ class UserListSerializer(serializers.ModelSerializer):
     class Meta:
         model = User
         fields = ("id", "email", "first_name", "last_name")
+
+
+class UserTokenObtainPairSerializer(TokenObtainPairSerializer):
+    """
+    Представляет сериализатор входа пользователя. Добавляет в токены утверждения is_active и token_version, по которым
+    ClaimsJWTAuthentication аутентифицирует запросы без обращения к БД.
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        """
+        Создаёт токен обновления пользователя с утверждениями is_active и token_version.
+        :param user: Объект пользователя
+        :return: Токен обновления
+        """
+        token = super().get_token(user)
+        token["is_active"] = user.is_active
+        token["token_version"] = user.token_version
+        return token
+
+
+class UserTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Представляет сериализатор обновления токена доступа. Отклоняет токены, отозванные сменой пароля или деактивацией
+    пользователя (версия токенов в токене не совпадает с версией пользователя).
+    """
+
+    def validate(self, attrs):
+        """
+        Проверяет версию токенов и выдаёт новый токен доступа.
+        :param attrs: Данные запроса
+        :return: Новый токен доступа (и токен обновления при ROTATE_REFRESH_TOKENS)
+        """
+        refresh = self.token_class(attrs["refresh"])
+        token_version = refresh.payload.get("token_version")
+        if (
+            token_version is not None
+            and not User.objects.filter(
+                pk=refresh.payload.get(api_settings.USER_ID_CLAIM), token_version=token_version
+            ).exists()
+        ):
+            raise AuthenticationFailed("Токен отозван", code="token_revoked")
+        return super().validate(attrs)
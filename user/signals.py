@@ -0,0 +1,16 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from user.models import User
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance: User, **kwargs) -> None:
+    """
+    Удаляет изменённого или удалённого пользователя из кеша пользователей процесса.
+    :param sender: Класс модели
+    :param instance: Пользователь
+    :return:
+    """
+    User.objects.invalidate_cached(instance.pk)
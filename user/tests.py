@@ -1,8 +1,21 @@
+import sys
+import threading
+import time as time_module
+from concurrent.futures import ThreadPoolExecutor
+from datetime import time, timedelta
+from unittest.mock import Mock, patch
+
+from django.test import override_settings
 from django.urls import reverse
 
 from rest_framework import status
 from rest_framework.test import APITestCase
 
+from habit.models import Habit
+from habit.views import HabitViewSet
+from user import hashers, models
+from user.authentication import ClaimsJWTAuthentication
+from user.hashers import run_hasher
 from user.models import User
 
 
@@ -34,6 +47,15 @@ class UserTests(APITestCase):
         self.assertEqual(response.status_code, status.HTTP_201_CREATED)
         self.assertTrue(User.objects.filter(email=self.user_data["email"]).exists())
 
+    def test_user_registration_with_timezone(self):
+        """
+        Тестирует регистрацию пользователя с указанием часового пояса.
+        :return:
+        """
+        response = self.client.post(self.registration_url, {**self.user_data, "timezone": "Europe/Berlin"})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(str(User.objects.get(email=self.user_data["email"]).timezone), "Europe/Berlin")
+
     def test_user_login_with_valid_credentials(self):
         """
         Тестирует авторизацию пользователя.
@@ -79,3 +101,221 @@ class UserTests(APITestCase):
         """
         user = User.objects.create_user(**self.user_data)
         self.assertEqual(str(user), self.user_data["email"])
+
+
+class ClaimsJWTAuthenticationTests(APITestCase):
+    """
+    Класс для тестирования аутентификации по утверждениям JWT.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.password = "StrongPassword123"
+        self.user = User.objects.create_user(email="claims@example.com", first_name="Claims", password=self.password)
+        self.patcher = patch.object(HabitViewSet, "authentication_classes", [ClaimsJWTAuthentication])
+        self.patcher.start()
+        self.addCleanup(self.patcher.stop)
+
+    def login(self) -> dict:
+        """
+        Выполняет вход пользователя.
+        :return: Токены доступа и обновления
+        """
+        response = self.client.post(reverse("user:login"), {"email": self.user.email, "password": self.password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data
+
+    def test_request_does_not_query_user(self):
+        """
+        Тестирует, что запрос списка привычек не загружает пользователя из БД, а поля пользователя загружаются одним
+        запросом при первом обращении.
+        :return:
+        """
+        Habit.objects.create(
+            user=self.user, place="Home", time=time(8, 0), action="Read", duration=timedelta(minutes=1)
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        # COUNT(*) и страница привычек
+        with self.assertNumQueries(2):
+            response = self.client.get(reverse("habit:habit-list"))
+        self.assertEqual(response.data["results"][0]["user"], self.user.id)
+
+        user = User.from_claims(self.user.id, True, self.user.token_version)
+        with self.assertNumQueries(1):
+            self.assertEqual(user.email, "claims@example.com")
+            self.assertEqual(user.first_name, "Claims")
+        with self.assertNumQueries(0):
+            self.assertEqual(User.from_claims(self.user.id, True, self.user.token_version).email, user.email)
+
+    def test_password_change_revokes_tokens(self):
+        """
+        Тестирует отзыв токенов при смене пароля: токен нельзя обновить, а процесс, знающий новую версию токенов
+        пользователя, отклоняет токен доступа.
+        :return:
+        """
+        tokens = self.login()
+        self.user.set_password("AnotherPassword123")
+        self.user.save()
+
+        response = self.client.post(reverse("user:token_refresh"), {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        User.objects.get_cached(self.user.id)
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {tokens['access']}")
+        self.assertEqual(self.client.get(reverse("habit:habit-list")).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        self.password = "AnotherPassword123"
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {self.login()['access']}")
+        self.assertEqual(self.client.get(reverse("habit:habit-list")).status_code, status.HTTP_200_OK)
+
+    def test_deactivation_revokes_tokens(self):
+        """
+        Тестирует отзыв токенов при деактивации пользователя.
+        :return:
+        """
+        tokens = self.login()
+        user = User.objects.get(id=self.user.id)
+        user.is_active = False
+        user.save(update_fields=["is_active"])
+        user.refresh_from_db()
+        self.assertEqual(user.token_version, self.user.token_version + 1)
+
+        response = self.client.post(reverse("user:token_refresh"), {"refresh": tokens["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+
+class UserCacheTests(APITestCase):
+    """
+    Класс для тестирования кеша пользователей процесса.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.users = [User.objects.create(email=f"cached{number}@example.com") for number in range(3)]
+        patcher = patch.dict(models._cached_users, clear=True)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @override_settings(USER_CACHE_MAX_SIZE=2, USER_CACHE_TIMEOUT=30)
+    def test_eviction_at_max_size(self):
+        """
+        Тестирует вытеснение записей кеша при достижении USER_CACHE_MAX_SIZE: сначала устаревшие записи, затем самая
+        старая.
+        :return:
+        """
+        first, second, third = self.users
+        User.objects.get_cached(first.id)
+        User.objects.get_cached(second.id)
+        User.objects.get_cached(third.id)
+        self.assertEqual(list(models._cached_users), [second.id, third.id])
+
+        with patch("user.models.time.monotonic", return_value=time_module.monotonic() + 60):
+            User.objects.get_cached(first.id)
+        self.assertEqual(list(models._cached_users), [first.id])
+
+    @override_settings(USER_CACHE_MAX_SIZE=0, USER_CACHE_TIMEOUT=30)
+    def test_eviction_with_empty_cache(self):
+        """
+        Тестирует загрузку пользователя, когда вытеснять из пустого кеша нечего.
+        :return:
+        """
+        self.assertEqual(User.objects.get_cached(self.users[0].id), self.users[0])
+        self.assertEqual(list(models._cached_users), [self.users[0].id])
+
+    @override_settings(USER_CACHE_MAX_SIZE=4, USER_CACHE_TIMEOUT=30)
+    def test_concurrent_eviction(self):
+        """
+        Тестирует одновременное заполнение и вытеснение кеша из нескольких потоков: размер кеша не превышает
+        USER_CACHE_MAX_SIZE.
+        :return:
+        """
+        loaded = {user.id: user for user in self.users}
+        loaded.update({user_id: User(id=user_id) for user_id in range(1000, 1200)})
+
+        # Пользователи загружаются без запросов к БД: потоки не видят данные транзакции теста
+        load = patch.object(User.objects, "filter", lambda pk: Mock(first=Mock(return_value=loaded[pk])))
+        # Частое переключение потоков, чтобы вытеснение и добавление записей перемежались
+        switch_interval = sys.getswitchinterval()
+        sys.setswitchinterval(1e-6)
+        self.addCleanup(sys.setswitchinterval, switch_interval)
+        with load, ThreadPoolExecutor(max_workers=8) as executor:
+            results = list(executor.map(User.objects.get_cached, list(loaded) * 20))
+        self.assertEqual(len(results), len(loaded) * 20)
+        self.assertLessEqual(len(models._cached_users), 4)
+
+
+class PasswordHasherTests(APITestCase):
+    """
+    Класс для тестирования хеширования паролей.
+    """
+
+    def setUp(self):
+        """
+        Настраивает тестовые данные.
+        :return:
+        """
+        self.password = "StrongPassword123"
+        with override_settings(PASSWORD_PBKDF2_ITERATIONS=1000):
+            self.user = User.objects.create_user(email="hasher@example.com", password=self.password)
+
+    def test_login_rehashes_password_with_configured_hasher(self):
+        """
+        Тестирует пересчёт хеша пароля при входе после смены алгоритма хеширования без отзыва токенов.
+        :return:
+        """
+        self.assertTrue(self.user.password.startswith("pbkdf2_sha256$1000$"))
+        response = self.client.post(reverse("user:login"), {"email": self.user.email, "password": self.password})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        with override_settings(
+            PASSWORD_HASHERS=["user.hashers.TunedScryptPasswordHasher", "user.hashers.TunedPBKDF2PasswordHasher"],
+            PASSWORD_SCRYPT_WORK_FACTOR=2**10,
+        ):
+            login = self.client.post(reverse("user:login"), {"email": self.user.email, "password": self.password})
+            self.assertEqual(login.status_code, status.HTTP_200_OK)
+            user = User.objects.get(id=self.user.id)
+            self.assertTrue(user.password.startswith("scrypt$"))
+            self.assertTrue(user.check_password(self.password))
+
+        self.assertEqual(user.token_version, self.user.token_version)
+        response = self.client.post(reverse("user:token_refresh"), {"refresh": response.data["refresh"]})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_hashing_runs_in_thread_pool(self):
+        """
+        Тестирует выполнение хеширования в пуле потоков хеширования паролей.
+        :return:
+        """
+
+        def get_thread_name() -> str:
+            return threading.current_thread().name
+
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="request") as executor:
+            self.assertTrue(executor.submit(run_hasher, get_thread_name).result().startswith("password-hash"))
+            with override_settings(PASSWORD_HASH_THREADS=0):
+                self.assertTrue(executor.submit(run_hasher, get_thread_name).result().startswith("request"))
+        # В главном потоке (синхронный воркер без потоков) пул не используется
+        self.assertEqual(run_hasher(get_thread_name), threading.main_thread().name)
+
+    def test_executor_created_once(self):
+        """
+        Тестирует создание одного пула потоков хеширования при одновременных первых входах.
+        :return:
+        """
+        barrier = threading.Barrier(8)
+
+        def get():
+            barrier.wait()
+            return hashers.get_executor()
+
+        with patch.object(hashers, "_executor", None):
+            with ThreadPoolExecutor(max_workers=8) as executor:
+                pools = set(executor.map(lambda _: get(), range(8)))
+            self.assertEqual(len(pools), 1)
+            pools.pop().shutdown()
@@ -13,6 +13,7 @@ class RegisterAPIView(CreateAPIView):
     Параметры запроса:
     - email (str): Email пользователя
     - password (str): Пароль не менее 8 символов
+    - timezone (str): Часовой пояс пользователя, например Europe/Moscow (необязательный, по умолчанию — Asia/Almaty)
     """
 
     serializer_class = RegisterSerializer